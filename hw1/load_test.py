@@ -1,66 +1,108 @@
-import requests
-import time
-import matplotlib.pyplot as plt
-import numpy as np
-from datetime import datetime, timedelta
+"""
+Load test for the hw1 albums API.
 
-def load_test(url, duration_seconds=30):
-    response_times = []
-    start_time = time.time()
-    end_time = start_time + duration_seconds
-    
-    print(f"Starting load test for {duration_seconds} seconds...")
-    
-    while time.time() < end_time:
-        try:
-            start_request = time.time()
-            response = requests.get(url, timeout=10)
-            end_request = time.time()
-            
-            response_time = (end_request - start_request) * 1000  # Convert to milliseconds
-            response_times.append(response_time)
-            
-            if response.status_code == 200:
-                print(f"Request {len(response_times)}: {response_time:.2f}ms")
-            else:
-                print(f"Request {len(response_times)}: Failed with status {response.status_code}")
-                
-        except requests.exceptions.RequestException as e:
-            print(f"Request failed: {e}")
-            
-    return response_times
+Sends requests open-loop at a target rate (or as fast as possible with
+--rate 0) from a pool of asyncio workers, and reports latency percentiles
+from an HDR histogram. Latency is measured from when each request was due,
+so a slow server shows up as higher latency instead of fewer requests (see
+loadtools/loadgen.py). With --processes N the load is split across N worker
+processes and their histograms are merged exactly (loadtools/distributed.py),
+for when one Python process cannot keep up with the target rate.
+--save-result writes a result file that loadtools/compare.py can diff
+against another run.
+
+Usage:
+    python load_test.py [--url http://<EC2_IP>:8080] [--rate 200] [--duration 30] [--concurrency 50]
+        [--processes 4] [--endpoint "GET /albums:3" --endpoint "GET /albums/1:1"] [--json results.json]
+        [--save-result results/] [--plot]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from loadtools.distributed import run_processes  # noqa: E402
+from loadtools.loadgen import Endpoint, LoadGenerator  # noqa: E402
+from loadtools.results import save_result  # noqa: E402
 
 # Replace with your EC2 public IP
-EC2_URL = "http://107.20.111.131:8080/albums"
+EC2_URL = "http://107.20.111.131:8080"
+
+
+def print_report(report: dict):
+    print(f"\nTarget: {report['base_url']}  rate: {report['target_rps'] or 'max'} req/s  "
+          f"concurrency: {report['concurrency']}  processes: {report['processes']}  duration: {report['duration_seconds']}s")
+    if report["late_sends"]:
+        print(f"Warning: {report['late_sends']} requests went out late (up to {report['max_send_lag_ms']}ms); "
+              f"all workers were busy, raise --concurrency if the server is not the bottleneck")
+
+    print(f"\n{'endpoint':<20} {'reqs':>8} {'req/s':>8} {'errors':>7} {'p50 ms':>8} {'p90 ms':>8} "
+          f"{'p99 ms':>8} {'p99.9 ms':>9} {'max ms':>8}")
+    rows = list(report["endpoints"].items())
+    if len(rows) > 1:
+        rows.append(("total", report["total"]))
+    for name, s in rows:
+        print(f"{name:<20} {s['requests']:>8} {s['throughput_rps']:>8.1f} {s['error_rate']:>7.1%} {s['p50_ms']:>8.2f} "
+              f"{s['p90_ms']:>8.2f} {s['p99_ms']:>8.2f} {s['p99.9_ms']:>9.2f} {s['max_ms']:>8.2f}")
+    print(f"\nStatuses: {report['total']['statuses']}")
+
+
+def plot(generator: LoadGenerator):
+    """Latency by percentile, the usual way to read an HDR histogram"""
+    import matplotlib.pyplot as plt
 
-# Run the test
-response_times = load_test(EC2_URL)
+    h = generator.total.histogram
+    percentiles = [p for p in (0, 50, 75, 90, 95, 99, 99.5, 99.9, 99.99, 100)]
+    # Plot against 1/(1 - p) so the tail gets room
+    xs = [1 / (1 - p / 100) if p < 100 else 1e5 for p in percentiles]
+    plt.figure(figsize=(12, 6))
+    plt.plot(xs, [h.value_at_percentile(p) / 1000 for p in percentiles], marker="o")
+    plt.xscale("log")
+    plt.xticks(xs, [f"{p:g}%" for p in percentiles])
+    plt.xlabel("Percentile")
+    plt.ylabel("Response Time (ms)")
+    plt.title("Response Time by Percentile")
+    plt.tight_layout()
+    plt.show()
 
-# Plot the results
-plt.figure(figsize=(12, 8))
 
-# Histogram
-plt.subplot(2, 1, 1)
-plt.hist(response_times, bins=50, alpha=0.7, color='blue')
-plt.xlabel('Response Time (ms)')
-plt.ylabel('Frequency')
-plt.title('Distribution of Response Times')
+def main(args):
+    endpoints = [Endpoint.parse(spec) for spec in args.endpoint or ["GET /albums"]]
+    settings = dict(rate=args.rate or None, duration=args.duration, concurrency=args.concurrency, timeout=args.timeout)
+    print(f"Starting load test for {args.duration:g} seconds...")
+    if args.processes > 1:
+        generator = run_processes(args.processes, args.url, endpoints, **settings)
+    else:
+        generator = LoadGenerator(args.url, endpoints, **settings)
+        asyncio.run(generator.run())
+    report = generator.summary()
+    print_report(report)
 
-# Scatter plot over time
-plt.subplot(2, 1, 2)
-plt.scatter(range(len(response_times)), response_times, alpha=0.6)
-plt.xlabel('Request Number')
-plt.ylabel('Response Time (ms)')
-plt.title('Response Times Over Time')
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_result:
+        config = {"url": args.url, "rate": args.rate, "duration": args.duration, "concurrency": args.concurrency,
+                  "processes": args.processes, "endpoints": [f"{e.name}:{e.weight:g}" for e in endpoints]}
+        print(f"Result saved to {save_result(args.save_result, 'loadgen', args.name, config, generator.result_endpoints())}")
+    if args.plot:
+        plot(generator)
 
-plt.tight_layout()
-plt.show()
 
-# Print statistics
-print(f"\nStatistics:")
-print(f"Total requests: {len(response_times)}")
-print(f"Average response time: {np.mean(response_times):.2f}ms")
-print(f"Median response time: {np.median(response_times):.2f}ms")
-print(f"95th percentile: {np.percentile(response_times, 95):.2f}ms")
-print(f"99th percentile: {np.percentile(response_times, 99):.2f}ms")
-print(f"Max response time: {max(response_times):.2f}ms")
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=EC2_URL)
+    parser.add_argument("--endpoint", action="append", metavar='"[METHOD] /path[:weight]"',
+                        help="Endpoint to hit (repeatable; default GET /albums)")
+    parser.add_argument("--rate", type=float, default=100.0, help="Target requests per second; 0 for closed loop")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--concurrency", type=int, default=50, help="Maximum requests in flight")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes to split the load across")
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--save-result", metavar="PATH", help="Write a result file (or into this directory) for loadtools.compare")
+    parser.add_argument("--name", default="hw1-load-test", help="Run label stored in the result file")
+    parser.add_argument("--plot", action="store_true", help="Plot latency by percentile (needs matplotlib)")
+    main(parser.parse_args())
@@ -1,9 +1,14 @@
 # locustfile.py - Basic load test with 1:1 GET/POST ratio
 from locust import HttpUser, task, between
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from loadtools.locust_plugin import scheduled  # noqa: E402  (also reports corrected latency)
 
 class BasicUser(HttpUser):
     # Simulate realistic user behavior with 1-2s between requests
-    wait_time = between(1, 2)
+    wait_time = scheduled(between(1, 2))
     
     @task  # Equal weight - runs 50% of time
     def get_item(self):
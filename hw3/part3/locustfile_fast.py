@@ -1,9 +1,14 @@
 # locustfile_fast.py - Using FastHttpUser for better performance
 from locust import FastHttpUser, task, between
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from loadtools.locust_plugin import scheduled  # noqa: E402  (also reports corrected latency)
 
 class FastLocalTestUser(FastHttpUser): # FastHttpUser for better performance
     # Same test logic, different base class
-    wait_time = between(0.5, 1.5)
+    wait_time = scheduled(between(0.5, 1.5))
     
     @task(3)  # Weight 3 - runs 75% of time
     def get_item(self):
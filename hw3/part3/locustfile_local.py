@@ -1,9 +1,14 @@
 # locustfile_local.py - Realistic load test with 3:1 GET/POST ratio
 from locust import HttpUser, task, between
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from loadtools.locust_plugin import scheduled  # noqa: E402  (also reports corrected latency)
 
 class LocalTestUser(HttpUser):
     # Shorter wait time for higher load
-    wait_time = between(0.5, 1.5)
+    wait_time = scheduled(between(0.5, 1.5))
     
     @task(3)  # Weight 3 - runs 75% of time
     def get_item(self):
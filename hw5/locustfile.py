@@ -1,10 +1,15 @@
 from locust import HttpUser, FastHttpUser, task, between
 import random
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from loadtools.locust_plugin import scheduled  # noqa: E402  (also reports corrected latency)
 
 class ProductAPIUser(HttpUser):
     """Standard HttpUser for testing Product API"""
-    wait_time = between(1, 3)
+    wait_time = scheduled(between(1, 3))
     
     def on_start(self):
         """Called when a user starts"""
@@ -41,7 +46,7 @@ class ProductAPIUser(HttpUser):
 
 class FastProductAPIUser(FastHttpUser):
     """FastHttpUser for comparison testing"""
-    wait_time = between(1, 3)
+    wait_time = scheduled(between(1, 3))
     
     def on_start(self):
         """Called when a user starts"""
@@ -78,7 +83,7 @@ class FastProductAPIUser(FastHttpUser):
 
 class ReadHeavyUser(HttpUser):
     """User class for read-heavy scenario (90% GET, 10% POST)"""
-    wait_time = between(0.5, 2)
+    wait_time = scheduled(between(0.5, 2))
     
     def on_start(self):
         self.client.verify = False
@@ -109,7 +114,7 @@ class ReadHeavyUser(HttpUser):
 
 class WriteHeavyUser(HttpUser):
     """User class for write-heavy scenario (30% GET, 70% POST)"""
-    wait_time = between(1, 4)
+    wait_time = scheduled(between(1, 4))
     
     def on_start(self):
         self.client.verify = False
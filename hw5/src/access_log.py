@@ -0,0 +1,192 @@
+"""
+Asynchronous, sampled request logging for the Product API.
+
+- Handlers never format or write log lines on the request path: records are
+  pushed onto an in-process queue and a background QueueListener thread
+  formats them (as JSON) and writes them to stderr.
+- AccessLogMiddleware emits one structured access record per request,
+  sampled per endpoint and status class. 5xx responses and unhandled
+  exceptions are always logged.
+
+Configuration (environment variables):
+    LOG_LEVEL            root log level (default INFO)
+    ACCESS_LOG_SAMPLING  JSON object mapping "METHOD /route/{param}" (or "*")
+                         to per-status-class rates, e.g.
+                         '{"*": {"2xx": 0.01, "4xx": 0.1},
+                           "GET /health": {"2xx": 0}}'
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+from typing import Dict, Optional
+
+ACCESS_LOGGER_NAME = "access"
+
+# Default sampling rates per status class; 5xx is forced to 1.0 regardless
+DEFAULT_SAMPLE_RATES: Dict[str, float] = {
+    "1xx": 0.0,
+    "2xx": 0.01,
+    "3xx": 0.01,
+    "4xx": 0.1,
+    "5xx": 1.0,
+}
+
+_STATUS_CLASSES = ("1xx", "1xx", "2xx", "3xx", "4xx", "5xx")
+
+# Attributes every LogRecord has; anything else came in via `extra=`
+_RESERVED_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Render a record as one JSON object per line (runs on the listener thread)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that defers message formatting to the listener thread.
+
+    The stock QueueHandler.prepare() calls format() on the caller's thread so
+    records can be pickled; our queue is in-process, so the record (with its
+    args and exc_info) is passed through untouched.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging() -> logging.handlers.QueueListener:
+    """Route all logging through a queue to a background writer thread"""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    writer = logging.StreamHandler()
+    writer.setFormatter(JsonFormatter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [LazyQueueHandler(log_queue)]
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, writer, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class AccessLogSampler:
+    """Per-endpoint, per-status-class sampling decisions"""
+
+    def __init__(self, rates: Optional[Dict[str, Dict[str, float]]] = None):
+        """
+        Args:
+            rates: {"METHOD /route" or "*": {"2xx": rate, ...}}; missing
+                   entries fall back to "*" and then DEFAULT_SAMPLE_RATES
+        """
+        self._defaults = {**DEFAULT_SAMPLE_RATES, **(rates or {}).get("*", {})}
+        self._overrides = {k: v for k, v in (rates or {}).items() if k != "*"}
+        self._resolved: Dict[tuple, float] = {}
+
+    @classmethod
+    def from_env(cls) -> "AccessLogSampler":
+        raw = os.getenv("ACCESS_LOG_SAMPLING")
+        return cls(json.loads(raw) if raw else None)
+
+    def rate(self, endpoint: str, status: int) -> float:
+        status_class = _STATUS_CLASSES[min(status // 100, 5)]
+        key = (endpoint, status_class)
+        rate = self._resolved.get(key)
+        if rate is None:
+            if status_class == "5xx":
+                rate = 1.0  # errors are never sampled away
+            else:
+                rate = self._overrides.get(endpoint, {}).get(
+                    status_class, self._defaults.get(status_class, 1.0))
+            self._resolved[key] = rate
+        return rate
+
+    def should_log(self, endpoint: str, status: int) -> bool:
+        rate = self.rate(endpoint, status)
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+class AccessLogMiddleware:
+    """Pure ASGI middleware emitting sampled, structured access records"""
+
+    def __init__(self, app, sampler: Optional[AccessLogSampler] = None):
+        self.app = app
+        self.sampler = sampler or AccessLogSampler.from_env()
+        self.logger = logging.getLogger(ACCESS_LOGGER_NAME)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            self._log(scope, 500, start, exc_info=True)
+            raise
+        if self.sampler.should_log(self._endpoint(scope), status):
+            self._log(scope, status, start)
+
+    @staticmethod
+    def _endpoint(scope) -> str:
+        # The router stores the matched route in the shared scope dict
+        route = scope.get("route")
+        return f"{scope['method']} {route.path}" if route is not None else "*"
+
+    def _log(self, scope, status: int, start: float, exc_info: bool = False):
+        duration_ms = (time.perf_counter() - start) * 1000
+        level = logging.ERROR if status >= 500 else logging.INFO
+        self.logger.log(
+            level, "%s %s %d %.2fms", scope["method"], scope["path"], status, duration_ms,
+            exc_info=exc_info,
+            extra={
+                "method": scope["method"],
+                "path": scope["path"],
+                "endpoint": self._endpoint(scope),
+                "status": status,
+                "duration_ms": round(duration_ms, 3),
+            },
+        )
@@ -0,0 +1,82 @@
+"""
+Pre-encoded error responses for the Product API hot error paths.
+
+Raising HTTPException costs an exception, a traceback and a JSON encode of
+a fresh nested dict on every miss. These helpers return ready-made
+Responses instead: constant bodies are encoded once at import, and 404
+bodies for missing product ids are kept in a bounded negative cache that
+is invalidated when the product is inserted.
+"""
+import json
+from collections import OrderedDict
+from typing import Dict
+
+from fastapi.responses import Response
+
+JSON = "application/json"
+
+
+def _encode(error: str, message: str, **extra) -> bytes:
+    """Encode an error body in the same shape HTTPException(detail=...) produces"""
+    return json.dumps(
+        {"detail": {"error": error, "message": message, **extra}},
+        separators=(",", ":"),
+    ).encode()
+
+
+# Constant bodies, encoded once
+INTERNAL_ERROR_BODY = _encode(
+    "INTERNAL_SERVER_ERROR", "Simulated server error for testing (ID=500)")
+DETAILS_NOT_FOUND_BODY = _encode(
+    "PRODUCT_NOT_FOUND", "Product must be created before adding details (test case)")
+
+
+def internal_error() -> Response:
+    return Response(INTERNAL_ERROR_BODY, status_code=500, media_type=JSON)
+
+
+def details_not_found() -> Response:
+    return Response(DETAILS_NOT_FOUND_BODY, status_code=404, media_type=JSON)
+
+
+def id_mismatch(path_id: int, body_id: int) -> Response:
+    body = _encode(
+        "ID_MISMATCH",
+        "Product ID in path does not match request body",
+        details=f"Path ID: {path_id}, Body ID: {body_id}",
+    )
+    return Response(body, status_code=400, media_type=JSON)
+
+
+class NegativeCache:
+    """Bounded cache of pre-encoded 404 bodies for product ids known to be missing"""
+
+    def __init__(self, max_entries: int = 10000):
+        """
+        Args:
+            max_entries: Oldest entries are evicted beyond this size
+        """
+        self.max_entries = max_entries
+        self._bodies: "OrderedDict[int, bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def not_found(self, product_id: int) -> Response:
+        """404 response for a missing product, encoding its body at most once"""
+        body = self._bodies.get(product_id)
+        if body is None:
+            self.misses += 1
+            body = _encode("PRODUCT_NOT_FOUND", f"Product with ID {product_id} not found")
+            self._bodies[product_id] = body
+            if len(self._bodies) > self.max_entries:
+                self._bodies.popitem(last=False)
+        else:
+            self.hits += 1
+        return Response(body, status_code=404, media_type=JSON)
+
+    def invalidate(self, product_id: int):
+        """Forget a missing id once the product exists"""
+        self._bodies.pop(product_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._bodies), "hits": self.hits, "misses": self.misses}
@@ -1,16 +1,23 @@
 """Product API Service Implementation for CS6650"""
-from fastapi import FastAPI, HTTPException, Path, Body
+from fastapi import FastAPI, Path, Body
 from pydantic import BaseModel, Field
 from typing import Dict
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+import errors
+from access_log import AccessLogMiddleware, configure_logging, shutdown_logging
+
+# Configure logging: queued records, written by a background thread
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI(title="Product API", version="1.0.0")
 
+# One sampled access record per request replaces per-handler info logs
+app.add_middleware(AccessLogMiddleware)
+app.add_event_handler("shutdown", shutdown_logging)
+
 # Data Model
 class Product(BaseModel):
     """Product model per OpenAPI specification"""
@@ -24,6 +31,9 @@ class Product(BaseModel):
 # In-memory storage (HashMap for O(1) operations)
 products_db: Dict[int, Product] = {}
 
+# Pre-encoded 404 bodies for ids known to be missing; invalidated on insert
+missing_products = errors.NegativeCache()
+
 # Initialize with test data
 def init_data():
     """Initialize database with sample products"""
@@ -35,7 +45,7 @@ def init_data():
     ]
     for product in test_products:
         products_db[product.product_id] = product
-    logger.info(f"Initialized with {len(products_db)} products")
+    logger.info("Initialized with %d products", len(products_db))
 
 init_data()
 
@@ -46,31 +56,18 @@ async def get_product(product_id: int = Path(..., ge=1)):
     GET endpoint: Retrieve product by ID
     Returns: 200 (success), 404 (not found), 500 (server error)
     """
-    logger.info(f"GET request for product {product_id}")
-    
     # TEST TRIGGER: 500 Error for testing purposes
     if product_id == 500:
-        logger.error("TEST: Triggering 500 error for product_id=500")
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "error": "INTERNAL_SERVER_ERROR",
-                "message": "Simulated server error for testing (ID=500)"
-            }
-        )
+        logger.error("TEST: Triggering 500 error for product_id=%d", product_id)
+        return errors.internal_error()
     
     # Normal logic: Check if product exists
-    if product_id not in products_db:
-        logger.warning(f"Product {product_id} not found")
-        raise HTTPException(
-            status_code=404,
-            detail={
-                "error": "PRODUCT_NOT_FOUND",
-                "message": f"Product with ID {product_id} not found"
-            }
-        )
+    product = products_db.get(product_id)
+    if product is None:
+        logger.debug("Product %d not found", product_id)
+        return missing_products.not_found(product_id)
     
-    return products_db[product_id]
+    return product
 
 @app.post("/products/{product_id}/details", status_code=204)
 async def add_product_details(
@@ -81,46 +78,26 @@ async def add_product_details(
     POST endpoint: Add or update product details
     Returns: 204 (success), 400 (bad request), 404 (not found), 500 (server error)
     """
-    logger.info(f"POST request for product {product_id}")
-    
     # TEST TRIGGER: 500 Error for testing purposes
     if product_id == 500:
-        logger.error("TEST: Triggering 500 error for product_id=500")
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "error": "INTERNAL_SERVER_ERROR",
-                "message": "Simulated server error for testing (ID=500)"
-            }
-        )
+        logger.error("TEST: Triggering 500 error for product_id=%d", product_id)
+        return errors.internal_error()
     
     # TEST TRIGGER: 404 Error for specific test ID
     # This simulates a scenario where product must exist before adding details
     if product_id == 404:
-        logger.warning("TEST: Triggering 404 for product_id=404")
-        raise HTTPException(
-            status_code=404,
-            detail={
-                "error": "PRODUCT_NOT_FOUND",
-                "message": "Product must be created before adding details (test case)"
-            }
-        )
+        logger.debug("TEST: Triggering 404 for product_id=%d", product_id)
+        return errors.details_not_found()
     
     # Validate ID consistency
     if product_id != product.product_id:
-        logger.warning(f"ID mismatch: path={product_id}, body={product.product_id}")
-        raise HTTPException(
-            status_code=400,
-            detail={
-                "error": "ID_MISMATCH",
-                "message": "Product ID in path does not match request body",
-                "details": f"Path ID: {product_id}, Body ID: {product.product_id}"
-            }
-        )
+        logger.debug("ID mismatch: path=%d, body=%d", product_id, product.product_id)
+        return errors.id_mismatch(product_id, product.product_id)
     
     # Store/update product
     products_db[product_id] = product
-    logger.info(f"Product {product_id} stored successfully")
+    missing_products.invalidate(product_id)
+    logger.debug("Product %d stored successfully", product_id)
     # Return 204 No Content (implicit with status_code=204)
 
 @app.get("/health")
@@ -129,9 +106,10 @@ async def health_check():
     return {
         "status": "healthy",
         "products_count": len(products_db),
+        "negative_cache": missing_products.stats(),
         "note": "Test triggers: ID=500 for 500 error, ID=404 for POST 404 error"
     }
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8080)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8080, access_log=False)
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+Profile per-request server-side cost of the Product API in-process.
+
+Drives the ASGI app directly (no sockets, no HTTP client) so the numbers
+reflect handler, middleware and logging work only. Log output goes to
+whatever stderr points at; redirect it to a file to mimic a container log
+driver, e.g.:
+
+    python tests/profile_requests.py 2> /tmp/hw5-requests.log
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from main import app  # noqa: E402
+
+REQUESTS = int(os.getenv("PROFILE_REQUESTS", "20000"))
+
+
+async def call(method: str, path: str, body: bytes = b"") -> int:
+    """Run one request through the ASGI app and return the status code"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8080),
+        "headers": [(b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode())],
+    }
+    sent = False
+    status = 0
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def main():
+    # Same mix as ProductAPIUser in locustfile.py: 3 GET : 1 POST : 1 health
+    rng = random.Random(42)
+    plan = []
+    for _ in range(REQUESTS):
+        roll = rng.randint(1, 5)
+        if roll <= 3:
+            plan.append(("GET", f"/products/{rng.randint(1, 10)}", b""))
+        elif roll == 4:
+            pid = rng.randint(11, 100)
+            body = (f'{{"product_id": {pid}, "sku": "TEST-{pid:03d}", "manufacturer": "T", '
+                    f'"category_id": 1, "weight": 100, "some_other_id": {pid + 1000}}}').encode()
+            plan.append(("POST", f"/products/{pid}/details", body))
+        else:
+            plan.append(("GET", "/health", b""))
+
+    for method, path, body in plan[:500]:  # warm up
+        await call(method, path, body)
+
+    start = time.perf_counter()
+    statuses = {}
+    for method, path, body in plan:
+        code = await call(method, path, body)
+        statuses[code] = statuses.get(code, 0) + 1
+    elapsed = time.perf_counter() - start
+
+    print(f"requests: {REQUESTS}  elapsed: {elapsed:.3f}s  "
+          f"per request: {elapsed / REQUESTS * 1e6:.1f}us  statuses: {dict(sorted(statuses.items()))}",
+          file=sys.__stdout__)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
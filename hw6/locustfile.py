@@ -1,9 +1,14 @@
 from locust import FastHttpUser, task, between
 import random
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from loadtools.locust_plugin import scheduled  # noqa: E402  (also reports corrected latency)
 
 class ProductSearchUser(FastHttpUser):
     """Simulates users searching for products"""
-    wait_time = between(0.1, 0.5)  # 100-500ms between requests
+    wait_time = scheduled(between(0.1, 0.5))  # 100-500ms between requests
     
     search_terms = [
         "alpha", "beta", "gamma", "delta", "epsilon",
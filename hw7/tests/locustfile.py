@@ -17,10 +17,19 @@ Usage:
     locust -f locustfile.py --host=http://YOUR-ALB \
       --user-classes AsyncOrderUser --users 20 --spawn-rate 10 \
       --run-time 60s --headless --html phase3_async.html
+
+    # Any phase: also save a result file, then diff two runs
+    locust ... --result-file results/
+    python -m loadtools.compare results/<before>.json results/<after>.json --corrected
 """
 
 import random
 from locust import HttpUser, task, between
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from loadtools.locust_plugin import scheduled  # noqa: E402  (also reports corrected latency)
 
 
 class SyncOrderUser(HttpUser):
@@ -31,7 +40,7 @@ class SyncOrderUser(HttpUser):
     Expected: High response times, timeouts, bottleneck visible
     """
     # Per assignment: "random 100-500ms between requests"
-    wait_time = between(0.1, 0.5)
+    wait_time = scheduled(between(0.1, 0.5))
 
     def on_start(self):
         """Initialize user with random customer ID"""
@@ -74,7 +83,7 @@ class AsyncOrderUser(HttpUser):
     Expected: 100% acceptance rate (<100ms), fast responses, queue builds up
     """
     # Per assignment: "random 100-500ms between requests"
-    wait_time = between(0.1, 0.5)
+    wait_time = scheduled(between(0.1, 0.5))
 
     def on_start(self):
         """Initialize user with random customer ID"""
@@ -0,0 +1,364 @@
+"""
+Homework 7: Open-model flash sale load test.
+
+Unlike locustfile.py (a fixed number of users that each wait for their own
+order to finish), customers here arrive at a target rate whatever the
+system is doing - a Poisson stream whose rate follows one of the shapes
+below (see loadtools/shapes.py). For async orders it measures three things
+separately:
+
+- Acceptance latency: "POST /orders/async", time to the 202.
+- End-to-end completion latency: "ORDER async completion (end-to-end,
+  polled every 1s)", send until a status poll first sees the order
+  completed. Both ends are read from this process's monotonic clock, so
+  server clock skew does not enter it; the price is resolution, an
+  overestimate of up to one poll interval (more if over POLL_BATCH orders
+  are pending). Accepted order IDs are polled with GET /orders/{id}
+  (shows up as "status poll"). The API in
+  src/api does not serve order status yet, so this is off unless
+  FLASH_SALE_TRACK_COMPLETION is set against a deployment that does: 200
+  with {"status": "completed"} once processed, 404 (or any other status)
+  while pending.
+- Queue backlog: the SQS queue depth (SQS_QUEUE_URL, `terraform output
+  sqs_queue_url`) sampled every few seconds; at the end the growth rate
+  of the backlog is printed next to the processor capacity
+  (WORKER_COUNT goroutines x 3s per order), so runs with different
+  worker counts can be compared. Needs AWS credentials that can read the
+  queue's attributes.
+
+Settings (environment variables):
+    FLASH_SALE_SHAPE   poisson | step | spike | ramp  (default spike)
+    FLASH_SALE_MODE    async | sync                   (default async)
+    FLASH_SALE_USERS   user pool size (default 200); must exceed rate x response time
+    FLASH_SALE_TRACK_COMPLETION  poll GET /orders/{id} for completion latency (default off)
+    SQS_QUEUE_URL      order queue to sample for backlog (unset: no backlog report)
+    WORKER_COUNT       processor goroutines in this deployment (label for the report)
+
+Usage:
+    # Spike against async processing with 5 processor workers
+    SQS_QUEUE_URL=$(terraform -chdir=../terraform output -raw sqs_queue_url) \
+    FLASH_SALE_SHAPE=spike WORKER_COUNT=5 locust -f locustfile_flash_sale.py \
+      --host=http://YOUR-ALB --headless --html spike_async_5w.html --backlog-csv spike_5w.csv
+
+    # Same arrivals against the sync endpoint (needs a big pool: 3s+ per order)
+    FLASH_SALE_MODE=sync FLASH_SALE_USERS=1000 locust -f locustfile_flash_sale.py \
+      --host=http://YOUR-ALB --headless
+
+The shape sets the users and run time, so --users / --spawn-rate /
+--run-time are not needed.
+"""
+
+import csv
+import logging
+import os
+import random
+import sys
+import time
+from collections import OrderedDict
+
+import gevent
+from locust import HttpUser, events, task
+from locust.clients import HttpSession
+from locust.runners import MasterRunner, WorkerRunner
+
+# After locust, which monkey-patches ssl for gevent: botocore imported first
+# keeps an unpatched ssl and the patching then recurses
+import boto3  # noqa: E402
+from botocore.exceptions import BotoCoreError, ClientError  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from loadtools.locust_plugin import scheduled  # noqa: E402  (also reports corrected latency)
+from loadtools.shapes import ArrivalRateShape, Stage, poisson_arrivals  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# Target arrival rates (orders/second) over time
+FLASH_SALE_SHAPES = {
+    # Steady Poisson arrivals at the normal rate
+    "poisson": [Stage(300, 20)],
+    # Doubling steps, to find where the backlog starts to grow
+    "step": [Stage(60, 5), Stage(60, 10), Stage(60, 20), Stage(60, 40), Stage(60, 80)],
+    # Sale opens: 40x the normal rate for 30s, then back to normal while the queue drains
+    "spike": [Stage(60, 5), Stage(30, 200), Stage(210, 5)],
+    # Gradual build-up to the peak and back down
+    "ramp": [Stage(120, 100, ramp=True), Stage(60, 100), Stage(120, 0, ramp=True)],
+}
+
+SHAPE = os.getenv("FLASH_SALE_SHAPE", "spike").lower()
+MODE = os.getenv("FLASH_SALE_MODE", "async").lower()
+TRACK_COMPLETION = os.getenv("FLASH_SALE_TRACK_COMPLETION", "false").lower() in ("1", "true", "yes")
+SQS_QUEUE_URL = os.getenv("SQS_QUEUE_URL", "")
+WORKER_COUNT = int(os.getenv("WORKER_COUNT", "0")) or None
+PROCESSING_SECONDS = 3  # Simulated payment time per order in the processor
+
+POLL_INTERVAL = 1.0          # Seconds between status poll rounds
+POLL_BATCH = 50              # Oldest pending orders checked per round
+COMPLETION_TIMEOUT = 600     # Give up on an order after this many seconds
+QUEUE_SAMPLE_INTERVAL = 5.0
+
+
+class FlashSaleShape(ArrivalRateShape):
+    """Arrival rate profile selected by FLASH_SALE_SHAPE"""
+    stages = FLASH_SALE_SHAPES[SHAPE]
+    users = int(os.getenv("FLASH_SALE_USERS", "200"))
+
+
+class CompletionTracker:
+    """
+    Polls accepted async orders until the processor has completed them.
+
+    One per locust process (local runner or worker); its requests are
+    reported through the normal request event, so they appear in the stats
+    and in distributed runs reach the master like any other request.
+    """
+
+    def __init__(self, environment):
+        """
+        Initialize Completion Tracker
+
+        Args:
+            environment: Locust environment (host and request event)
+        """
+        self.environment = environment
+        self.client = HttpSession(base_url=environment.host, request_event=environment.events.request, user=None)
+        self.pending = OrderedDict()  # order_id -> time.monotonic() at send, oldest first
+        self.completed = 0
+        self.timed_out = 0
+        self._greenlet = None
+
+    def add(self, order_id: str, sent_at: float):
+        self.pending[order_id] = sent_at
+
+    def start(self):
+        self._greenlet = gevent.spawn(self._run)
+
+    def stop(self):
+        if self._greenlet is not None:
+            self._greenlet.kill(block=False)
+            self._greenlet = None
+
+    def _run(self):
+        while True:
+            gevent.sleep(POLL_INTERVAL)
+            for order_id in list(self.pending)[:POLL_BATCH]:
+                self._poll(order_id)
+
+    def _poll(self, order_id: str):
+        sent_at = self.pending[order_id]
+        with self.client.get(f"/orders/{order_id}", name="/orders/[id] (status poll)",
+                             catch_response=True, timeout=5) as response:
+            completed = False
+            if response.status_code == 404:
+                # Not processed yet
+                response.success()
+            elif response.status_code != 200:
+                response.failure(f"Failed with status {response.status_code}")
+                return
+            else:
+                try:
+                    completed = response.json().get("status") == "completed"
+                except (ValueError, AttributeError):
+                    response.failure("Invalid order status response")
+                    return
+                response.success()
+        # Read after the poll returned: the order was seen completed by now
+        elapsed = time.monotonic() - sent_at
+
+        if completed:
+            del self.pending[order_id]
+            self.completed += 1
+            self._report(elapsed)
+        elif elapsed > COMPLETION_TIMEOUT:
+            del self.pending[order_id]
+            self.timed_out += 1
+            self._report(COMPLETION_TIMEOUT, RuntimeError(f"Not completed within {COMPLETION_TIMEOUT}s"))
+
+    def _report(self, seconds: float, exception=None):
+        self.environment.events.request.fire(
+            request_type="ORDER",
+            name=f"async completion (end-to-end, polled every {POLL_INTERVAL:g}s)",
+            response_time=seconds * 1000,
+            response_length=0,
+            exception=exception,
+            context={},
+        )
+
+
+class BacklogSampler:
+    """Samples the order queue depth (SQS queue attributes) on the master or local runner"""
+
+    def __init__(self, environment, queue_url: str):
+        """
+        Initialize Backlog Sampler
+
+        Args:
+            environment: Locust environment (shape)
+            queue_url: SQS queue the API publishes orders to (through SNS)
+        """
+        self.environment = environment
+        self.queue_url = queue_url
+        self.sqs = boto3.client("sqs")
+        self.samples = []  # (seconds since start, target rate, visible, in flight)
+        self._started = time.time()
+        self._greenlet = None
+
+    def start(self):
+        self._started = time.time()
+        self._greenlet = gevent.spawn(self._run)
+
+    def stop(self):
+        if self._greenlet is not None:
+            self._greenlet.kill(block=False)
+            self._greenlet = None
+
+    def _run(self):
+        while True:
+            try:
+                attributes = self.sqs.get_queue_attributes(
+                    QueueUrl=self.queue_url,
+                    AttributeNames=["ApproximateNumberOfMessages", "ApproximateNumberOfMessagesNotVisible"]
+                )["Attributes"]
+                elapsed = time.time() - self._started
+                rate = self.environment.shape_class.rate_at(elapsed) if self.environment.shape_class else 0.0
+                self.samples.append((
+                    elapsed, rate,
+                    int(attributes["ApproximateNumberOfMessages"]),  # Waiting for a worker
+                    int(attributes["ApproximateNumberOfMessagesNotVisible"])  # Being processed
+                ))
+            except (BotoCoreError, ClientError, KeyError, ValueError) as e:
+                logger.warning(f"Queue sample failed: {e}")
+            gevent.sleep(QUEUE_SAMPLE_INTERVAL)
+
+    def summary(self) -> dict:
+        backlog = [(t, visible + in_flight) for t, _, visible, in_flight in self.samples]
+        if len(backlog) < 2:
+            return {}
+        # Least-squares slope of backlog over time: > 0 means orders arrive faster than they are processed
+        mean_t = sum(t for t, _ in backlog) / len(backlog)
+        mean_b = sum(b for _, b in backlog) / len(backlog)
+        spread = sum((t - mean_t) ** 2 for t, _ in backlog)
+        slope = sum((t - mean_t) * (b - mean_b) for t, b in backlog) / spread if spread else 0.0
+        peak_t, peak = max(backlog, key=lambda sample: sample[1])
+        return {
+            "samples": len(backlog),
+            "max_backlog": peak,
+            "max_backlog_at_s": round(peak_t),
+            "final_backlog": backlog[-1][1],
+            "growth_per_s": round(slope, 2),
+        }
+
+    def write_csv(self, path: str):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["seconds", "target_rate", "visible", "in_flight"])
+            for elapsed, rate, visible, in_flight in self.samples:
+                writer.writerow([round(elapsed, 1), round(rate, 2), visible, in_flight])
+
+
+tracker = None
+sampler = None
+
+
+@events.init_command_line_parser.add_listener
+def _on_parser(parser):
+    parser.add_argument("--backlog-csv", default="", help="Write queue backlog samples to this CSV file")
+
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    global tracker, sampler
+    if MODE == "async" and TRACK_COMPLETION and not isinstance(environment.runner, MasterRunner):
+        tracker = CompletionTracker(environment)
+        tracker.start()
+    if MODE == "async" and SQS_QUEUE_URL and not isinstance(environment.runner, WorkerRunner):
+        sampler = BacklogSampler(environment, SQS_QUEUE_URL)
+        sampler.start()
+    elif MODE == "async" and not isinstance(environment.runner, WorkerRunner):
+        logger.info("SQS_QUEUE_URL not set: no queue backlog report")
+    logger.info(f"Flash sale: {SHAPE} shape {FlashSaleShape.stages}, {MODE} orders, "
+                f"{FlashSaleShape.users} users")
+
+
+@events.test_stop.add_listener
+def on_test_stop(environment, **kwargs):
+    if tracker is not None:
+        tracker.stop()
+        if tracker.pending:
+            logger.info(f"{len(tracker.pending)} async orders still pending at stop "
+                        f"({tracker.completed} completed, {tracker.timed_out} timed out)")
+    if sampler is None:
+        return
+    sampler.stop()
+    report = sampler.summary()
+
+    print("\n" + "=" * 78)
+    print(f" QUEUE BACKLOG ({SHAPE} shape)")
+    print("=" * 78)
+    if not report:
+        print(" Not enough queue samples (can these credentials read the SQS queue attributes?)")
+    else:
+        print(f" Max backlog:   {report['max_backlog']} messages at {report['max_backlog_at_s']}s")
+        print(f" Final backlog: {report['final_backlog']} messages")
+        print(f" Growth:        {report['growth_per_s']:+.2f} messages/s (least squares over {report['samples']} samples)")
+        if WORKER_COUNT:
+            capacity = WORKER_COUNT / PROCESSING_SECONDS
+            peak_rate = max(stage.rate for stage in FlashSaleShape.stages)
+            print(f" Capacity:      {WORKER_COUNT} workers / {PROCESSING_SECONDS}s = {capacity:.2f} orders/s "
+                  f"(peak arrival rate {peak_rate:g}/s)")
+    print("=" * 78 + "\n")
+
+    options = environment.parsed_options
+    if getattr(options, "backlog_csv", ""):
+        sampler.write_csv(options.backlog_csv)
+
+
+class FlashSaleCustomer(HttpUser):
+    """
+    One customer slot in the open-model pool: each arrival places one order.
+    Arrival times come from FlashSaleShape, not from response times.
+    """
+    wait_time = scheduled(poisson_arrivals)
+
+    def on_start(self):
+        """Initialize user and wait for the first arrival instead of ordering at spawn"""
+        self.customer_id = random.randint(1000, 9999)
+        self.wait()
+
+    @task
+    def place_order(self):
+        order_data = {
+            "customer_id": self.customer_id,
+            "items": [
+                {
+                    "product_id": f"product_{random.randint(1, 100)}",
+                    "quantity": random.randint(1, 5),
+                    "price": round(random.uniform(10.0, 100.0), 2)
+                }
+            ]
+        }
+
+        if MODE == "sync":
+            with self.client.post("/orders/sync", json=order_data, catch_response=True,
+                                  timeout=35) as response:
+                if response.status_code == 200:
+                    response.success()
+                elif response.status_code == 503:
+                    response.failure("Payment processor timeout - BOTTLENECK!")
+                else:
+                    response.failure(f"Failed with status {response.status_code}")
+            return
+
+        sent_at = time.monotonic()
+        with self.client.post("/orders/async", json=order_data, catch_response=True,
+                              timeout=5) as response:
+            if response.status_code != 202:
+                response.failure(f"Failed with status {response.status_code}")
+                return
+            try:
+                order_id = response.json()["order"]["order_id"]
+            except (ValueError, KeyError, TypeError):
+                response.failure("No order ID in response")
+                return
+            response.success()
+        if tracker is not None:
+            tracker.add(order_id, sent_at)
@@ -0,0 +1,10 @@
+# loadtools/__init__.py
+"""
+Shared load-testing helpers for the homework load tests.
+
+The homework directories are not installable packages, so scripts that use
+these helpers put the repository root on sys.path first and import the
+module they need (loadtools.loadgen, loadtools.locust_plugin, ...). Nothing
+is imported here: the locust plugin runs under gevent's monkey patching,
+where loading the asyncio/httpx generator would break.
+"""
@@ -0,0 +1,186 @@
+# loadtools/compare.py
+"""
+Compare two load test result files (see results.py) and flag regressions.
+
+For every endpoint in both runs it compares latency percentiles, throughput
+and error rate, and only calls a change a regression (or an improvement)
+when it is both larger than --threshold and statistically significant:
+
+- Percentiles: distribution-free confidence interval from the histogram.
+  The q-quantile of n samples lies between the order statistics of rank
+  nq -/+ z*sqrt(nq(1-q)); the change is significant when the two runs'
+  intervals do not overlap.
+- Throughput: requests are treated as Poisson counts over the run duration.
+- Error rate: two-proportion z-test.
+
+Exits with status 1 if anything regressed, so it can gate a script.
+
+Usage:
+    python -m loadtools.compare baseline.json candidate.json [--percentiles 50,99]
+        [--threshold 0.1] [--confidence 0.95] [--corrected] [--html report.html]
+"""
+import argparse
+import html
+import math
+import sys
+from statistics import NormalDist
+from typing import List, Optional, Tuple
+
+from .hdr_histogram import HdrHistogram
+from .results import load_result
+
+REGRESSION = "REGRESSION"
+IMPROVED = "improved"
+UNCHANGED = "~"
+
+
+def quantile_interval(histogram: HdrHistogram, percentile: float, z: float) -> Tuple[int, int]:
+    """Confidence interval (in recorded units) for the percentile of the sampled distribution"""
+    n = histogram.total_count
+    q = percentile / 100
+    spread = z * math.sqrt(n * q * (1 - q))
+    return (histogram.value_at_rank(math.floor(n * q - spread)),
+            histogram.value_at_rank(math.ceil(n * q + spread) + 1))
+
+
+def _verdict(worse: bool, better: bool) -> str:
+    return REGRESSION if worse else IMPROVED if better else UNCHANGED
+
+
+def compare_percentile(base: HdrHistogram, cand: HdrHistogram, percentile: float,
+                       threshold: float, z: float) -> dict:
+    b, c = base.value_at_percentile(percentile), cand.value_at_percentile(percentile)
+    b_low, b_high = quantile_interval(base, percentile, z)
+    c_low, c_high = quantile_interval(cand, percentile, z)
+    change = (c - b) / b if b else 0.0
+    return {
+        "metric": f"p{percentile:g} ms",
+        "baseline": b / 1000,
+        "candidate": c / 1000,
+        "change": change,
+        "verdict": _verdict(change > threshold and c_low > b_high, change < -threshold and c_high < b_low),
+    }
+
+
+def compare_throughput(base: dict, cand: dict, threshold: float, z: float) -> dict:
+    b_rate = base["requests"] / base["duration_seconds"]
+    c_rate = cand["requests"] / cand["duration_seconds"]
+    # Poisson: variance of count/t is count/t^2
+    stderr = math.sqrt(base["requests"] / base["duration_seconds"] ** 2
+                       + cand["requests"] / cand["duration_seconds"] ** 2)
+    change = (c_rate - b_rate) / b_rate if b_rate else 0.0
+    significant = stderr > 0 and abs(c_rate - b_rate) > z * stderr
+    return {
+        "metric": "req/s",
+        "baseline": b_rate,
+        "candidate": c_rate,
+        "change": change,
+        "verdict": _verdict(significant and change < -threshold, significant and change > threshold),
+    }
+
+
+def compare_error_rate(base: dict, cand: dict, threshold: float, z: float) -> dict:
+    b_n, c_n = base["requests"], cand["requests"]
+    b_rate, c_rate = base["errors"] / b_n, cand["errors"] / c_n
+    pooled = (base["errors"] + cand["errors"]) / (b_n + c_n)
+    stderr = math.sqrt(pooled * (1 - pooled) * (1 / b_n + 1 / c_n))
+    significant = stderr > 0 and abs(c_rate - b_rate) > z * stderr
+    # Relative change is meaningless from 0%, so the threshold applies to the absolute rate too
+    worse = significant and c_rate > b_rate * (1 + threshold) and c_rate - b_rate > threshold / 100
+    better = significant and c_rate < b_rate * (1 - threshold) and b_rate - c_rate > threshold / 100
+    return {
+        "metric": "error %",
+        "baseline": b_rate * 100,
+        "candidate": c_rate * 100,
+        "change": (c_rate - b_rate) / b_rate if b_rate else (math.inf if c_rate else 0.0),
+        "verdict": _verdict(worse, better),
+    }
+
+
+def compare(baseline: dict, candidate: dict, percentiles: List[float], threshold: float,
+            confidence: float, corrected: bool = False) -> List[dict]:
+    """One row per (endpoint, metric) present in both runs"""
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    key = "corrected_histogram" if corrected else "histogram"
+    rows = []
+    for endpoint in sorted(set(baseline["endpoints"]) & set(candidate["endpoints"])):
+        base, cand = baseline["endpoints"][endpoint], candidate["endpoints"][endpoint]
+        if not base["requests"] or not cand["requests"]:
+            continue
+        base_h = HdrHistogram.from_dict(base.get(key) or base["histogram"])
+        cand_h = HdrHistogram.from_dict(cand.get(key) or cand["histogram"])
+        endpoint_rows = [compare_percentile(base_h, cand_h, p, threshold, z) for p in percentiles]
+        endpoint_rows.append(compare_throughput(base, cand, threshold, z))
+        endpoint_rows.append(compare_error_rate(base, cand, threshold, z))
+        for row in endpoint_rows:
+            row["endpoint"] = endpoint
+        rows.extend(endpoint_rows)
+    return rows
+
+
+def _describe(run: dict) -> str:
+    env = run["environment"]
+    return f"{run['tool']} '{run['name']}' at {run['created_at']} on {env['hostname']} (commit {env['git_commit']})"
+
+
+def _change(row: dict) -> str:
+    return "new" if math.isinf(row["change"]) else f"{row['change']:+.1%}"
+
+
+def render_text(baseline: dict, candidate: dict, rows: List[dict]) -> str:
+    lines = [f"baseline:  {_describe(baseline)}", f"candidate: {_describe(candidate)}", ""]
+    lines.append(f"{'endpoint':<34} {'metric':<9} {'baseline':>10} {'candidate':>10} {'change':>8}  verdict")
+    for row in rows:
+        lines.append(f"{row['endpoint'][:34]:<34} {row['metric']:<9} {row['baseline']:>10.2f} "
+                     f"{row['candidate']:>10.2f} {_change(row):>8}  {row['verdict']}")
+    regressions = sum(row["verdict"] == REGRESSION for row in rows)
+    lines.append("")
+    lines.append(f"{regressions} regression(s) in {len(rows)} comparisons")
+    missing = set(baseline["endpoints"]) ^ set(candidate["endpoints"])
+    if missing:
+        lines.append(f"Only in one run (not compared): {', '.join(sorted(missing))}")
+    return "\n".join(lines)
+
+
+def render_html(baseline: dict, candidate: dict, rows: List[dict]) -> str:
+    colors = {REGRESSION: "#f8d7da", IMPROVED: "#d4edda", UNCHANGED: "#ffffff"}
+    body = "".join(
+        f"<tr style='background:{colors[row['verdict']]}'><td>{html.escape(row['endpoint'])}</td>"
+        f"<td>{row['metric']}</td><td>{row['baseline']:.2f}</td><td>{row['candidate']:.2f}</td>"
+        f"<td>{_change(row)}</td><td>{row['verdict']}</td></tr>"
+        for row in rows
+    )
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Load test comparison</title>"
+        "<style>body{font-family:sans-serif}table{border-collapse:collapse}"
+        "td,th{border:1px solid #ccc;padding:4px 8px;text-align:right}td:first-child{text-align:left}</style>"
+        "</head><body><h2>Load test comparison</h2>"
+        f"<p>Baseline: {html.escape(_describe(baseline))}<br>Candidate: {html.escape(_describe(candidate))}</p>"
+        "<table><tr><th>Endpoint</th><th>Metric</th><th>Baseline</th><th>Candidate</th><th>Change</th>"
+        f"<th>Verdict</th></tr>{body}</table></body></html>"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--percentiles", default="50,99", help="Comma-separated latency percentiles to compare")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Smallest relative change worth flagging")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--corrected", action="store_true", help="Use coordinated-omission corrected latency when recorded")
+    parser.add_argument("--html", help="Also write an HTML report to this file")
+    args = parser.parse_args(argv)
+
+    baseline, candidate = load_result(args.baseline), load_result(args.candidate)
+    rows = compare(baseline, candidate, [float(p) for p in args.percentiles.split(",")],
+                   args.threshold, args.confidence, args.corrected)
+    print(render_text(baseline, candidate, rows))
+    if args.html:
+        with open(args.html, "w") as f:
+            f.write(render_html(baseline, candidate, rows))
+    return 1 if any(row["verdict"] == REGRESSION for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+# loadtools/hdr_histogram.py
+from array import array
+from typing import Iterator, Tuple
+
+
+class HdrHistogram:
+    """
+    High Dynamic Range histogram of integer values (e.g. latencies in µs).
+
+    Same bucket layout as Gil Tene's HdrHistogram: values are grouped into
+    power-of-two buckets, each split into linear sub-buckets, so every
+    recorded value keeps `significant_figures` decimal digits of precision
+    over the whole [lowest, highest] range. Memory is a fixed array of counts
+    (about 17k entries for 1µs..60s at 3 digits), however many values are
+    recorded, and histograms with the same layout can be added together.
+    """
+
+    def __init__(self, lowest: int = 1, highest: int = 60_000_000, significant_figures: int = 3):
+        """
+        Initialize HDR Histogram
+
+        Args:
+            lowest: Smallest distinguishable value (>= 1)
+            highest: Largest trackable value; bigger values are clamped to it
+            significant_figures: Decimal digits of precision, 1-5
+        """
+        if lowest < 1 or highest < 2 * lowest or not 1 <= significant_figures <= 5:
+            raise ValueError("Need lowest >= 1, highest >= 2 * lowest and 1-5 significant figures")
+        self.lowest = lowest
+        self.highest = highest
+        self.significant_figures = significant_figures
+
+        largest_single_unit = 2 * 10 ** significant_figures
+        sub_bucket_count_magnitude = (largest_single_unit - 1).bit_length()
+        self._sub_bucket_half_count_magnitude = sub_bucket_count_magnitude - 1
+        self._sub_bucket_count = 1 << sub_bucket_count_magnitude
+        self._sub_bucket_half_count = self._sub_bucket_count >> 1
+        self._unit_magnitude = lowest.bit_length() - 1
+        self._sub_bucket_mask = (self._sub_bucket_count - 1) << self._unit_magnitude
+
+        bucket_count = 1
+        smallest_untrackable = self._sub_bucket_count << self._unit_magnitude
+        while smallest_untrackable <= highest:
+            smallest_untrackable <<= 1
+            bucket_count += 1
+        self._counts = array("q", bytes(8 * (bucket_count + 1) * self._sub_bucket_half_count))
+
+        self.total_count = 0
+        self.min_value = 0
+        self.max_value = 0
+        self.clamped = 0  # Values above `highest`, recorded as `highest`
+
+    # --- Bucket arithmetic ---
+
+    def _index(self, value: int) -> int:
+        bucket = (value | self._sub_bucket_mask).bit_length() - self._unit_magnitude - self._sub_bucket_half_count_magnitude - 1
+        sub_bucket = value >> (bucket + self._unit_magnitude)
+        return ((bucket + 1) << self._sub_bucket_half_count_magnitude) + sub_bucket - self._sub_bucket_half_count
+
+    def _value_at(self, index: int) -> int:
+        """Lowest value that lands in counts[index]"""
+        bucket = (index >> self._sub_bucket_half_count_magnitude) - 1
+        sub_bucket = (index & (self._sub_bucket_half_count - 1)) + self._sub_bucket_half_count
+        if bucket < 0:
+            sub_bucket -= self._sub_bucket_half_count
+            bucket = 0
+        return sub_bucket << (bucket + self._unit_magnitude)
+
+    def _highest_equivalent(self, index: int) -> int:
+        """Highest value that lands in counts[index]"""
+        bucket = max((index >> self._sub_bucket_half_count_magnitude) - 1, 0)
+        return self._value_at(index) + (1 << (bucket + self._unit_magnitude)) - 1
+
+    # --- Recording ---
+
+    def record(self, value: int, count: int = 1):
+        """Record `count` occurrences of `value` (negative values count as 0)"""
+        if value > self.highest:
+            value = self.highest
+            self.clamped += count
+        elif value < 0:
+            value = 0
+        self._counts[self._index(value)] += count
+        if self.total_count == 0 or value < self.min_value:
+            self.min_value = value
+        if value > self.max_value:
+            self.max_value = value
+        self.total_count += count
+
+    def record_corrected(self, value: int, expected_interval: int):
+        """
+        Record `value` plus the samples a closed-loop client never sent.
+
+        When one response takes longer than the expected interval between
+        requests, the requests that should have been sent meanwhile would
+        each have waited too; they are back-filled as value - interval,
+        value - 2*interval, ... (coordinated omission correction).
+        """
+        self.record(value)
+        if expected_interval <= 0:
+            return
+        missing = value - expected_interval
+        while missing >= expected_interval:
+            self.record(missing)
+            missing -= expected_interval
+
+    def add(self, other: "HdrHistogram"):
+        """Merge another histogram with the same layout into this one"""
+        if len(other._counts) != len(self._counts) or other.lowest != self.lowest \
+                or other.significant_figures != self.significant_figures:
+            raise ValueError("Histograms have different layouts")
+        if other.total_count == 0:
+            return
+        counts = self._counts
+        for index, count in other.nonzero():
+            counts[index] += count
+        if self.total_count == 0 or other.min_value < self.min_value:
+            self.min_value = other.min_value
+        self.max_value = max(self.max_value, other.max_value)
+        self.total_count += other.total_count
+        self.clamped += other.clamped
+
+    def to_dict(self) -> dict:
+        """Compact, JSON/msgpack-friendly form: layout plus the non-empty counts"""
+        return {
+            "lowest": self.lowest,
+            "highest": self.highest,
+            "significant_figures": self.significant_figures,
+            "counts": [[index, count] for index, count in self.nonzero()],
+            "total_count": self.total_count,
+            "min_value": self.min_value,
+            "max_value": self.max_value,
+            "clamped": self.clamped,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HdrHistogram":
+        histogram = cls(data["lowest"], data["highest"], data["significant_figures"])
+        for index, count in data["counts"]:
+            histogram._counts[index] = count
+        histogram.total_count = data["total_count"]
+        histogram.min_value = data["min_value"]
+        histogram.max_value = data["max_value"]
+        histogram.clamped = data["clamped"]
+        return histogram
+
+    def reset(self):
+        self._counts = array("q", bytes(8 * len(self._counts)))
+        self.total_count = 0
+        self.min_value = 0
+        self.max_value = 0
+        self.clamped = 0
+
+    # --- Queries ---
+
+    def nonzero(self) -> Iterator[Tuple[int, int]]:
+        """(index, count) of every non-empty sub-bucket, in value order"""
+        for index, count in enumerate(self._counts):
+            if count:
+                yield index, count
+
+    def value_at_percentile(self, percentile: float) -> int:
+        """Smallest recorded value (to the histogram's precision) at or above `percentile` of samples"""
+        return self.value_at_rank(int(min(percentile, 100.0) / 100 * self.total_count + 0.5))
+
+    def value_at_rank(self, rank: int) -> int:
+        """The rank-th smallest recorded value (1-based, clamped to the recorded range)"""
+        if self.total_count == 0:
+            return 0
+        rank = min(max(rank, 1), self.total_count)
+        seen = 0
+        for index, count in self.nonzero():
+            seen += count
+            if seen >= rank:
+                return min(self._highest_equivalent(index), self.max_value)
+        return self.max_value
+
+    @property
+    def mean(self) -> float:
+        if self.total_count == 0:
+            return 0.0
+        total = 0
+        for index, count in self.nonzero():
+            # Middle of the sub-bucket, as HdrHistogram does
+            total += count * ((self._value_at(index) + self._highest_equivalent(index)) // 2)
+        return total / self.total_count
+
+    def percentiles(self, percentiles=(50, 90, 95, 99, 99.9, 100)) -> dict:
+        return {p: self.value_at_percentile(p) for p in percentiles}
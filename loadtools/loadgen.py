@@ -0,0 +1,222 @@
+# loadtools/loadgen.py
+import asyncio
+import bisect
+import itertools
+import random
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import httpx
+
+from .hdr_histogram import HdrHistogram
+from .results import endpoint_result
+
+
+class Endpoint:
+    """One request the generator can send, picked in proportion to `weight`"""
+
+    __slots__ = ("name", "method", "path", "weight", "json")
+
+    def __init__(self, method: str, path: str, weight: float = 1.0, json: Optional[dict] = None, name: Optional[str] = None):
+        self.method = method.upper()
+        self.path = path
+        self.weight = weight
+        self.json = json
+        self.name = name or f"{self.method} {path}"
+
+    @classmethod
+    def parse(cls, spec: str) -> "Endpoint":
+        """Parse "[METHOD] /path[:weight]", e.g. "GET /albums:3" or "/albums/1" """
+        weight = 1.0
+        head, sep, tail = spec.rpartition(":")
+        if sep and tail.replace(".", "", 1).isdigit():
+            spec, weight = head, float(tail)
+        method, _, path = spec.strip().rpartition(" ")
+        return cls(method or "GET", path, weight)
+
+
+class EndpointStats:
+    def __init__(self):
+        self.histogram = HdrHistogram()  # Microseconds
+        self.requests = 0
+        self.errors = 0
+        self.statuses: Counter = Counter()
+
+    def add(self, other: "EndpointStats"):
+        """Merge another process's stats for the same endpoint (exact: histograms add bucket by bucket)"""
+        self.histogram.add(other.histogram)
+        self.requests += other.requests
+        self.errors += other.errors
+        self.statuses.update(other.statuses)
+
+    def to_dict(self) -> dict:
+        return {
+            "histogram": self.histogram.to_dict(),
+            "requests": self.requests,
+            "errors": self.errors,
+            "statuses": dict(self.statuses),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "EndpointStats":
+        stats = cls()
+        stats.histogram = HdrHistogram.from_dict(data["histogram"])
+        stats.requests = data["requests"]
+        stats.errors = data["errors"]
+        stats.statuses.update(data["statuses"])
+        return stats
+
+    def summary(self, duration: float) -> dict:
+        h = self.histogram
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.requests, 4) if self.requests else 0.0,
+            "throughput_rps": round(self.requests / duration, 1) if duration else 0.0,
+            "mean_ms": round(h.mean / 1000, 2),
+            "min_ms": round(h.min_value / 1000, 2),
+            **{f"p{p:g}_ms": round(v / 1000, 2) for p, v in h.percentiles((50, 90, 95, 99, 99.9)).items()},
+            "max_ms": round(h.max_value / 1000, 2),
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items(), key=str)},
+        }
+
+
+class LoadGenerator:
+    """
+    Open-loop HTTP load generator.
+
+    Request i is due at start + i / rate regardless of how earlier requests
+    went. `concurrency` workers share one pooled client and take the next due
+    request as soon as they are free; when all of them are busy the request
+    goes out late, and its latency is still measured from when it was due.
+    A server that stalls therefore shows the queueing delay its users would
+    see instead of silently receiving less load (coordinated omission
+    correction, as in wrk2). Latencies go into fixed-size HDR histograms per
+    endpoint, so memory does not grow with the run length.
+
+    With no rate the workers send back to back (closed loop, maximum
+    throughput); latency is then service time only.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        endpoints: List[Endpoint],
+        rate: Optional[float] = None,
+        duration: float = 30.0,
+        concurrency: int = 50,
+        timeout: float = 10.0
+    ):
+        """
+        Initialize Load Generator
+
+        Args:
+            base_url: Server to load, e.g. "http://localhost:8080"
+            endpoints: Weighted endpoints to pick requests from
+            rate: Target requests per second; None runs closed loop
+            duration: Seconds to keep sending
+            concurrency: Workers, i.e. the most requests in flight at once
+            timeout: Per-request timeout; a timeout counts as an error
+        """
+        self.base_url = base_url
+        self.endpoints = endpoints
+        self.rate = rate
+        self.duration = duration
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+        self._cum_weights = list(itertools.accumulate(e.weight for e in endpoints))
+        self.stats: Dict[str, EndpointStats] = {e.name: EndpointStats() for e in endpoints}
+        self.total = EndpointStats()
+        self.late_sends = 0        # Requests sent after their due time (workers were all busy)
+        self.max_send_lag = 0.0    # Seconds the latest request was behind schedule
+        self.elapsed = 0.0
+        self.processes = 1         # > 1 once merged from worker processes (see distributed.py)
+
+    def _pick(self) -> Endpoint:
+        return self.endpoints[bisect.bisect(self._cum_weights, random.random() * self._cum_weights[-1])]
+
+    async def _send(self, client: httpx.AsyncClient, endpoint: Endpoint, due: float):
+        try:
+            response = await client.request(endpoint.method, endpoint.path, json=endpoint.json)
+            status = response.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        latency_us = int((time.perf_counter() - due) * 1_000_000)
+
+        for stats in (self.stats[endpoint.name], self.total):
+            stats.histogram.record(latency_us)
+            stats.requests += 1
+            stats.statuses[status] += 1
+            if not isinstance(status, int) or status >= 400:
+                stats.errors += 1
+
+    async def _worker(self, client: httpx.AsyncClient, schedule, start: float):
+        end = start + self.duration
+        for i in schedule:
+            if self.rate:
+                due = start + i / self.rate
+                if due >= end:
+                    return
+                now = time.perf_counter()
+                if due > now:
+                    await asyncio.sleep(due - now)
+                elif now - due > 0.01:  # Ignore event loop jitter
+                    self.late_sends += 1
+                    self.max_send_lag = max(self.max_send_lag, now - due)
+            else:
+                due = time.perf_counter()
+                if due >= end:
+                    return
+            await self._send(client, self._pick(), due)
+
+    async def run(self, start_at: Optional[float] = None) -> dict:
+        """Generate load for `duration` seconds; `start_at` (a time.time() value) delays the start"""
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=limits) as client:
+            if start_at is not None:
+                await asyncio.sleep(max(0.0, start_at - time.time()))
+            schedule = itertools.count()  # Shared: each worker takes the next request number
+            start = time.perf_counter()
+            await asyncio.gather(*[self._worker(client, schedule, start) for _ in range(self.concurrency)])
+            self.elapsed = time.perf_counter() - start
+        return self.summary()
+
+    def export(self) -> dict:
+        """Raw results (histograms included) for merging into another generator's"""
+        return {
+            "endpoints": {name: stats.to_dict() for name, stats in self.stats.items()},
+            "total": self.total.to_dict(),
+            "late_sends": self.late_sends,
+            "max_send_lag": self.max_send_lag,
+            "elapsed": self.elapsed,
+        }
+
+    def merge(self, exported: dict):
+        for name, data in exported["endpoints"].items():
+            self.stats[name].add(EndpointStats.from_dict(data))
+        self.total.add(EndpointStats.from_dict(exported["total"]))
+        self.late_sends += exported["late_sends"]
+        self.max_send_lag = max(self.max_send_lag, exported["max_send_lag"])
+        self.elapsed = max(self.elapsed, exported["elapsed"])
+
+    def result_endpoints(self) -> dict:
+        """Per-endpoint entries for a results.save_result() file"""
+        endpoints = {name: endpoint_result(stats.histogram, stats.requests, stats.errors, self.elapsed)
+                     for name, stats in self.stats.items()}
+        endpoints["total"] = endpoint_result(self.total.histogram, self.total.requests, self.total.errors, self.elapsed)
+        return endpoints
+
+    def summary(self) -> dict:
+        return {
+            "base_url": self.base_url,
+            "target_rps": self.rate,
+            "concurrency": self.concurrency,
+            "processes": self.processes,
+            "duration_seconds": round(self.elapsed, 2),
+            "late_sends": self.late_sends,
+            "max_send_lag_ms": round(self.max_send_lag * 1000, 1),
+            "total": self.total.summary(self.elapsed),
+            "endpoints": {name: stats.summary(self.elapsed) for name, stats in self.stats.items()},
+        }
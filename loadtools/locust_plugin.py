@@ -0,0 +1,187 @@
+# loadtools/locust_plugin.py
+"""
+Coordinated-omission corrected latency for locust.
+
+Locust users are closed loop: a user whose request takes 5s simply sends
+its next request 5s late, so a slowdown produces fewer, not slower,
+samples and locust's percentiles understate what users would see.
+
+`scheduled(wait_time)` keeps each user on an intended-start-time timeline
+instead: the waits drawn from `wait_time` (e.g. between(1, 2)) are added to
+a running schedule, and when a task overruns, the next one starts
+immediately and the time it is behind schedule is carried as "schedule
+lag". Every request is then recorded twice into HDR histograms (see
+hdr_histogram.py), as its raw response time and as response time + the
+lag of the task that sent it. test_stop prints both side by side.
+
+Importing this module registers the listeners. In distributed runs the
+workers send their histograms with each stats report and the master
+merges them. `--co-report FILE` also writes the summary as JSON, and
+`--result-file PATH` saves a results.py result file (both histograms per
+request) for loadtools.compare.
+
+Usage in a locustfile:
+
+    sys.path.insert(0, "<repository root>")
+    from loadtools.locust_plugin import scheduled
+
+    class MyUser(HttpUser):
+        wait_time = scheduled(between(1, 2))
+"""
+import json
+import time
+from typing import Callable, Dict
+
+import gevent.local
+from locust import events
+from locust.runners import MasterRunner, WorkerRunner
+
+from .hdr_histogram import HdrHistogram
+from .results import endpoint_result, save_result
+
+# Lag of the task currently running in this user's greenlet (locust runs
+# each user, and fires its request events, in its own greenlet)
+_task_lag = gevent.local.local()
+
+raw: Dict[str, HdrHistogram] = {}
+corrected: Dict[str, HdrHistogram] = {}
+errors: Dict[str, int] = {}
+max_lag = 0.0
+_started = time.time()
+
+
+def scheduled(wait_time: Callable) -> Callable:
+    """Wrap a locust wait_time so the user follows a fixed timeline of intended start times"""
+
+    def wait(user) -> float:
+        global max_lag
+        now = time.monotonic()
+        due = getattr(user, "_loadtools_due", now) + wait_time(user)
+        user._loadtools_due = due
+        lag = max(0.0, now - due)
+        _task_lag.seconds = lag
+        max_lag = max(max_lag, lag)
+        return max(0.0, due - now)
+
+    return wait
+
+
+def _histogram(table: Dict[str, HdrHistogram], key: str) -> HdrHistogram:
+    histogram = table.get(key)
+    if histogram is None:
+        histogram = table[key] = HdrHistogram()
+    return histogram
+
+
+@events.request.add_listener
+def _on_request(request_type, name, response_time, exception=None, **kwargs):
+    key = name if name.startswith(request_type + " ") else f"{request_type} {name}"
+    response_us = int(response_time * 1000)
+    lag_us = int(getattr(_task_lag, "seconds", 0.0) * 1_000_000)
+    _histogram(raw, key).record(response_us)
+    _histogram(corrected, key).record(response_us + lag_us)
+    if exception is not None:
+        errors[key] = errors.get(key, 0) + 1
+
+
+@events.test_start.add_listener
+def _on_test_start(**kwargs):
+    global _started
+    _started = time.time()
+
+
+@events.reset_stats.add_listener
+def _on_reset_stats():
+    global max_lag, _started
+    raw.clear()
+    corrected.clear()
+    errors.clear()
+    max_lag = 0.0
+    _started = time.time()
+
+
+@events.report_to_master.add_listener
+def _on_report_to_master(client_id, data):
+    """Ship this worker's histograms since the last report, then start afresh"""
+    global max_lag
+    data["co_latency"] = {
+        "raw": {key: h.to_dict() for key, h in raw.items()},
+        "corrected": {key: h.to_dict() for key, h in corrected.items()},
+        "errors": dict(errors),
+        "max_lag": max_lag,
+    }
+    raw.clear()
+    corrected.clear()
+    errors.clear()
+    max_lag = 0.0
+
+
+@events.worker_report.add_listener
+def _on_worker_report(client_id, data):
+    global max_lag
+    report = data.get("co_latency")
+    if not report:
+        return
+    for table, name in ((raw, "raw"), (corrected, "corrected")):
+        for key, encoded in report[name].items():
+            _histogram(table, key).add(HdrHistogram.from_dict(encoded))
+    for key, count in report["errors"].items():
+        errors[key] = errors.get(key, 0) + count
+    max_lag = max(max_lag, report["max_lag"])
+
+
+@events.init_command_line_parser.add_listener
+def _on_parser(parser):
+    parser.add_argument("--co-report", default="", help="Write raw vs corrected latency percentiles to this JSON file")
+    parser.add_argument("--result-file", default="", help="Save a result file (or into this directory) for loadtools.compare")
+
+
+def summary() -> dict:
+    def percentiles(h: HdrHistogram) -> dict:
+        return {f"p{p:g}_ms": round(v / 1000, 1) for p, v in h.percentiles((50, 95, 99, 99.9)).items()}
+
+    totals = {}
+    for name, table in (("raw", raw), ("corrected", corrected)):
+        total = totals[name] = HdrHistogram()
+        for h in table.values():
+            total.add(h)
+    rows = {key: {"requests": raw[key].total_count, "raw": percentiles(raw[key]),
+                  "corrected": percentiles(corrected[key])} for key in sorted(raw)}
+    rows["Aggregated"] = {"requests": totals["raw"].total_count, "raw": percentiles(totals["raw"]),
+                          "corrected": percentiles(totals["corrected"])}
+    return {"max_schedule_lag_ms": round(max_lag * 1000, 1), "requests": rows}
+
+
+@events.test_stop.add_listener
+def _on_test_stop(environment, **kwargs):
+    if isinstance(environment.runner, WorkerRunner) or not raw:
+        return
+    report = summary()
+
+    print("\n" + "=" * 78)
+    print(" LATENCY: RAW vs COORDINATED-OMISSION CORRECTED (ms)")
+    print("=" * 78)
+    print(f" {'request':<34} {'reqs':>7} {'raw p50':>8} {'raw p99':>8} {'cor p50':>8} {'cor p99':>8}")
+    for key, row in report["requests"].items():
+        print(f" {key[:34]:<34} {row['requests']:>7} {row['raw']['p50_ms']:>8.1f} {row['raw']['p99_ms']:>8.1f} "
+              f"{row['corrected']['p50_ms']:>8.1f} {row['corrected']['p99_ms']:>8.1f}")
+    print(f" Max schedule lag: {report['max_schedule_lag_ms']}ms")
+    if isinstance(environment.runner, MasterRunner):
+        print(" (Merged from worker histograms; reports still in flight at stop are not included)")
+    print("=" * 78 + "\n")
+
+    options = environment.parsed_options
+    if getattr(options, "co_report", ""):
+        with open(options.co_report, "w") as f:
+            json.dump(report, f, indent=2)
+    if getattr(options, "result_file", ""):
+        save_result(options.result_file, "locust", ",".join(options.user_classes) or "locust",
+                    {"host": environment.host, "users": options.num_users, "spawn_rate": options.spawn_rate,
+                     "run_time": options.run_time, "locustfile": options.locustfile},
+                    result_endpoints(time.time() - _started))
+
+
+def result_endpoints(duration: float) -> dict:
+    """Per-request entries (raw and corrected histograms) for a results.save_result() file"""
+    return {key: endpoint_result(raw[key], raw[key].total_count, errors.get(key, 0), duration, corrected[key])
+            for key in raw}
@@ -0,0 +1,110 @@
+# loadtools/results.py
+"""
+Structured result files for load test and benchmark runs.
+
+Every run is saved as one JSON document:
+
+    {
+      "schema": 1,
+      "tool": "loadgen" | "locust" | "bench_failure_scenario" | ...,
+      "name": "hw1-albums",
+      "created_at": "2025-10-19T12:00:00+00:00",
+      "environment": {"hostname", "platform", "python", "cpu_count", "git_commit", "argv"},
+      "config": {...tool settings...},
+      "endpoints": {
+        "GET /albums": {"requests", "errors", "duration_seconds", "histogram": HdrHistogram.to_dict(),
+                        "corrected_histogram": ... (optional, locust)}
+      }
+    }
+
+Histograms are stored whole, not as percentiles, so runs can be compared on
+any percentile and merged later. `compare.py` diffs two such files.
+"""
+import datetime
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+from typing import Dict, Optional
+
+from .hdr_histogram import HdrHistogram
+
+SCHEMA_VERSION = 1
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment_metadata() -> dict:
+    return {
+        "hostname": socket.gethostname(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": _git_commit(),
+        "argv": sys.argv,
+    }
+
+
+def endpoint_result(
+    histogram: HdrHistogram,
+    requests: int,
+    errors: int,
+    duration: float,
+    corrected: Optional[HdrHistogram] = None
+) -> dict:
+    result = {
+        "requests": requests,
+        "errors": errors,
+        "duration_seconds": round(duration, 3),
+        "histogram": histogram.to_dict(),
+    }
+    if corrected is not None:
+        result["corrected_histogram"] = corrected.to_dict()
+    return result
+
+
+def save_result(path: str, tool: str, name: str, config: dict, endpoints: Dict[str, dict]) -> str:
+    """
+    Write a result file and return its path.
+
+    Args:
+        path: File to write, or an existing directory to put "<name>-<timestamp>.json" in
+        tool: What produced the run
+        name: Short run label (test scenario, phase, ...)
+        config: Tool settings worth comparing runs on (rate, users, ...)
+        endpoints: Per-endpoint results from endpoint_result()
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    if os.path.isdir(path):
+        path = os.path.join(path, f"{name}-{now.strftime('%Y%m%dT%H%M%S')}.json")
+    document = {
+        "schema": SCHEMA_VERSION,
+        "tool": tool,
+        "name": name,
+        "created_at": now.isoformat(timespec="seconds"),
+        "environment": environment_metadata(),
+        "config": config,
+        "endpoints": endpoints,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f)
+    return path
+
+
+def load_result(path: str) -> dict:
+    with open(path) as f:
+        document = json.load(f)
+    if document.get("schema") != SCHEMA_VERSION:
+        raise ValueError(f"{path}: not a schema {SCHEMA_VERSION} result file")
+    return document
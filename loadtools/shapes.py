@@ -0,0 +1,150 @@
+# loadtools/shapes.py
+"""
+Open-model (arrival rate driven) load shapes for locust.
+
+Locust normally runs a closed model: N users, each sending its next request
+only after the previous one finished, so a slow server quietly lowers the
+offered load. A flash sale is the opposite - customers arrive at whatever
+rate they arrive, regardless of how the site is coping.
+
+`ArrivalRateShape` describes the target arrival rate declaratively as a
+list of stages, e.g. a spike:
+
+    class FlashSale(ArrivalRateShape):
+        users = 200
+        stages = [Stage(60, 5), Stage(10, 200), Stage(120, 5)]
+
+and keeps a fixed pool of `users` running for the whole test. Each user
+waits with `poisson_arrivals`, which gives it independent exponential gaps
+at rate(t) / users, so together the pool sends a Poisson stream at rate(t).
+Stages hold a constant rate, or with `ramp=True` move linearly from the
+previous stage's rate (0 for the first stage); the gaps follow the rate
+curve exactly, so a spike starts on time even for users that were waiting
+out a long gap at the low rate.
+
+Wrap the wait in locust_plugin.scheduled() so arrivals stay on their
+timeline when a response is slow: the pool must be larger than
+rate x response time (Little's law) or users fall behind; the
+corrected-latency table shows by how much.
+
+    class Customer(HttpUser):
+        wait_time = scheduled(poisson_arrivals)
+
+        def on_start(self):
+            self.wait()  # first arrival, instead of all users firing at spawn
+"""
+import math
+import random
+import time
+from typing import ClassVar, Iterator, List, Optional, Tuple
+
+from locust import LoadTestShape, events
+
+
+class Stage:
+    """One segment of an arrival rate profile"""
+
+    __slots__ = ("duration", "rate", "ramp")
+
+    def __init__(self, duration: float, rate: float, ramp: bool = False):
+        """
+        Initialize Stage
+
+        Args:
+            duration: Length of the stage in seconds
+            rate: Arrivals per second (at the end of the stage, if ramping)
+            ramp: Move linearly from the previous stage's rate instead of jumping
+        """
+        if duration <= 0 or rate < 0:
+            raise ValueError("Stages need a positive duration and a non-negative rate")
+        self.duration = duration
+        self.rate = rate
+        self.ramp = ramp
+
+    def __repr__(self) -> str:
+        return f"Stage({self.duration:g}s, {self.rate:g}/s{', ramp' if self.ramp else ''})"
+
+
+class ArrivalRateShape(LoadTestShape):
+    """Locust shape that runs a fixed user pool for the duration of `stages`"""
+
+    abstract = True
+
+    stages: ClassVar[List[Stage]] = []
+    users: ClassVar[int] = 200  # Pool size; bounds concurrency, not the arrival rate
+    user_classes: ClassVar[Optional[list]] = None
+
+    def segments(self) -> Iterator[Tuple[float, float, float, float]]:
+        """(start, end, start_rate, end_rate) of every stage"""
+        start, previous = 0.0, 0.0
+        for stage in self.stages:
+            first = previous if stage.ramp else stage.rate
+            yield start, start + stage.duration, first, stage.rate
+            start += stage.duration
+            previous = stage.rate
+
+    @property
+    def total_duration(self) -> float:
+        return sum(stage.duration for stage in self.stages)
+
+    def rate_at(self, t: float) -> float:
+        """Target arrivals per second at `t` seconds into the test"""
+        for start, end, first, last in self.segments():
+            if start <= t < end:
+                return first + (last - first) * (t - start) / (end - start)
+        return 0.0
+
+    def next_arrival(self, t: float, mass: float) -> Optional[float]:
+        """
+        Time at which the integral of rate from `t` reaches `mass` (None if after the last stage).
+
+        An exponential(1) draw times the pool size, as mass, gives one user's
+        next arrival in the non-homogeneous Poisson process.
+        """
+        for start, end, first, last in self.segments():
+            if end <= t:
+                continue
+            t = max(t, start)
+            slope = (last - first) / (end - start)
+            rate = first + slope * (t - start)
+            available = (rate + last) / 2 * (end - t)
+            if available < mass or available <= 0:
+                mass -= available
+                t = end
+                continue
+            if slope == 0:
+                return t + mass / rate
+            # rate * x + slope * x^2 / 2 = mass
+            return t + (math.sqrt(max(rate * rate + 2 * slope * mass, 0.0)) - rate) / slope
+        return None
+
+    def tick(self):
+        if self.get_run_time() >= self.total_duration:
+            return None
+        if self.user_classes:
+            return self.users, self.users, self.user_classes
+        return self.users, self.users
+
+
+def poisson_arrivals(user) -> float:
+    """locust wait_time: gap to this user's next arrival under the environment's ArrivalRateShape"""
+    shape = user.environment.shape_class
+    if not isinstance(shape, ArrivalRateShape):
+        raise RuntimeError("poisson_arrivals needs an ArrivalRateShape subclass in the locustfile")
+    now = time.monotonic()
+    # Measure from this user's previous intended arrival (see locust_plugin.scheduled)
+    # rather than from now, so slow responses do not shift the schedule
+    elapsed = max(0.0, shape.get_run_time() - (now - getattr(user, "_loadtools_due", now)))
+    arrival = shape.next_arrival(elapsed, random.expovariate(1.0) * shape.users)
+    if arrival is None:
+        # No more arrivals; sleep past the end, when the shape stops the test
+        return shape.total_duration - elapsed + 1.0
+    return arrival - elapsed
+
+
+@events.test_start.add_listener
+def _on_test_start(environment, **kwargs):
+    # The runner only resets the shape's clock on the master (or a local
+    # runner); workers need it for poisson_arrivals too
+    if isinstance(environment.shape_class, ArrivalRateShape):
+        environment.shape_class.reset_time()
@@ -0,0 +1,100 @@
+# loadtools/test_hdr_histogram.py
+import json
+import random
+
+import pytest
+
+from loadtools.hdr_histogram import HdrHistogram
+
+
+def test_values_keep_requested_precision():
+    rng = random.Random(7)
+    for _ in range(2000):
+        value = int(10 ** rng.uniform(0, 7.7))
+        histogram = HdrHistogram(1, 60_000_000, 3)
+        histogram.record(value)
+        assert abs(histogram.value_at_percentile(50) - value) <= value * 1e-3
+
+
+def test_percentiles_of_uniform_values():
+    histogram = HdrHistogram()
+    for value in range(1, 10_001):
+        histogram.record(value)
+    assert histogram.total_count == 10_000
+    assert histogram.min_value == 1
+    assert histogram.max_value == 10_000
+    for percentile, expected in ((50, 5_000), (90, 9_000), (99, 9_900), (99.9, 9_990)):
+        assert histogram.value_at_percentile(percentile) == pytest.approx(expected, rel=1e-3)
+    assert histogram.value_at_percentile(100) == 10_000
+    assert histogram.mean == pytest.approx(5_000.5, rel=1e-3)
+
+
+def test_small_values_are_exact():
+    histogram = HdrHistogram()
+    for value in (1, 2, 3, 1000, 2047):
+        histogram.record(value)
+    assert [histogram.value_at_rank(rank) for rank in range(1, 6)] == [1, 2, 3, 1000, 2047]
+
+
+def test_values_above_highest_are_clamped():
+    histogram = HdrHistogram(1, 1000, 2)
+    histogram.record(5000)
+    histogram.record(-3)
+    assert histogram.clamped == 1
+    assert histogram.max_value == 1000
+    assert histogram.min_value == 0
+    assert histogram.value_at_percentile(100) == 1000
+
+
+def test_record_corrected_backfills_missed_samples():
+    histogram = HdrHistogram()
+    histogram.record_corrected(1000, expected_interval=100)
+    # 1000, then 900, 800, ... 100: the requests that would have been sent meanwhile
+    assert histogram.total_count == 10
+    assert [histogram.value_at_rank(rank) for rank in (1, 10)] == [100, 1000]
+    histogram.record_corrected(50, expected_interval=100)
+    assert histogram.total_count == 11
+
+
+def test_add_equals_recording_everything_in_one():
+    rng = random.Random(3)
+    values = [int(rng.expovariate(1 / 20_000)) for _ in range(5000)]
+    combined, first, second = HdrHistogram(), HdrHistogram(), HdrHistogram()
+    for i, value in enumerate(values):
+        combined.record(value)
+        (first if i % 2 else second).record(value)
+    first.add(second)
+    assert list(first.nonzero()) == list(combined.nonzero())
+    assert (first.total_count, first.min_value, first.max_value) == \
+        (combined.total_count, combined.min_value, combined.max_value)
+
+
+def test_add_rejects_different_layouts():
+    with pytest.raises(ValueError):
+        HdrHistogram(1, 60_000_000, 3).add(HdrHistogram(1, 60_000_000, 2))
+
+
+def test_dict_round_trip_through_json():
+    histogram = HdrHistogram()
+    for value in (5, 50, 500, 5_000_000, 90_000_000):
+        histogram.record(value)
+    restored = HdrHistogram.from_dict(json.loads(json.dumps(histogram.to_dict())))
+    assert list(restored.nonzero()) == list(histogram.nonzero())
+    assert restored.percentiles() == histogram.percentiles()
+    assert restored.clamped == 1
+
+
+def test_reset_empties_histogram():
+    histogram = HdrHistogram()
+    histogram.record(42)
+    histogram.reset()
+    assert histogram.total_count == 0
+    assert list(histogram.nonzero()) == []
+    assert histogram.value_at_percentile(99) == 0
+
+
+def test_invalid_layout_is_rejected():
+    with pytest.raises(ValueError):
+        HdrHistogram(0, 100, 3)
+    with pytest.raises(ValueError):
+        HdrHistogram(1, 100, 6)
@@ -0,0 +1,71 @@
+# benchmarks/bench_batching.py
+"""
+Upstream request count with and without product lookup micro-batching.
+
+Runs the midterm locustfile (EcommerceUser, TEST_MODE=fixed) headless
+against a local fixed cart service, once with PRODUCT_BATCHING=false and
+once with it on, and compares how many requests reached product-service
+per cart request. The product cache is disabled (fresh/stale TTL 0) so
+every lookup is a real upstream lookup and only coalescing/batching
+reduce the count.
+
+Usage:
+    python benchmarks/bench_batching.py [--users 100] [--run-time 20s] [--window-ms 2]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import httpx
+
+from local_services import run_service
+
+LOCUSTFILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "locustfile.py")
+
+
+def run_locust(host: str, users: int, run_time: str) -> int:
+    """Run EcommerceUser headless and return the number of requests it made"""
+    with tempfile.TemporaryDirectory() as tmp:
+        stats_file = os.path.join(tmp, "stats")  # locust appends .json
+        result = subprocess.run(
+            [sys.executable, "-m", "locust", "-f", LOCUSTFILE, "EcommerceUser",
+             "--headless", "--json-file", stats_file, "--loglevel", "ERROR",
+             "-u", str(users), "-r", str(min(users, 50)), "-t", run_time, "-H", host],
+            env={**os.environ, "TEST_MODE": "fixed"},
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode not in (0, 1):  # 1 = some requests failed
+            raise RuntimeError(f"locust exited with {result.returncode}:\n{result.stderr}")
+        with open(stats_file + ".json") as f:
+            return sum(entry["num_requests"] for entry in json.load(f))
+
+
+def main(args):
+    print(f"{'batching':<9} {'cart reqs':>10} {'upstream':>9} {'per cart req':>13} {'avg batch':>10}")
+    for batching in ("false", "true"):
+        with run_service("product") as product_url:
+            env = {
+                "PRODUCT_SERVICE_URL": product_url,
+                "PRODUCT_BATCHING": batching,
+                "PRODUCT_BATCH_WINDOW_MS": str(args.window_ms),
+                "PRODUCT_FRESH_TTL": "0",
+                "CACHE_TTL": "0",
+            }
+            with run_service("fixed", env=env) as cart_url:
+                cart_requests = run_locust(cart_url, args.users, args.run_time)
+                upstream = httpx.get(f"{product_url}/metrics", params={"format": "json"}).json()["requests"]
+                batching_stats = httpx.get(f"{cart_url}/metrics").json()["batching"]
+        print(f"{batching:<9} {cart_requests:>10} {upstream:>9} {upstream / max(cart_requests, 1):>13.3f} "
+              f"{batching_stats['avg_batch_size']:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--run-time", default="20s")
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    main(parser.parse_args())
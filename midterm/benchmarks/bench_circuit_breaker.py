@@ -0,0 +1,80 @@
+# benchmarks/bench_circuit_breaker.py
+"""
+Per-call overhead of the cart service CircuitBreaker (in-process microbenchmark).
+
+Awaits a trivial coroutine in a tight loop, bare and through the breaker in
+each mode, and reports nanoseconds per call and the overhead over the bare
+call. Also times a rejected call on an OPEN circuit and a `state` read.
+
+Usage:
+    python benchmarks/bench_circuit_breaker.py [--calls 200000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "services", "cart-service", "fixed"))
+
+from circuit_breaker import CircuitBreaker, CircuitBreakerError, WindowType  # noqa: E402
+
+
+async def noop():
+    return None
+
+
+async def time_calls(fn, calls: int) -> float:
+    """Best-case ns per awaited call"""
+    started = time.perf_counter_ns()
+    for _ in range(calls):
+        await fn()
+    return (time.perf_counter_ns() - started) / calls
+
+
+async def time_rejections(fn, calls: int) -> float:
+    started = time.perf_counter_ns()
+    for _ in range(calls):
+        try:
+            await fn()
+        except CircuitBreakerError:
+            pass
+    return (time.perf_counter_ns() - started) / calls
+
+
+def time_state(breaker: CircuitBreaker, calls: int) -> float:
+    started = time.perf_counter_ns()
+    for _ in range(calls):
+        breaker.state
+    return (time.perf_counter_ns() - started) / calls
+
+
+async def main(args):
+    breakers = {
+        "consecutive": CircuitBreaker(failure_threshold=3),
+        "count window": CircuitBreaker(window_type=WindowType.COUNT, window_size=100, slow_call_duration=1.0),
+        "time window": CircuitBreaker(window_type=WindowType.TIME, window_size=10, slow_call_duration=1.0),
+    }
+    opened = CircuitBreaker(failure_threshold=1, recovery_timeout=3600)
+    opened._trip()
+
+    cases = [("bare call", noop, time_calls)]
+    cases += [(f"CLOSED, {name}", breaker(noop), time_calls) for name, breaker in breakers.items()]
+    cases += [("OPEN, rejected", opened(noop), time_rejections)]
+
+    bare = None
+    print(f"{'case':<26} {'ns/call':>9} {'overhead ns':>12}")
+    for name, fn, timer in cases:
+        ns = min([await timer(fn, args.calls) for _ in range(args.repeat)])
+        if bare is None:
+            bare = ns
+        print(f"{name:<26} {ns:>9.0f} {ns - bare:>12.0f}")
+    ns = min(time_state(breakers["consecutive"], args.calls) for _ in range(args.repeat))
+    print(f"{'state property':<26} {ns:>9.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
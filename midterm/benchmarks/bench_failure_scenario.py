@@ -0,0 +1,172 @@
+# benchmarks/bench_failure_scenario.py
+"""
+The midterm failure demo on one box: vulnerable vs fixed cart service
+through steady load, product-service failure, slow product-service and
+recovery.
+
+product-service and each cart service run locally under uvicorn (see
+local_services.py), so no ALB/ECS deployment is needed. For each mode a
+fresh product-service is started and the cart service is driven open-loop
+at --rate requests/s with the locustfile's traffic mix (10 adds : 3 cart
+views). Between phases product-service is reconfigured through its control
+endpoints:
+
+    steady     no faults
+    fail_on    /fail/on?rate=--fail-rate
+    latency    /fail/off, then /latency (lognormal, median --latency-ms)
+    fail_off   /fail/off and /latency?ms=0 (recovery)
+
+Requests are sent on schedule whether or not earlier ones have finished, and
+latency is measured from the scheduled send time, so a service that stalls
+shows up as high latency rather than as fewer requests. Each request counts
+toward the phase it was scheduled in. Errors are what the locustfile treats
+as failures: any non-200 response, plus client timeouts (--timeout).
+Degraded answers from the fixed service (price_pending items, degraded
+carts) are successes but are counted separately.
+
+The fixed service's product cache hides most product-service faults; pass
+--env PRODUCT_FRESH_TTL=0 --env CACHE_TTL=0 --env CACHE_WARM_ON_START=false
+to put the circuit breaker on the request path.
+
+--save-result writes the per-phase latency histograms as a loadtools result
+file, so two runs (e.g. before and after a circuit breaker change) can be
+diffed with `python -m loadtools.compare`.
+
+Usage:
+    python benchmarks/bench_failure_scenario.py [--modes vulnerable,fixed] [--phase-s 15] [--rate 50]
+        [--fail-rate 100] [--latency-ms 1000] [--env KEY=VALUE ...] [--json results.json]
+        [--save-result results/]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+from local_services import run_service
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from loadtools.hdr_histogram import HdrHistogram  # noqa: E402
+from loadtools.results import endpoint_result, save_result  # noqa: E402
+
+PRODUCT_IDS = ["1", "2", "3", "4", "5"]
+PHASES = ["steady", "fail_on", "latency", "fail_off"]
+
+
+def phase_controls(phase: str, args) -> List[Tuple[str, Dict]]:
+    """product-service control calls that start a phase"""
+    if phase == "fail_on":
+        return [("/fail/on", {"rate": args.fail_rate})]
+    if phase == "latency":
+        return [("/fail/off", {}), ("/latency", {"ms": args.latency_ms, "dist": "lognormal", "sigma": args.sigma})]
+    if phase == "fail_off":
+        return [("/fail/off", {}), ("/latency", {"ms": 0})]
+    return []
+
+
+class PhaseStats:
+    def __init__(self):
+        self.latencies = HdrHistogram()  # Microseconds
+        self.errors = 0
+        self.degraded = 0
+
+    def summary(self, duration: float) -> dict:
+        count = self.latencies.total_count
+        return {
+            "requests": count,
+            "throughput_rps": round((count - self.errors) / duration, 1),
+            "p50_ms": round(self.latencies.value_at_percentile(50) / 1000, 1) if count else None,
+            "p95_ms": round(self.latencies.value_at_percentile(95) / 1000, 1) if count else None,
+            "p99_ms": round(self.latencies.value_at_percentile(99) / 1000, 1) if count else None,
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "degraded_rate": round(self.degraded / count, 4) if count else 0.0,
+        }
+
+
+async def send(client: httpx.AsyncClient, mode: str, scheduled: float, stats: PhaseStats):
+    user_id = f"user_{random.randint(1, 1000)}"
+    try:
+        if random.random() < 10 / 13:
+            response = await client.post(
+                f"/{mode}/cart/{user_id}/add",
+                json={"product_id": random.choice(PRODUCT_IDS), "quantity": random.randint(1, 3)},
+            )
+            degraded = response.status_code == 200 and response.json()["cart_item"].get("status") == "price_pending"
+        else:
+            response = await client.get(f"/{mode}/cart/{user_id}")
+            degraded = response.status_code == 200 and bool(response.json().get("degraded_mode"))
+        ok = response.status_code == 200
+    except httpx.HTTPError:
+        ok, degraded = False, False
+    stats.latencies.record(int((time.monotonic() - scheduled) * 1_000_000))
+    stats.errors += not ok
+    stats.degraded += degraded
+
+
+async def run_mode(mode: str, args) -> Dict[str, PhaseStats]:
+    results = {}
+    with run_service("product") as product_url:
+        env = {"PRODUCT_SERVICE_URL": product_url, **dict(item.split("=", 1) for item in args.env)}
+        with run_service(mode, env=env) as cart_url:
+            limits = httpx.Limits(max_connections=args.max_connections)
+            async with httpx.AsyncClient(base_url=cart_url, timeout=args.timeout, limits=limits) as client, \
+                    httpx.AsyncClient(base_url=product_url) as control:
+                in_flight = set()
+                interval = 1 / args.rate
+                for phase in PHASES:
+                    for path, params in phase_controls(phase, args):
+                        (await control.post(path, params=params)).raise_for_status()
+                    stats = PhaseStats()
+                    start = time.monotonic()
+                    for i in range(int(args.phase_s * args.rate)):
+                        scheduled = start + i * interval
+                        await asyncio.sleep(max(0.0, scheduled - time.monotonic()))
+                        task = asyncio.create_task(send(client, mode, scheduled, stats))
+                        in_flight.add(task)
+                        task.add_done_callback(in_flight.discard)
+                    results[phase] = stats
+                # Stragglers still belong to the phase they were sent in
+                await asyncio.gather(*in_flight)
+    return results
+
+
+async def main(args):
+    stats = {mode: await run_mode(mode, args) for mode in args.modes.split(",")}
+    report = {mode: {phase: s.summary(args.phase_s) for phase, s in phases.items()} for mode, phases in stats.items()}
+
+    print(f"{'mode':<11} {'phase':<9} {'reqs':>6} {'ok/s':>7} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'errors':>7} {'degraded':>9}")
+    for mode, phases in report.items():
+        for phase, r in phases.items():
+            print(f"{mode:<11} {phase:<9} {r['requests']:>6} {r['throughput_rps']:>7.1f} {r['p50_ms']:>8.1f} "
+                  f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['error_rate']:>7.1%} {r['degraded_rate']:>9.1%}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": report}, f, indent=2)
+    if args.save_result:
+        endpoints = {f"{mode} {phase}": endpoint_result(s.latencies, s.latencies.total_count, s.errors, args.phase_s)
+                     for mode, phases in stats.items() for phase, s in phases.items()}
+        print(f"Result saved to {save_result(args.save_result, 'bench_failure_scenario', 'failure-scenario', vars(args), endpoints)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="vulnerable,fixed", help="Comma-separated cart services to run")
+    parser.add_argument("--phase-s", type=float, default=15.0, help="Seconds per phase")
+    parser.add_argument("--rate", type=float, default=50.0, help="Cart requests per second")
+    parser.add_argument("--fail-rate", type=float, default=100.0, help="Percentage of product requests failed in fail_on")
+    parser.add_argument("--latency-ms", type=int, default=1000, help="Median injected product latency in latency")
+    parser.add_argument("--sigma", type=float, default=0.5, help="Lognormal tail shape of the injected latency")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Client timeout per cart request")
+    parser.add_argument("--max-connections", type=int, default=500)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra environment for the cart services (repeatable)")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--save-result", metavar="PATH", help="Write a loadtools result file (or into this directory)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,89 @@
+# benchmarks/bench_product_client.py
+"""
+Product lookup latency/throughput: client per call vs one pooled client.
+
+The cart services used to build a new httpx.AsyncClient for every product
+lookup (TCP connect + pool setup each time); they now share one pooled,
+keep-alive client for the app's lifetime. This replays both patterns
+against a local product-service.
+
+Usage:
+    python benchmarks/bench_product_client.py [--requests 500] [--concurrency 20]
+    PRODUCT_SERVICE_URL=http://host:8000 python benchmarks/bench_product_client.py
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from contextlib import nullcontext
+from typing import List
+
+import httpx
+
+from local_services import run_service
+
+
+async def per_call_client(url: str, product_id: str) -> float:
+    start = time.perf_counter()
+    async with httpx.AsyncClient(timeout=httpx.Timeout(5.0)) as client:
+        response = await client.get(f"{url}/products/{product_id}")
+        response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def run(mode: str, url: str, requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    shared = httpx.AsyncClient(
+        base_url=url,
+        timeout=httpx.Timeout(5.0),
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
+    )
+    remaining = iter(range(requests))
+
+    async def shared_call(product_id: str) -> float:
+        start = time.perf_counter()
+        response = await shared.get(f"/products/{product_id}")
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    async def worker():
+        for i in remaining:
+            product_id = str(i % 5 + 1)
+            if mode == "per-call":
+                latencies.append(await per_call_client(url, product_id))
+            else:
+                latencies.append(await shared_call(product_id))
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    await shared.aclose()
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "throughput": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def main(args):
+    url = os.getenv("PRODUCT_SERVICE_URL")
+    with (nullcontext(url) if url else run_service("product")) as url:
+        print(f"product-service: {url}")
+        print(f"{'mode':<10} {'conc':>5} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        for concurrency in (1, args.concurrency):
+            for mode in ("per-call", "shared"):
+                r = await run(mode, url, args.requests, concurrency)
+                print(f"{r['mode']:<10} {r['concurrency']:>5} {r['throughput']:>9.0f} "
+                      f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,85 @@
+# benchmarks/bench_tail_latency.py
+"""
+Cart latency against a slow-tailed product-service: fixed timeout vs
+adaptive timeouts vs adaptive timeouts + hedged requests.
+
+product-service gets lognormal latency injected (median --median-ms, tail
+shape --sigma) and the fixed cart service is driven with add-to-cart
+requests from closed-loop workers. The product cache and batching are off,
+so every cart request waits on exactly one product lookup.
+
+Usage:
+    python benchmarks/bench_tail_latency.py [--requests 1000] [--concurrency 10] [--median-ms 20] [--sigma 1.5]
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+from typing import List
+
+import httpx
+
+from local_services import run_service
+
+CONFIGS = {
+    "fixed 5s": {"PRODUCT_ADAPTIVE_TIMEOUT": "false", "PRODUCT_HEDGING": "false"},
+    "adaptive": {"PRODUCT_ADAPTIVE_TIMEOUT": "true", "PRODUCT_HEDGING": "false"},
+    "adapt+hedge": {"PRODUCT_ADAPTIVE_TIMEOUT": "true", "PRODUCT_HEDGING": "true"},
+}
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(int(len(sorted_values) * q), len(sorted_values) - 1)]
+
+
+async def drive(cart_url: str, requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    remaining = iter(range(requests))
+
+    async with httpx.AsyncClient(base_url=cart_url, timeout=30.0) as client:
+        async def worker():
+            for i in remaining:
+                start = time.perf_counter()
+                response = await client.post(f"/cart/bench-{i}/add", json={"product_id": str(i % 5 + 1), "quantity": 1})
+                latencies.append(time.perf_counter() - start)
+                statuses[response.json().get("cart_item", {}).get("status", response.status_code)] += 1
+
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        metrics = (await client.get("/metrics")).json()
+
+    latencies.sort()
+    return {
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "confirmed": statuses["confirmed"] / len(latencies),
+        "hedges": metrics["hedging"]["hedges"],
+    }
+
+
+async def main(args):
+    print(f"{'config':<12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'confirmed':>10} {'hedges':>7}")
+    for name, config in CONFIGS.items():
+        with run_service("product") as product_url:
+            httpx.post(f"{product_url}/latency", params={"ms": args.median_ms, "dist": "lognormal", "sigma": args.sigma})
+            env = {
+                "PRODUCT_SERVICE_URL": product_url,
+                "PRODUCT_BATCHING": "false",
+                "PRODUCT_FRESH_TTL": "0",
+                "CACHE_TTL": "0",
+                **config,
+            }
+            with run_service("fixed", env=env) as cart_url:
+                r = await drive(cart_url, args.requests, args.concurrency)
+        print(f"{name:<12} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+              f"{r['confirmed']:>10.1%} {r['hedges']:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--median-ms", type=int, default=20)
+    parser.add_argument("--sigma", type=float, default=1.5)
+    asyncio.run(main(parser.parse_args()))
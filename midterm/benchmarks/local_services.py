@@ -0,0 +1,79 @@
+# benchmarks/local_services.py
+"""
+Start midterm services locally with uvicorn for benchmarking.
+
+Each service runs in its own subprocess from its service directory, exactly
+like its Dockerfile CMD, so module-level imports (e.g. circuit_breaker.py)
+resolve the same way they do in the container.
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import httpx
+
+SERVICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "services")
+
+SERVICE_DIRS = {
+    "product": os.path.join(SERVICES_DIR, "product-service"),
+    "fixed": os.path.join(SERVICES_DIR, "cart-service", "fixed"),
+    "vulnerable": os.path.join(SERVICES_DIR, "cart-service", "vulnerable"),
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def run_service(
+    name: str,
+    port: Optional[int] = None,
+    env: Optional[Dict[str, str]] = None,
+    health_path: str = "/health",
+    startup_timeout: float = 15.0
+) -> Iterator[str]:
+    """
+    Run one service under uvicorn and yield its base URL once healthy.
+
+    Args:
+        name: "product", "fixed" or "vulnerable"
+        port: Port to bind (a free one is picked by default)
+        env: Extra environment variables (e.g. PRODUCT_SERVICE_URL)
+        health_path: Polled until it answers 200
+        startup_timeout: Seconds to wait for the health check
+    """
+    port = port or free_port()
+    url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=SERVICE_DIRS[name],
+        env={**os.environ, **(env or {})},
+    )
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"{name} service exited with code {process.returncode}")
+            try:
+                if httpx.get(url + health_path, timeout=0.5).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{name} service did not become healthy on {url}")
+            time.sleep(0.1)
+        yield url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
@@ -0,0 +1,156 @@
+# benchmarks/sim_flapping_upstream.py
+"""
+Circuit breaker recovery against a flapping, fragile upstream (in-process simulation).
+
+The simulated upstream alternates between outages and healthy periods. After
+coming back it warms up: its concurrent capacity ramps linearly to
+`--capacity` over `--warmup-s`, and exceeding it knocks the upstream over
+again for `--crash-s`. Several cart-service instances (each
+with its own CircuitBreaker, as in a real deployment) hammer it with
+closed-loop clients.
+
+Two breaker configurations are compared:
+  herd     - every caller is let through once HALF_OPEN, fixed recovery timeout
+  limited  - HALF_OPEN admits --probes concurrent calls, exponential backoff
+             with jitter across re-opens
+
+Times are scaled down (recovery timeout 0.2s) so a run takes seconds.
+
+Usage:
+    python benchmarks/sim_flapping_upstream.py [--instances 4] [--clients 25] [--duration 10]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "services", "cart-service", "fixed"))
+
+from circuit_breaker import CircuitBreaker, CircuitBreakerError  # noqa: E402
+
+
+class UpstreamError(Exception):
+    pass
+
+
+class FlappingUpstream:
+    """Down for down_s, up for up_s, repeating; overload while warming up causes a crash"""
+
+    def __init__(self, down_s: float, up_s: float, capacity: int, warmup_s: float, crash_s: float, latency_s: float):
+        self.down_s = down_s
+        self.up_s = up_s
+        self.capacity = capacity
+        self.warmup_s = warmup_s
+        self.crash_s = crash_s
+        self.latency_s = latency_s
+        self.started = time.monotonic()
+        self.crashed_until = 0.0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+        # Metrics
+        self.calls = 0
+        self.successes = 0
+        self.crashes = 0
+
+    def healthy(self, now: float) -> bool:
+        if now < self.crashed_until:
+            return False
+        phase = (now - self.started) % (self.down_s + self.up_s)
+        return phase >= self.down_s
+
+    def current_capacity(self, now: float) -> int:
+        phase = (now - self.started) % (self.down_s + self.up_s)
+        up_since = max(now - (phase - self.down_s), self.crashed_until)
+        warmth = min(1.0, (now - up_since) / self.warmup_s) if self.warmup_s > 0 else 1.0
+        return max(1, int(self.capacity * warmth))
+
+    async def call(self):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            now = time.monotonic()
+            if not self.healthy(now):
+                await asyncio.sleep(self.latency_s)
+                raise UpstreamError("upstream down")
+            if self.in_flight > self.current_capacity(now):
+                self.crashes += 1
+                self.crashed_until = now + self.crash_s
+                raise UpstreamError("upstream overloaded")
+            await asyncio.sleep(self.latency_s)
+            self.successes += 1
+        finally:
+            self.in_flight -= 1
+
+
+async def run(name: str, breaker_kwargs: dict, args) -> dict:
+    upstream = FlappingUpstream(args.down_s, args.up_s, args.capacity, args.warmup_s, args.crash_s, args.latency_ms / 1000)
+    breakers = [
+        CircuitBreaker(
+            failure_threshold=3,
+            recovery_timeout=0.2,
+            expected_exception=UpstreamError,
+            success_threshold=2,
+            **breaker_kwargs
+        )
+        for _ in range(args.instances)
+    ]
+    served = 0
+    rejected = 0
+    deadline = time.monotonic() + args.duration
+
+    async def client(breaker: CircuitBreaker):
+        nonlocal served, rejected
+        protected = breaker(upstream.call)
+        while time.monotonic() < deadline:
+            try:
+                await protected()
+                served += 1
+            except CircuitBreakerError:
+                rejected += 1
+            except UpstreamError:
+                pass
+            await asyncio.sleep(random.uniform(0, 2 * args.think_ms / 1000))
+
+    await asyncio.gather(*[client(b) for b in breakers for _ in range(args.clients)])
+    return {
+        "name": name,
+        "upstream_calls": upstream.calls,
+        "served": served,
+        "rejected": rejected,
+        "crashes": upstream.crashes,
+        "peak_in_flight": upstream.peak_in_flight,
+        "times_opened": sum(b.times_opened for b in breakers),
+    }
+
+
+async def main(args):
+    configs = [
+        ("herd", {"half_open_max_calls": 10**6, "backoff_multiplier": 1.0, "recovery_jitter": 0.0}),
+        ("limited", {"half_open_max_calls": args.probes, "backoff_multiplier": 2.0,
+                     "max_recovery_timeout": 2.0, "recovery_jitter": 0.5}),
+    ]
+    print(f"{'config':<8} {'upstream':>9} {'served':>8} {'rejected':>9} {'crashes':>8} {'peak conc':>10} {'opens':>6}")
+    for name, kwargs in configs:
+        r = await run(name, kwargs, args)
+        print(f"{r['name']:<8} {r['upstream_calls']:>9} {r['served']:>8} {r['rejected']:>9} "
+              f"{r['crashes']:>8} {r['peak_in_flight']:>10} {r['times_opened']:>6}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--instances", type=int, default=4, help="Cart service instances (one breaker each)")
+    parser.add_argument("--clients", type=int, default=25, help="Concurrent clients per instance")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--probes", type=int, default=1, help="HALF_OPEN probes for the limited config")
+    parser.add_argument("--capacity", type=int, default=150, help="Concurrent requests a warm upstream survives")
+    parser.add_argument("--warmup-s", type=float, default=1.0, help="Time for capacity to ramp up after recovery")
+    parser.add_argument("--down-s", type=float, default=1.0)
+    parser.add_argument("--up-s", type=float, default=2.0)
+    parser.add_argument("--crash-s", type=float, default=0.5)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--think-ms", type=float, default=10.0)
+    asyncio.run(main(parser.parse_args()))
@@ -15,10 +15,15 @@ Usage:
 """
 
 from locust import HttpUser, task, between, events
+from locust.runners import WorkerRunner
 import random
 import os
 import logging
 from datetime import datetime
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from loadtools.locust_plugin import scheduled  # noqa: E402  (also reports corrected latency)
 
 # Configure logging
 logging.basicConfig(
@@ -34,7 +39,7 @@ class EcommerceUser(HttpUser):
     """
     
     # Realistic wait time between user actions
-    wait_time = between(0.5, 2.0)
+    wait_time = scheduled(between(0.5, 2.0))
     # Increase proportion of traffic from business users
     weight = 20
     
@@ -173,7 +178,7 @@ class AdminUser(HttpUser):
     """
     
     # Admin operations are infrequent
-    wait_time = between(30, 60)
+    wait_time = scheduled(between(30, 60))
     
     # Low weight to limit number of admin users
     weight = 1
@@ -237,6 +242,9 @@ def on_test_start(environment, **kwargs):
     Called when the test starts.
     Displays test configuration and instructions.
     """
+    # With --processes/--worker each worker only sees its own share; the master reports
+    if isinstance(environment.runner, WorkerRunner):
+        return
     test_mode = os.getenv("TEST_MODE", "vulnerable").upper()
     
     print("\n" + "="*70)
@@ -267,6 +275,8 @@ def on_test_stop(environment, **kwargs):
     Called when the test stops.
     Displays summary statistics.
     """
+    if isinstance(environment.runner, WorkerRunner):
+        return
     print("\n" + "="*70)
     print(" TEST COMPLETED ")
     print("="*70)
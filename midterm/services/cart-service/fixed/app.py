@@ -1,32 +1,228 @@
 # services/cart-service/fixed/app.py
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import httpx
 import os
 from typing import Dict, List, Optional
 import asyncio
-from circuit_breaker import CircuitBreaker
+from circuit_breaker import WindowType
+from breaker_registry import BreakerRegistry
+from singleflight import SingleFlight
+from product_cache import Freshness, ProductCache
+from batch_loader import BatchLoader
+from cart_store import CartLine, CartStore
+from latency_tracker import LatencyTracker
+from hedging import Hedger
+from retry import RetryBudget, Retrier
+from reconciler import PriceReconciler
+from cache_warmer import CacheWarmer
 import time
 from datetime import datetime
-
-app = FastAPI(title="Shopping Cart Service - Fixed with Circuit Breaker")
+from contextlib import asynccontextmanager
 
 # Product service URL
 PRODUCT_SERVICE_URL = os.getenv("PRODUCT_SERVICE_URL", "http://product-service:8000")
 
-# In-memory cart storage
-carts: Dict[str, List[Dict]] = {}
+# Shared HTTP client settings (one pooled client for the app's lifetime)
+PRODUCT_TIMEOUT = float(os.getenv("PRODUCT_TIMEOUT", "5.0"))  # Per-call timeout in seconds
+PRODUCT_MAX_CONNECTIONS = int(os.getenv("PRODUCT_MAX_CONNECTIONS", "100"))
+PRODUCT_MAX_KEEPALIVE = int(os.getenv("PRODUCT_MAX_KEEPALIVE", "20"))
+PRODUCT_KEEPALIVE_EXPIRY = float(os.getenv("PRODUCT_KEEPALIVE_EXPIRY", "30.0"))
+PRODUCT_HTTP2 = os.getenv("PRODUCT_HTTP2", "false").lower() == "true"  # Requires httpx[http2]
+
+# Adaptive timeouts: per-route timeout = p99 of recent latency * multiplier,
+# clamped to [PRODUCT_MIN_TIMEOUT, PRODUCT_TIMEOUT]. Off by default: a
+# tighter timeout turns latency blips into breaker failures, so it changes
+# how the service behaves under the existing demos and benchmarks
+PRODUCT_ADAPTIVE_TIMEOUT = os.getenv("PRODUCT_ADAPTIVE_TIMEOUT", "false").lower() == "true"
+PRODUCT_MIN_TIMEOUT = float(os.getenv("PRODUCT_MIN_TIMEOUT", "0.1"))
+PRODUCT_TIMEOUT_MULTIPLIER = float(os.getenv("PRODUCT_TIMEOUT_MULTIPLIER", "2.0"))
+# Hedged requests: re-send a lookup still running after the route's p95
+PRODUCT_HEDGING = os.getenv("PRODUCT_HEDGING", "false").lower() == "true"
+PRODUCT_HEDGE_BUDGET = float(os.getenv("PRODUCT_HEDGE_BUDGET", "0.1"))  # Hedges per lookup
+
+# Cart view refresh: concurrent product lookups, bounded, under one deadline
+CART_REFRESH_CONCURRENCY = int(os.getenv("CART_REFRESH_CONCURRENCY", "10"))
+CART_REFRESH_DEADLINE = float(os.getenv("CART_REFRESH_DEADLINE", "2.0"))  # Seconds for the whole cart
+CART_ADD_DEADLINE = float(os.getenv("CART_ADD_DEADLINE", "3.0"))  # No retry may start past this
+
+# Retries of transient lookup failures: jittered backoff, at most
+# PRODUCT_RETRY_BUDGET retries per lookup on average
+PRODUCT_RETRY_ATTEMPTS = int(os.getenv("PRODUCT_RETRY_ATTEMPTS", "3"))
+PRODUCT_RETRY_BUDGET = float(os.getenv("PRODUCT_RETRY_BUDGET", "0.1"))
+PRODUCT_RETRY_BASE_DELAY = float(os.getenv("PRODUCT_RETRY_BASE_DELAY", "0.05"))
+
+http_client: Optional[httpx.AsyncClient] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the pooled product-service client on startup, close it on shutdown"""
+    global http_client
+    http_client = httpx.AsyncClient(
+        base_url=PRODUCT_SERVICE_URL,
+        timeout=httpx.Timeout(PRODUCT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=PRODUCT_MAX_CONNECTIONS,
+            max_keepalive_connections=PRODUCT_MAX_KEEPALIVE,
+            keepalive_expiry=PRODUCT_KEEPALIVE_EXPIRY
+        ),
+        http2=PRODUCT_HTTP2
+    )
+    price_reconciler.start()
+    
+    # Warm start: last snapshot first, then the product list in the background
+    # (/ready answers 503 until warming finishes or times out)
+    cache_warmer.load_snapshot()
+    startup_tasks = []
+    if CACHE_WARM_ON_START:
+        startup_tasks.append(asyncio.create_task(cache_warmer.warm(http_client)))
+    else:
+        cache_warmer.skip()
+    if CACHE_SNAPSHOT_PATH:
+        startup_tasks.append(asyncio.create_task(cache_warmer.snapshot_periodically()))
+    try:
+        yield
+    finally:
+        for task in startup_tasks:
+            task.cancel()
+        cache_warmer.save_snapshot()
+        await price_reconciler.stop()
+        await http_client.aclose()
+        http_client = None
+
+app = FastAPI(title="Shopping Cart Service - Fixed with Circuit Breaker", lifespan=lifespan)
+
+# In-memory cart storage (user_id -> product_id -> line)
+cart_store = CartStore()
+
+# In-memory cache for product info: bounded LRU with stale-while-revalidate
+PRODUCT_FRESH_TTL = float(os.getenv("PRODUCT_FRESH_TTL", "5.0"))  # Served locally
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))  # 5 minutes: served stale while refreshing
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+product_cache = ProductCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    fresh_ttl=PRODUCT_FRESH_TTL,
+    stale_ttl=CACHE_TTL
+)
+
+# Warm start: fill the cache from /products at boot, snapshot it to a local file
+CACHE_WARM_ON_START = os.getenv("CACHE_WARM_ON_START", "true").lower() == "true"
+CACHE_WARM_PAGE_SIZE = int(os.getenv("CACHE_WARM_PAGE_SIZE", "100"))
+CACHE_WARM_CONCURRENCY = int(os.getenv("CACHE_WARM_CONCURRENCY", "4"))
+CACHE_WARM_TIMEOUT = float(os.getenv("CACHE_WARM_TIMEOUT", "10.0"))
+CACHE_SNAPSHOT_PATH = os.getenv("CACHE_SNAPSHOT_PATH", "")  # Empty disables snapshots
+CACHE_SNAPSHOT_INTERVAL = float(os.getenv("CACHE_SNAPSHOT_INTERVAL", "30.0"))
+cache_warmer = CacheWarmer(
+    product_cache,
+    page_size=CACHE_WARM_PAGE_SIZE,
+    concurrency=CACHE_WARM_CONCURRENCY,
+    timeout=CACHE_WARM_TIMEOUT,
+    snapshot_path=CACHE_SNAPSHOT_PATH or None,
+    snapshot_interval=CACHE_SNAPSHOT_INTERVAL
+)
+
+# Micro-batching: lookups arriving within the window share one multi-id request
+PRODUCT_BATCHING = os.getenv("PRODUCT_BATCHING", "true").lower() == "true"
+PRODUCT_BATCH_WINDOW_MS = float(os.getenv("PRODUCT_BATCH_WINDOW_MS", "2.0"))
+PRODUCT_BATCH_MAX_SIZE = int(os.getenv("PRODUCT_BATCH_MAX_SIZE", "50"))
 
-# In-memory cache for product info (fallback mechanism)
-product_cache: Dict[str, Dict] = {}
-cache_timestamps: Dict[str, float] = {}
-CACHE_TTL = 300  # 5 minutes
+# Background revalidation tasks (referenced so they are not garbage collected)
+background_tasks: set = set()
 
-# Initialize Circuit Breaker
-circuit_breaker = CircuitBreaker(
-    failure_threshold=3,  # Open after 3 failures
+# Concurrent lookups for the same product share one upstream call
+product_flights = SingleFlight()
+
+# Circuit breaker trip rule: "consecutive" failures (the demo's default: 3 in a
+# row), or failure/slow-call rate over the last N calls ("count") or N seconds ("time")
+CIRCUIT_WINDOW = WindowType(os.getenv("CIRCUIT_WINDOW", "consecutive"))
+CIRCUIT_WINDOW_SIZE = int(os.getenv("CIRCUIT_WINDOW_SIZE", "20"))
+CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "5"))
+CIRCUIT_FAILURE_RATE = float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5"))
+CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv("CIRCUIT_SLOW_CALL_SECONDS", "2.0"))
+CIRCUIT_SLOW_CALL_RATE = float(os.getenv("CIRCUIT_SLOW_CALL_RATE", "0.8"))
+# Recovery: few concurrent probes in HALF_OPEN, backed-off timeout on re-open
+CIRCUIT_HALF_OPEN_MAX_CALLS = int(os.getenv("CIRCUIT_HALF_OPEN_MAX_CALLS", "1"))
+CIRCUIT_MAX_RECOVERY_TIMEOUT = float(os.getenv("CIRCUIT_MAX_RECOVERY_TIMEOUT", "300"))
+
+# Bulkhead per upstream route: bounded concurrent calls, short wait for a slot
+PRODUCT_BULKHEAD_SIZE = int(os.getenv("PRODUCT_BULKHEAD_SIZE", "50"))
+PRODUCT_BULKHEAD_QUEUE_TIMEOUT = float(os.getenv("PRODUCT_BULKHEAD_QUEUE_TIMEOUT", "0.5"))
+
+# Initialize Circuit Breakers: one breaker + bulkhead per (upstream, route)
+PRODUCT_SERVICE = "product-service"
+breakers = BreakerRegistry(
+    max_concurrent=PRODUCT_BULKHEAD_SIZE,
+    queue_timeout=PRODUCT_BULKHEAD_QUEUE_TIMEOUT,
+    failure_threshold=3,  # Open after 3 failures (consecutive mode)
     recovery_timeout=30,   # Try to recover after 30 seconds
-    expected_exception=httpx.RequestError
+    expected_exception=httpx.RequestError,
+    window_type=CIRCUIT_WINDOW,
+    window_size=CIRCUIT_WINDOW_SIZE,
+    minimum_calls=CIRCUIT_MIN_CALLS,
+    failure_rate_threshold=CIRCUIT_FAILURE_RATE,
+    slow_call_duration=CIRCUIT_SLOW_CALL_SECONDS,
+    slow_call_rate_threshold=CIRCUIT_SLOW_CALL_RATE,
+    half_open_max_calls=CIRCUIT_HALF_OPEN_MAX_CALLS,
+    max_recovery_timeout=CIRCUIT_MAX_RECOVERY_TIMEOUT
+)
+
+# Breaker of the route product lookups currently go through (drives cache
+# fallback decisions and the state reported to clients)
+circuit_breaker = breakers.breaker(PRODUCT_SERVICE, "multi_get" if PRODUCT_BATCHING else "get_product")
+
+class ProductNotFound(Exception):
+    """Product service answered, but does not know this product id"""
+    pass
+
+# Observed latency per product-service route, and the shared hedge budget
+product_latency = {
+    route: LatencyTracker(
+        multiplier=PRODUCT_TIMEOUT_MULTIPLIER,
+        min_timeout=PRODUCT_MIN_TIMEOUT,
+        max_timeout=PRODUCT_TIMEOUT
+    )
+    for route in ("get_product", "multi_get")
+}
+product_hedger = Hedger(budget_ratio=PRODUCT_HEDGE_BUDGET)
+
+async def _timed_get(route: str, url: str, **kwargs) -> httpx.Response:
+    """GET with the route's adaptive timeout, recording how long it took"""
+    tracker = product_latency[route]
+    timeout = tracker.timeout() if PRODUCT_ADAPTIVE_TIMEOUT else PRODUCT_TIMEOUT
+    started = time.monotonic()
+    try:
+        response = await http_client.get(url, timeout=timeout, **kwargs)
+    except httpx.TimeoutException:
+        tracker.record(timeout)  # Censored: the real latency was at least this
+        raise
+    # A cancelled call (e.g. the losing side of a hedge) is not recorded:
+    # its elapsed time says nothing about how long the upstream takes
+    tracker.record(time.monotonic() - started)
+    return response
+
+async def _hedged(route: str, call):
+    """Run a protected lookup, hedged after the route's p95 if enabled"""
+    if not PRODUCT_HEDGING:
+        return await call()
+    return await product_hedger.run(call, product_latency[route].hedge_delay())
+
+@breakers.protect(PRODUCT_SERVICE, "multi_get")
+async def _fetch_batch(product_ids: List[str]) -> Dict[str, Dict]:
+    """One multi-id request to product service (counts as one circuit breaker call)"""
+    response = await _timed_get("multi_get", "/products", params={"ids": ",".join(product_ids)})
+    if response.status_code == 200:
+        return {product["id"]: product for product in response.json()["products"]}
+    raise httpx.RequestError(f"Product service returned {response.status_code}")
+
+async def _load_batch(product_ids: List[str]) -> Dict[str, Dict]:
+    return await _hedged("multi_get", lambda: _fetch_batch(product_ids))
+
+product_loader = BatchLoader(
+    _load_batch,
+    window_ms=PRODUCT_BATCH_WINDOW_MS,
+    max_batch_size=PRODUCT_BATCH_MAX_SIZE,
+    missing_exception=ProductNotFound
 )
 
 class CartItem(BaseModel):
@@ -39,37 +235,158 @@ class Cart(BaseModel):
     total_price: float
     degraded_mode: bool = False
 
-async def fetch_product_with_circuit_breaker(product_id: str) -> Optional[Dict]:
-    """Fetch product info with circuit breaker protection"""
+@breakers.protect(PRODUCT_SERVICE, "get_product")
+async def _fetch_one(product_id: str) -> Dict:
+    """One single-id request to product service (decorated once, not per call)"""
+    response = await _timed_get("get_product", f"/products/{product_id}")
+    if response.status_code == 200:
+        return response.json()
+    if response.status_code == 404:
+        # Unknown id: the service is fine, so this must not count as a failure
+        raise ProductNotFound(product_id)
+    raise httpx.RequestError(f"Product service returned {response.status_code}")
+
+async def _fetch_and_cache(product_id: str) -> Dict:
+    """One upstream lookup (circuit breaker protected); refreshes the cache on success"""
+    if PRODUCT_BATCHING:
+        product = await product_loader.load(product_id)
+    else:
+        product = await _hedged("get_product", lambda: _fetch_one(product_id))
+    # Success: Update cache with fresh data
+    product_cache.put(product_id, product)
+    return product
+
+async def _revalidate(product_id: str):
+    """Background refresh of a stale entry; failures leave the stale entry in place"""
+    try:
+        await product_flights.do(product_id, lambda: _fetch_and_cache(product_id))
+    except Exception:
+        pass
+
+# price_pending lines are repriced in the background once the circuit closes,
+# in rate-limited batches, so cart reads never pay for it
+PRICE_RECONCILE_BATCH_SIZE = int(os.getenv("PRICE_RECONCILE_BATCH_SIZE", "50"))
+PRICE_RECONCILE_RATE = float(os.getenv("PRICE_RECONCILE_RATE", "2.0"))  # Batches per second
+
+def _apply_price(product_id: str, product: Dict) -> int:
+    product_cache.put(product_id, product)
+    return cart_store.reprice(product_id, product["name"], product["price"])
+
+price_reconciler = PriceReconciler(
+    _fetch_batch,
+    _apply_price,
+    # Unknown ids get a 404 from add_to_cart; this only catches lines accepted
+    # while product service was down for ids it no longer (or never) knew
+    cart_store.discard_pending,
+    is_ready=lambda: circuit_breaker.state == "CLOSED"
+    and breakers.breaker(PRODUCT_SERVICE, "multi_get").state == "CLOSED",
+    batch_size=PRICE_RECONCILE_BATCH_SIZE,
+    batches_per_second=PRICE_RECONCILE_RATE
+)
+
+# Transient errors (connection errors, timeouts, 5xx) are retried while the
+# circuit is closed; open circuits, full bulkheads and unknown ids are not
+product_retrier = Retrier(
+    RetryBudget(ratio=PRODUCT_RETRY_BUDGET),
+    max_attempts=PRODUCT_RETRY_ATTEMPTS,
+    base_delay=PRODUCT_RETRY_BASE_DELAY,
+    retry_on=(httpx.RequestError,),
+    can_retry=lambda: circuit_breaker.state == "CLOSED"
+)
+
+async def fetch_product_with_circuit_breaker(product_id: str, deadline: Optional[float] = None) -> Optional[Dict]:
+    """Fetch product info with circuit breaker protection
+    
+    `deadline` (a time.monotonic() value) bounds retries of the upstream lookup.
+    Raises ProductNotFound if product service does not know the id: that is
+    an answer, not an outage, so there is nothing to degrade to.
+    """
     
-    @circuit_breaker
-    async def _fetch():
-        async with httpx.AsyncClient(timeout=httpx.Timeout(5.0)) as client:
-            response = await client.get(f"{PRODUCT_SERVICE_URL}/products/{product_id}")
-            if response.status_code == 200:
-                return response.json()
-            raise httpx.RequestError(f"Product service returned {response.status_code}")
+    entry = product_cache.get(product_id)
+    if entry is not None:
+        freshness = product_cache.freshness(entry)
+        if freshness == Freshness.FRESH:
+            # Recently fetched: serve locally, no upstream call
+            product_cache.fresh_hits += 1
+            return entry.product
+        if freshness == Freshness.STALE:
+            # Serve immediately, flagged as cached, and refresh in the background
+            # (unless the circuit is open - the refresh would be rejected anyway).
+            # Only a routine refresh through a closed circuit is not degraded.
+            product_cache.stale_hits += 1
+            state = circuit_breaker.state
+            if state != "OPEN":
+                task = asyncio.create_task(_revalidate(product_id))
+                background_tasks.add(task)
+                task.add_done_callback(background_tasks.discard)
+            return _flag_cached(entry, revalidating=state == "CLOSED")
+    product_cache.misses += 1
     
     try:
-        # Layer 1: Try to fetch fresh data from product service
-        product = await _fetch()
-        # Success: Update cache with fresh data for future fallback use
-        product_cache[product_id] = product
-        cache_timestamps[product_id] = time.time()
-        return product
+        # Layer 1: Try to fetch fresh data from product service,
+        # joining any identical lookup already in flight
+        return await product_retrier.run(
+            lambda: product_flights.do(product_id, lambda: _fetch_and_cache(product_id)),
+            deadline
+        )
+    except ProductNotFound:
+        raise
     except Exception as e:
         # Service is down or circuit breaker is open
-        
-        # Layer 2: Fallback to cached data if available
-        # This provides stale but usable data to maintain partial functionality
-        if product_id in product_cache:
-            cache_age = time.time() - cache_timestamps.get(product_id, 0)
-            return {
-                **product_cache[product_id],
-                "cached": True,
-                "cache_age_seconds": int(cache_age)
-            }
+        return cached_product(product_id)
+
+def cached_product(product_id: str) -> Optional[Dict]:
+    """Layer 2: Fallback to cached data if available
+    
+    This provides stale but usable data to maintain partial functionality.
+    Entries past the stale window are only used while the circuit is open.
+    """
+    entry = product_cache.get(product_id)
+    if entry is None:
+        return None
+    if product_cache.freshness(entry) == Freshness.EXPIRED and circuit_breaker.state != "OPEN":
         return None
+    return _flag_cached(entry)
+
+def _flag_cached(entry, revalidating: bool = False) -> Dict:
+    """Cached product data, marked as such for the response"""
+    product = {
+        **entry.product,
+        "cached": True,
+        "cache_age_seconds": int(entry.age)
+    }
+    if revalidating:
+        product["revalidating"] = True
+    return product
+
+async def refresh_products(product_ids: List[str]) -> Dict[str, Optional[Dict]]:
+    """
+    Fetch several products concurrently for a cart view.
+    
+    At most CART_REFRESH_CONCURRENCY lookups run at once and the whole batch
+    gets CART_REFRESH_DEADLINE seconds; lookups still running at the deadline
+    are cancelled and fall back to the cache (Layer 2) or None (Layer 3).
+    """
+    semaphore = asyncio.Semaphore(CART_REFRESH_CONCURRENCY)
+    
+    async def _refresh(product_id: str) -> Optional[Dict]:
+        async with semaphore:
+            try:
+                return await fetch_product_with_circuit_breaker(product_id, deadline)
+            except ProductNotFound:
+                # Removed upstream after it was added to the cart
+                return cached_product(product_id)
+    
+    deadline = time.monotonic() + CART_REFRESH_DEADLINE
+    tasks = {pid: asyncio.create_task(_refresh(pid)) for pid in dict.fromkeys(product_ids)}
+    done, pending = await asyncio.wait(tasks.values(), timeout=CART_REFRESH_DEADLINE)
+    for task in pending:
+        task.cancel()
+    
+    return {
+        pid: task.result() if task in done else cached_product(pid)
+        for pid, task in tasks.items()
+    }
 
 @app.get("/health")
 @app.get("/fixed/health")
@@ -80,53 +397,59 @@ async def health_check():
         "circuit_breaker_state": circuit_breaker.state
     }
 
+@app.get("/ready")
+@app.get("/fixed/ready")
+async def readiness_check():
+    """Ready once cache warming has finished or given up (503 until then)"""
+    body = {"status": "ready" if cache_warmer.ready else "warming", "warmup": cache_warmer.get_stats()}
+    return JSONResponse(body, status_code=200 if cache_warmer.ready else 503)
+
 @app.post("/cart/{user_id}/add")
 @app.post("/fixed/cart/{user_id}/add")
 async def add_to_cart(user_id: str, item: CartItem):
     """Add item to cart - PROTECTED VERSION with Circuit Breaker"""
     
-    if user_id not in carts:
-        carts[user_id] = []
-    
     # Try to fetch product with circuit breaker protection
-    product = await fetch_product_with_circuit_breaker(item.product_id)
+    try:
+        product = await fetch_product_with_circuit_breaker(
+            item.product_id, time.monotonic() + CART_ADD_DEADLINE
+        )
+    except ProductNotFound:
+        raise HTTPException(status_code=404, detail="Product not found")
     
     if product is None:
         # Layer 3: Survival Mode - Product service completely unavailable
         # Strategy: Allow core business function (adding to cart) to continue
         # Trade-off: Sacrifice pricing accuracy for availability
-        cart_item = {
-            "product_id": item.product_id,
-            "product_name": f"Product {item.product_id}",
-            "quantity": item.quantity,
-            "price": 0.0,  # Price unavailable
-            "subtotal": 0.0,
-            "status": "price_pending",
-            "message": "Product service temporarily unavailable. Price will be updated later."
-        }
+        line = CartLine(
+            product_id=item.product_id,
+            product_name=f"Product {item.product_id}",
+            quantity=item.quantity,
+            price=0.0,  # Price unavailable
+            status="price_pending",
+            message="Product service temporarily unavailable. Price will be updated later."
+        )
     else:
         # Normal operation with product info
         if product.get("stock", 0) < item.quantity:
             raise HTTPException(status_code=400, detail="Insufficient stock")
         
-        cart_item = {
-            "product_id": item.product_id,
-            "product_name": product["name"],
-            "quantity": item.quantity,
-            "price": product["price"],
-            "subtotal": product["price"] * item.quantity,
-            "status": "confirmed",
-            "cached": product.get("cached", False)
-        }
-    
-    # Update existing item or add new
-    existing = next((x for x in carts[user_id] if x["product_id"] == item.product_id), None)
-    if existing:
-        existing["quantity"] += item.quantity
-        if existing.get("price", 0) > 0:
-            existing["subtotal"] = existing["price"] * existing["quantity"]
-    else:
-        carts[user_id].append(cart_item)
+        line = CartLine(
+            product_id=item.product_id,
+            product_name=product["name"],
+            quantity=item.quantity,
+            price=product["price"],
+            status="confirmed",
+            cached=product.get("cached", False)
+        )
+    
+    cart_item = line.to_dict()
+    # Update existing item (O(1) lookup) or add new; merging quantities into
+    # the stored line means concurrent adds for this user cannot lose updates
+    # (add() is synchronous, so it needs no lock)
+    cart_store.add(user_id, line)
+    if product is None:
+        price_reconciler.enqueue(item.product_id)
     
     return {
         "message": "Item added to cart",
@@ -139,41 +462,48 @@ async def add_to_cart(user_id: str, item: CartItem):
 async def get_cart(user_id: str):
     """Get user's cart - PROTECTED VERSION with graceful degradation"""
     
-    if user_id not in carts or not carts[user_id]:
+    # Snapshot the lines: other requests may add to this cart while we await
+    lines = cart_store.lines(user_id)
+    if not lines:
         return Cart(user_id=user_id, items=[], total_price=0.0, degraded_mode=False)
     
     updated_items = []
     total = 0.0
     degraded_mode = False
     
-    for item in carts[user_id]:
-        # Try to refresh product info, but don't fail if unavailable
-        product = await fetch_product_with_circuit_breaker(item["product_id"])
+    # Try to refresh product info concurrently, but don't fail if unavailable
+    products = await refresh_products([line.product_id for line in lines])
+    
+    # Write back without awaiting, so each line is updated in one step
+    for line in lines:
+        product = products[line.product_id]
         
         if product:
             # Layer 1 or 2: Successfully retrieved product data (fresh or cached)
             # Update item with best available information
-            item["price"] = product["price"]
-            item["subtotal"] = product["price"] * item["quantity"]
-            item["product_name"] = product["name"]
-            item["data_freshness"] = "cached" if product.get("cached") else "live"
+            line.price = product["price"]
+            line.subtotal = product["price"] * line.quantity
+            line.product_name = product["name"]
+            line.data_freshness = "cached" if product.get("cached") else "live"
             if product.get("cached"):
-                # Layer 2: Using cached data - mark as degraded mode
-                item["cache_age"] = product.get("cache_age_seconds", 0)
-                degraded_mode = True
+                # Layer 2: Using cached data - degraded unless it is just being
+                # refreshed in the background through a closed circuit
+                line.cache_age = product.get("cache_age_seconds", 0)
+                if not product.get("revalidating"):
+                    degraded_mode = True
         else:
             # Layer 3: No product data available at all
             # Maintain cart integrity but acknowledge data limitations
-            item["data_freshness"] = "unavailable"
-            item["message"] = "Price information temporarily unavailable"
+            line.data_freshness = "unavailable"
+            line.message = "Price information temporarily unavailable"
             degraded_mode = True
         
-        updated_items.append(item)
+        updated_items.append(line.to_dict())
 
         # Calculate total only for items with valid prices
         # This prevents incorrect totals during degraded operation
-        if item.get("price", 0) > 0:
-            total += item["subtotal"]
+        if line.price > 0:
+            total += line.subtotal
     
     return Cart(
         user_id=user_id,
@@ -185,8 +515,7 @@ async def get_cart(user_id: str):
 @app.delete("/cart/{user_id}")
 async def clear_cart(user_id: str):
     """Clear user's cart"""
-    if user_id in carts:
-        carts[user_id] = []
+    cart_store.clear(user_id)
     return {"message": "Cart cleared"}
 
 @app.get("/metrics")
@@ -194,26 +523,39 @@ async def clear_cart(user_id: str):
 async def get_metrics():
     """Get service metrics including circuit breaker stats"""
     return {
-        "total_carts": len(carts),
-        "total_items": sum(len(items) for items in carts.values()),
+        "total_carts": cart_store.total_carts,
+        "total_items": cart_store.total_items,
         "mode": "protected",
         "circuit_breaker": {
             "state": circuit_breaker.state,
             "failure_count": circuit_breaker.failure_count,
             "last_failure_time": circuit_breaker.last_failure_time.isoformat() if circuit_breaker.last_failure_time else None,
             "success_count": circuit_breaker.success_count,
-            "total_calls": circuit_breaker.success_count + circuit_breaker.failure_count
+            "total_calls": circuit_breaker.success_count + circuit_breaker.failure_count,
+            "window_type": circuit_breaker.window_type.value,
+            "window": circuit_breaker.get_stats().get("window")
         },
+        "circuit_breakers": breakers.get_stats(),
         "cache": {
-            "cached_products": len(product_cache),
-            "cache_entries": list(product_cache.keys())
-        }
+            **product_cache.get_stats(),
+            "cache_entries": product_cache.keys()
+        },
+        "single_flight": product_flights.get_stats(),
+        "batching": {"enabled": PRODUCT_BATCHING, **product_loader.get_stats()},
+        "latency": {
+            "adaptive_timeout": PRODUCT_ADAPTIVE_TIMEOUT,
+            **{route: tracker.get_stats() for route, tracker in product_latency.items()}
+        },
+        "hedging": {"enabled": PRODUCT_HEDGING, **product_hedger.get_stats()},
+        "retries": product_retrier.get_stats(),
+        "reconciliation": price_reconciler.get_stats(),
+        "warmup": cache_warmer.get_stats()
     }
 
 @app.post("/circuit-breaker/reset")
 async def reset_circuit_breaker():
-    """Manually reset the circuit breaker for demo purposes"""
-    circuit_breaker.reset()
+    """Manually reset every circuit breaker for demo purposes"""
+    breakers.reset()
     return {
         "message": "Circuit breaker reset",
         "state": circuit_breaker.state
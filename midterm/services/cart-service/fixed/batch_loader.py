@@ -0,0 +1,101 @@
+# services/cart-service/fixed/batch_loader.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+
+class BatchLoader:
+    """
+    DataLoader-style micro-batching.
+
+    Keys requested within `window_ms` of each other (across all in-flight
+    requests) are collected and fetched with a single call to `batch_fn`;
+    each caller's future is then resolved from the batch result. A batch is
+    sent early once it reaches `max_batch_size` distinct keys.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+        window_ms: float = 2.0,
+        max_batch_size: int = 50,
+        missing_exception: Callable[[Hashable], Exception] = KeyError
+    ):
+        """
+        Initialize Batch Loader
+
+        Args:
+            batch_fn: Fetches many keys at once; returns {key: value} for the keys found
+            window_ms: How long the first key of a batch waits for company
+            max_batch_size: Distinct keys per batch before it is sent immediately
+            missing_exception: Builds the error raised for keys absent from the result
+        """
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.missing_exception = missing_exception
+
+        self._pending: Dict[Hashable, List[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+        # Metrics
+        self.loads = 0
+        self.batches = 0
+        self.keys_fetched = 0
+        self.largest_batch = 0
+
+    async def load(self, key: Hashable) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.loads += 1
+        self._pending.setdefault(key, []).append(future)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._dispatch)
+        return await future
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: Dict[Hashable, List[asyncio.Future]]):
+        self.batches += 1
+        self.keys_fetched += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        try:
+            results = await self.batch_fn(list(batch))
+        except Exception as e:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for key, futures in batch.items():
+            for future in futures:
+                if future.done():
+                    continue  # Caller gave up (e.g. cart deadline)
+                if key in results:
+                    future.set_result(results[key])
+                else:
+                    future.set_exception(self.missing_exception(key))
+
+    def get_stats(self) -> dict:
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_batch_size,
+            "loads": self.loads,
+            "batches": self.batches,
+            "keys_fetched": self.keys_fetched,
+            "largest_batch": self.largest_batch,
+            "avg_batch_size": round(self.keys_fetched / self.batches, 2) if self.batches else 0.0
+        }
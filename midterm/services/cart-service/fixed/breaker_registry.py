@@ -0,0 +1,66 @@
+# services/cart-service/fixed/breaker_registry.py
+from typing import Callable, Dict, Tuple
+
+from bulkhead import Bulkhead
+from circuit_breaker import CircuitBreaker
+
+
+class BreakerRegistry:
+    """
+    One circuit breaker and one bulkhead per (upstream, route).
+
+    A failing or slow route opens only its own circuit and fills only its own
+    bulkhead; other routes to the same (or another) upstream keep working.
+    Entries are created on first use with the registry's shared settings.
+    """
+
+    def __init__(self, max_concurrent: int = 50, queue_timeout: float = 0.5, **breaker_kwargs):
+        """
+        Initialize Breaker Registry
+
+        Args:
+            max_concurrent: Bulkhead size for each route
+            queue_timeout: Seconds a call may wait for a bulkhead slot
+            **breaker_kwargs: CircuitBreaker settings shared by every route
+        """
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self.breaker_kwargs = breaker_kwargs
+        self._entries: Dict[Tuple[str, str], Tuple[CircuitBreaker, Bulkhead]] = {}
+
+    def get(self, upstream: str, route: str) -> Tuple[CircuitBreaker, Bulkhead]:
+        key = (upstream, route)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = (CircuitBreaker(**self.breaker_kwargs), Bulkhead(self.max_concurrent, self.queue_timeout))
+            self._entries[key] = entry
+        return entry
+
+    def breaker(self, upstream: str, route: str) -> CircuitBreaker:
+        return self.get(upstream, route)[0]
+
+    def protect(self, upstream: str, route: str) -> Callable[[Callable], Callable]:
+        """
+        Decorator: circuit breaker outside, bulkhead inside. An open circuit
+        rejects before queueing, and bulkhead rejections (BulkheadFullError)
+        are not counted as upstream failures.
+        """
+        breaker, bulkhead = self.get(upstream, route)
+
+        def decorate(func: Callable) -> Callable:
+            return breaker(bulkhead(func))
+
+        return decorate
+
+    def reset(self):
+        for breaker, _ in self._entries.values():
+            breaker.reset()
+
+    def get_stats(self) -> dict:
+        return {
+            f"{upstream}:{route}": {
+                "circuit_breaker": breaker.get_stats(),
+                "bulkhead": bulkhead.get_stats()
+            }
+            for (upstream, route), (breaker, bulkhead) in self._entries.items()
+        }
@@ -0,0 +1,91 @@
+# services/cart-service/fixed/bulkhead.py
+import asyncio
+import functools
+from typing import Callable
+
+
+class BulkheadFullError(Exception):
+    """Raised when no concurrency slot frees up within the queue timeout"""
+    pass
+
+
+class Bulkhead:
+    """
+    Bounded concurrency for calls to one dependency.
+
+    At most `max_concurrent` calls run at once; further callers wait up to
+    `queue_timeout` seconds for a slot and then fail fast with
+    BulkheadFullError, so a slow dependency cannot tie up every task.
+    """
+
+    def __init__(self, max_concurrent: int = 50, queue_timeout: float = 0.5):
+        """
+        Initialize Bulkhead
+
+        Args:
+            max_concurrent: Calls allowed in flight at once
+            queue_timeout: Seconds a caller may wait for a slot (0 = never wait)
+        """
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+        # Metrics
+        self.active = 0
+        self.waiting = 0
+        self.peak_active = 0
+        self.accepted = 0
+        self.rejected = 0
+
+    async def acquire(self):
+        if self._semaphore.locked():
+            if self.queue_timeout <= 0:
+                self.rejected += 1
+                raise BulkheadFullError(f"Bulkhead full ({self.max_concurrent} calls in flight)")
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise BulkheadFullError(
+                    f"Bulkhead full ({self.max_concurrent} calls in flight, "
+                    f"waited {self.queue_timeout}s)"
+                )
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()  # Free slot: returns without suspending
+        self.accepted += 1
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+    def __call__(self, func: Callable) -> Callable:
+        """Decorator running an async function inside the bulkhead"""
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            async with self:
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    def get_stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "queue_timeout": self.queue_timeout,
+            "active": self.active,
+            "waiting": self.waiting,
+            "peak_active": self.peak_active,
+            "accepted": self.accepted,
+            "rejected": self.rejected
+        }
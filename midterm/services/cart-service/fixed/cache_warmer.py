@@ -0,0 +1,153 @@
+# services/cart-service/fixed/cache_warmer.py
+import asyncio
+import os
+import time
+from enum import Enum
+from typing import Dict, List, Optional
+
+import httpx
+
+from product_cache import ProductCache
+
+
+class WarmupState(Enum):
+    PENDING = "PENDING"
+    WARMING = "WARMING"
+    DONE = "DONE"
+    TIMED_OUT = "TIMED_OUT"  # Ready anyway, with whatever was loaded
+    FAILED = "FAILED"        # Ready anyway (snapshot / lazy fetches still work)
+    SKIPPED = "SKIPPED"
+
+
+class CacheWarmer:
+    """
+    Fills the product cache at startup and persists it across restarts.
+
+    - Boot: reload the last snapshot file (original fetch times kept), then
+      page through product service's /products list, `concurrency` pages at
+      a time, until done or `timeout` seconds pass
+    - Runtime: write the cache to the snapshot file every `snapshot_interval`
+      seconds (and once more at shutdown)
+
+    The service reports ready once warming is no longer PENDING/WARMING.
+    """
+
+    def __init__(
+        self,
+        cache: ProductCache,
+        page_size: int = 100,
+        concurrency: int = 4,
+        timeout: float = 10.0,
+        snapshot_path: Optional[str] = None,
+        snapshot_interval: float = 30.0
+    ):
+        """
+        Initialize Cache Warmer
+
+        Args:
+            cache: Product cache to fill
+            page_size: Products per /products page
+            concurrency: Pages fetched at once
+            timeout: Seconds warming may take before the service is ready anyway
+            snapshot_path: Snapshot file; None disables persistence
+            snapshot_interval: Seconds between snapshot writes
+        """
+        self.cache = cache
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+
+        self.state = WarmupState.PENDING
+        self.error: Optional[str] = None
+        self.duration: Optional[float] = None
+
+        # Metrics
+        self.products_warmed = 0
+        self.pages_fetched = 0
+        self.snapshot_loaded = 0
+        self.snapshots_written = 0
+        self.snapshot_errors = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.state not in (WarmupState.PENDING, WarmupState.WARMING)
+
+    def skip(self):
+        self.state = WarmupState.SKIPPED
+
+    async def warm(self, client: httpx.AsyncClient):
+        """Page through /products into the cache; never raises"""
+        self.state = WarmupState.WARMING
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._fetch_pages(client), self.timeout)
+            self.state = WarmupState.DONE
+        except asyncio.TimeoutError:
+            self.state = WarmupState.TIMED_OUT
+        except Exception as e:
+            self.state = WarmupState.FAILED
+            self.error = str(e).splitlines()[0] if str(e) else type(e).__name__
+        self.duration = time.monotonic() - started
+
+    async def _fetch_page(self, client: httpx.AsyncClient, offset: int) -> httpx.Response:
+        response = await client.get("/products", params={"offset": offset, "limit": self.page_size})
+        response.raise_for_status()
+        self._store(response.json())
+        return response
+
+    async def _fetch_pages(self, client: httpx.AsyncClient):
+        first = await self._fetch_page(client, 0)
+        # No point fetching more products than the cache can hold
+        total = min(int(first.headers.get("X-Total-Count", 0)), self.cache.max_entries)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _page(offset: int):
+            async with semaphore:
+                await self._fetch_page(client, offset)
+
+        await asyncio.gather(*[_page(offset) for offset in range(self.page_size, total, self.page_size)])
+
+    def _store(self, products: List[Dict]):
+        self.pages_fetched += 1
+        for product in products:
+            self.cache.put(product["id"], product)
+            self.products_warmed += 1
+
+    def load_snapshot(self):
+        """Reload the cache from the snapshot file, if there is a usable one"""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            self.snapshot_loaded = self.cache.load(self.snapshot_path)
+        except (OSError, ValueError, KeyError, TypeError):
+            self.snapshot_errors += 1  # Corrupt or foreign file: start cold
+
+    def save_snapshot(self):
+        if not self.snapshot_path:
+            return
+        try:
+            self.cache.save(self.snapshot_path)
+            self.snapshots_written += 1
+        except (OSError, TypeError, ValueError):
+            self.snapshot_errors += 1
+
+    async def snapshot_periodically(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            self.save_snapshot()
+
+    def get_stats(self) -> dict:
+        return {
+            "state": self.state.value,
+            "ready": self.ready,
+            "error": self.error,
+            "duration_seconds": round(self.duration, 3) if self.duration is not None else None,
+            "products_warmed": self.products_warmed,
+            "pages_fetched": self.pages_fetched,
+            "snapshot_path": self.snapshot_path,
+            "snapshot_loaded": self.snapshot_loaded,
+            "snapshots_written": self.snapshots_written,
+            "snapshot_errors": self.snapshot_errors
+        }
@@ -0,0 +1,134 @@
+# services/cart-service/fixed/cart_store.py
+from typing import Dict, List, Optional, Set
+
+# Optional fields are only included in API output once set
+_OPTIONAL_FIELDS = ("status", "message", "cached", "data_freshness", "cache_age")
+
+
+class CartLine:
+    """One product line in a cart (slotted: no per-item dict)"""
+
+    __slots__ = ("product_id", "product_name", "quantity", "price", "subtotal") + _OPTIONAL_FIELDS
+
+    def __init__(
+        self,
+        product_id: str,
+        product_name: str,
+        quantity: int,
+        price: float,
+        status: Optional[str] = None,
+        message: Optional[str] = None,
+        cached: Optional[bool] = None
+    ):
+        self.product_id = product_id
+        self.product_name = product_name
+        self.quantity = quantity
+        self.price = price
+        self.subtotal = price * quantity
+        self.status = status
+        self.message = message
+        self.cached = cached
+        self.data_freshness: Optional[str] = None
+        self.cache_age: Optional[int] = None
+
+    def to_dict(self) -> dict:
+        result = {
+            "product_id": self.product_id,
+            "product_name": self.product_name,
+            "quantity": self.quantity,
+            "price": self.price,
+            "subtotal": self.subtotal
+        }
+        for field in _OPTIONAL_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                result[field] = value
+        return result
+
+
+class CartStore:
+    """
+    In-memory carts keyed by user id, then product id.
+
+    - O(1) lookup of an existing line when adding a product
+    - No locks: every method is synchronous, so on the service's single
+      event loop each runs to completion without interleaving. Callers
+      fetch product data first and then call add(), which merges into the
+      existing line, so concurrent adds lose no updates. Keep it that way:
+      never await between reading a line and writing it back.
+    - Totals maintained on write, so metrics never scan every cart
+    - Index of price_pending lines by product, so repricing touches only them
+    """
+
+    def __init__(self):
+        self._carts: Dict[str, Dict[str, CartLine]] = {}
+        self._pending: Dict[str, Set[str]] = {}  # product_id -> users with a price_pending line
+        self.total_items = 0  # Distinct product lines across all carts
+
+    @property
+    def total_carts(self) -> int:
+        return len(self._carts)
+
+    def lines(self, user_id: str) -> List[CartLine]:
+        """Snapshot of a user's cart lines, in insertion order"""
+        cart = self._carts.get(user_id)
+        return list(cart.values()) if cart else []
+
+    def get_line(self, user_id: str, product_id: str) -> Optional[CartLine]:
+        cart = self._carts.get(user_id)
+        return cart.get(product_id) if cart else None
+
+    def add(self, user_id: str, line: CartLine) -> CartLine:
+        """Add a line, or merge its quantity into the existing line; returns the stored line"""
+        cart = self._carts.setdefault(user_id, {})
+        existing = cart.get(line.product_id)
+        if existing is None:
+            cart[line.product_id] = line
+            self.total_items += 1
+            if line.status == "price_pending":
+                self._pending.setdefault(line.product_id, set()).add(user_id)
+            return line
+        existing.quantity += line.quantity
+        if existing.price > 0:
+            existing.subtotal = existing.price * existing.quantity
+        return existing
+
+    def reprice(self, product_id: str, product_name: str, price: float) -> int:
+        """Confirm every price_pending line for a product; returns lines updated"""
+        updated = 0
+        for user_id in self._pending.pop(product_id, ()):
+            line = self.get_line(user_id, product_id)
+            if line is None or line.status != "price_pending":
+                continue
+            line.product_name = product_name
+            line.price = price
+            line.subtotal = price * line.quantity
+            line.status = "confirmed"
+            line.message = None
+            updated += 1
+        return updated
+
+    def discard_pending(self, product_id: str) -> int:
+        """Remove every price_pending line for a product that no longer exists; returns lines removed"""
+        removed = 0
+        for user_id in self._pending.pop(product_id, ()):
+            cart = self._carts.get(user_id)
+            line = cart.get(product_id) if cart else None
+            if line is None or line.status != "price_pending":
+                continue
+            del cart[product_id]
+            self.total_items -= 1
+            removed += 1
+        return removed
+
+    def clear(self, user_id: str):
+        cart = self._carts.get(user_id)
+        if cart is not None:
+            self.total_items -= len(cart)
+            for product_id in cart:
+                users = self._pending.get(product_id)
+                if users is not None:
+                    users.discard(user_id)
+                    if not users:
+                        del self._pending[product_id]
+            cart.clear()
@@ -0,0 +1,83 @@
+# services/cart-service/fixed/hedging.py
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+
+class Hedger:
+    """
+    Hedged requests under a budget.
+
+    If a call has not finished after `delay`, an identical second call is
+    started and whichever succeeds first wins; the other is cancelled. Each
+    call earns `budget_ratio` tokens (up to `max_tokens`) and each hedge
+    spends one, so hedges stay below roughly budget_ratio of all calls even
+    when the whole upstream is slow.
+    """
+
+    def __init__(self, budget_ratio: float = 0.1, max_tokens: float = 10.0):
+        """
+        Initialize Hedger
+
+        Args:
+            budget_ratio: Hedges allowed per call, on average
+            max_tokens: Burst of hedges that can be saved up
+        """
+        self.budget_ratio = budget_ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+        # Metrics
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0      # Calls answered by the hedge
+        self.budget_denied = 0   # Hedges skipped for lack of budget
+
+    async def run(self, call: Callable[[], Awaitable[Any]], delay: Optional[float]) -> Any:
+        """Run call(), hedging it after `delay` seconds (None = never hedge)"""
+        self.calls += 1
+        self.tokens = min(self.max_tokens, self.tokens + self.budget_ratio)
+        if delay is None:
+            return await call()
+
+        primary = asyncio.ensure_future(call())
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+            if self.tokens < 1:
+                self.budget_denied += 1
+                return await primary
+            self.tokens -= 1
+            self.hedges += 1
+            hedge = asyncio.ensure_future(call())
+            tasks.add(hedge)
+
+            error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    # exception() raises CancelledError on a cancelled task
+                    if task.cancelled():
+                        error = error or asyncio.CancelledError()
+                        continue
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def get_stats(self) -> dict:
+        return {
+            "budget_ratio": self.budget_ratio,
+            "tokens": round(self.tokens, 2),
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "budget_denied": self.budget_denied,
+            "hedge_ratio": round(self.hedges / self.calls, 4) if self.calls else 0.0
+        }
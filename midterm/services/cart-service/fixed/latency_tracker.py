@@ -0,0 +1,151 @@
+# services/cart-service/fixed/latency_tracker.py
+from typing import List, Optional
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate in O(1) memory (Jain & Chlamtac P-square).
+
+    Keeps five markers whose heights track the minimum, q/2, q, (1+q)/2
+    quantiles and the maximum, adjusted with a piecewise-parabolic formula as
+    each sample arrives.
+    """
+
+    def __init__(self, q: float):
+        self.q = q
+        self.count = 0
+        self._heights: List[float] = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self._increments = [0, q / 2, q, (1 + q) / 2, 1]
+
+    def add(self, x: float):
+        self.count += 1
+        h = self._heights
+        if self.count <= 5:
+            h.append(x)
+            h.sort()
+            return
+
+        n = self._positions
+        # Find the cell x falls into, extending the extremes if needed
+        if x < h[0]:
+            h[0] = x
+            k = 0
+        elif x >= h[4]:
+            h[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= h[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # Move the three middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                parabolic = h[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+                )
+                if h[i - 1] < parabolic < h[i + 1]:
+                    h[i] = parabolic
+                else:
+                    h[i] += d * (h[i + d] - h[i]) / (n[i + d] - n[i])
+                n[i] += d
+
+    @property
+    def value(self) -> Optional[float]:
+        if not self._heights:
+            return None
+        if self.count < 5:
+            # Nearest rank over the few samples seen so far
+            return self._heights[min(int(self.q * self.count), self.count - 1)]
+        return self._heights[2]
+
+
+class LatencyTracker:
+    """
+    Recent upstream latency percentiles, and the timeout / hedge delay derived
+    from them.
+
+    P-square estimates never forget, so two generations are kept: estimates
+    come from the current generation once it has `min_samples` samples, from
+    the previous one until then, and a new generation starts every `window`
+    samples. Memory stays constant and estimates follow latency shifts within
+    a window.
+    """
+
+    def __init__(
+        self,
+        window: int = 500,
+        min_samples: int = 20,
+        multiplier: float = 2.0,
+        min_timeout: float = 0.1,
+        max_timeout: float = 5.0
+    ):
+        """
+        Initialize Latency Tracker
+
+        Args:
+            window: Samples per estimator generation
+            min_samples: Samples needed before estimates are used (max_timeout until then)
+            multiplier: Timeout = p99 * multiplier
+            min_timeout: Lower bound on the derived timeout, seconds
+            max_timeout: Upper bound on the derived timeout, seconds
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self._current = (P2Quantile(0.95), P2Quantile(0.99))
+        self._previous: Optional[tuple] = None
+        self.samples = 0
+
+    def record(self, seconds: float):
+        """Add one call duration (a timed-out call records its timeout)"""
+        self.samples += 1
+        p95, p99 = self._current
+        p95.add(seconds)
+        p99.add(seconds)
+        if p95.count >= self.window:
+            self._previous = self._current
+            self._current = (P2Quantile(0.95), P2Quantile(0.99))
+
+    def _estimators(self) -> Optional[tuple]:
+        if self._current[0].count >= self.min_samples:
+            return self._current
+        return self._previous
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Current p95 (q=0.95) or p99 (q=0.99) estimate, or None while warming up"""
+        estimators = self._estimators()
+        if estimators is None:
+            return None
+        return estimators[0 if q == 0.95 else 1].value
+
+    def timeout(self) -> float:
+        p99 = self.percentile(0.99)
+        if p99 is None:
+            return self.max_timeout
+        return min(max(p99 * self.multiplier, self.min_timeout), self.max_timeout)
+
+    def hedge_delay(self) -> Optional[float]:
+        """p95: a call still running by then is in the tail and worth hedging"""
+        return self.percentile(0.95)
+
+    def get_stats(self) -> dict:
+        p95 = self.percentile(0.95)
+        p99 = self.percentile(0.99)
+        return {
+            "samples": self.samples,
+            "p95_ms": round(p95 * 1000, 2) if p95 is not None else None,
+            "p99_ms": round(p99 * 1000, 2) if p99 is not None else None,
+            "timeout_ms": round(self.timeout() * 1000, 2)
+        }
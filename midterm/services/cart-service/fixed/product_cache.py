@@ -0,0 +1,134 @@
+# services/cart-service/fixed/product_cache.py
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Dict, List, Optional
+
+
+class Freshness(Enum):
+    FRESH = "FRESH"      # Serve locally, no upstream call
+    STALE = "STALE"      # Serve locally, refresh in the background
+    EXPIRED = "EXPIRED"  # Only usable as a fallback while the circuit is open
+
+
+class CacheEntry:
+    __slots__ = ("product", "fetched_at")
+
+    def __init__(self, product: Dict, fetched_at: float):
+        self.product = product
+        self.fetched_at = fetched_at
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class ProductCache:
+    """Bounded LRU cache of product info with fresh and stale TTLs"""
+
+    def __init__(self, max_entries: int = 10000, fresh_ttl: float = 5.0, stale_ttl: float = 300.0):
+        """
+        Initialize Product Cache
+
+        Args:
+            max_entries: Least recently used entries are evicted beyond this size
+            fresh_ttl: Seconds an entry is served without contacting product service
+            stale_ttl: Seconds an entry is served while a background refresh runs
+        """
+        self.max_entries = max_entries
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = max(stale_ttl, fresh_ttl)
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+        # Metrics
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self._entries
+
+    def get(self, product_id: str) -> Optional[CacheEntry]:
+        """Entry for product_id (marked as recently used), or None"""
+        entry = self._entries.get(product_id)
+        if entry is not None:
+            self._entries.move_to_end(product_id)
+        return entry
+
+    def put(self, product_id: str, product: Dict, fetched_at: Optional[float] = None):
+        self._entries[product_id] = CacheEntry(product, fetched_at or time.time())
+        self._entries.move_to_end(product_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def freshness(self, entry: CacheEntry) -> Freshness:
+        age = entry.age
+        if age < self.fresh_ttl:
+            return Freshness.FRESH
+        if age < self.stale_ttl:
+            return Freshness.STALE
+        return Freshness.EXPIRED
+
+    def keys(self) -> List[str]:
+        return list(self._entries.keys())
+
+    def items(self):
+        return self._entries.items()
+
+    def save(self, path: str) -> int:
+        """Write all entries to a JSON snapshot (atomically); returns entries written"""
+        snapshot = {
+            "saved_at": time.time(),
+            "entries": [
+                {"product_id": pid, "product": entry.product, "fetched_at": entry.fetched_at}
+                for pid, entry in self._entries.items()
+            ]
+        }
+        # Unique temp file in the same directory: processes saving to the same
+        # path at once must not write into each other's temp file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return len(snapshot["entries"])
+
+    def load(self, path: str) -> int:
+        """
+        Restore entries from a snapshot, keeping their original fetch times
+        (so old entries come back STALE or EXPIRED, not FRESH). Entries already
+        in the cache are newer and win. Returns entries loaded.
+        """
+        with open(path) as f:
+            snapshot = json.load(f)
+        loaded = 0
+        for item in snapshot["entries"]:
+            if item["product_id"] not in self._entries:
+                self.put(item["product_id"], item["product"], item["fetched_at"])
+                loaded += 1
+        return loaded
+
+    def get_stats(self) -> dict:
+        lookups = self.fresh_hits + self.stale_hits + self.misses
+        return {
+            "cached_products": len(self._entries),
+            "max_entries": self.max_entries,
+            "fresh_ttl": self.fresh_ttl,
+            "stale_ttl": self.stale_ttl,
+            "fresh_hits": self.fresh_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.fresh_hits + self.stale_hits) / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,123 @@
+# services/cart-service/fixed/reconciler.py
+import asyncio
+from itertools import islice
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+class PriceReconciler:
+    """
+    Background worker that reprices cart lines added while product service
+    was unavailable (status "price_pending").
+
+    Pending product ids are queued once each. While `is_ready()` (the circuit
+    is closed) the worker fetches them in batches of `batch_size`, at most
+    `batches_per_second` batches per second so a recovering product service
+    is not flooded, and hands each product to `apply`. Failed batches are
+    re-queued after `retry_delay`. Ids product service does not know are
+    handed to `discard` and not retried.
+    """
+
+    def __init__(
+        self,
+        fetch_batch: Callable[[List[str]], Awaitable[Dict[str, Dict]]],
+        apply: Callable[[str, Dict], int],
+        discard: Callable[[str], int],
+        is_ready: Callable[[], bool],
+        batch_size: int = 50,
+        batches_per_second: float = 2.0,
+        retry_delay: float = 1.0
+    ):
+        """
+        Initialize Price Reconciler
+
+        Args:
+            fetch_batch: Fetches many products at once; returns {id: product} for known ids
+            apply: Applies a fetched product; returns the number of cart lines repriced
+            discard: Handles an id product service does not know; returns the number of cart lines removed
+            is_ready: Whether product service may be called now (e.g. circuit closed)
+            batch_size: Product ids per upstream request
+            batches_per_second: Rate limit on upstream requests
+            retry_delay: Seconds to wait after a failed batch or while not ready
+        """
+        self.fetch_batch = fetch_batch
+        self.apply = apply
+        self.discard = discard
+        self.is_ready = is_ready
+        self.batch_size = batch_size
+        self.interval = 1 / batches_per_second
+        self.retry_delay = retry_delay
+
+        self._queue: Dict[str, None] = {}  # Insertion-ordered set of product ids
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.enqueued = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.reconciled_lines = 0
+        self.unknown_products = 0
+        self.discarded_lines = 0
+
+    def enqueue(self, product_id: str):
+        if product_id not in self._queue:
+            self._queue[product_id] = None
+            self.enqueued += 1
+            self._wakeup.set()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            if not self.is_ready():
+                await asyncio.sleep(self.retry_delay)
+                continue
+
+            batch = list(islice(self._queue, self.batch_size))
+            for product_id in batch:
+                del self._queue[product_id]
+            started = loop.time()
+            try:
+                products = await self.fetch_batch(batch)
+            except Exception:
+                self.failed_batches += 1
+                for product_id in batch:
+                    self._queue.setdefault(product_id, None)
+                await asyncio.sleep(self.retry_delay)
+                continue
+
+            self.batches += 1
+            for product_id in batch:
+                product = products.get(product_id)
+                if product is None:
+                    self.unknown_products += 1
+                    self.discarded_lines += self.discard(product_id)
+                else:
+                    self.reconciled_lines += self.apply(product_id, product)
+            await asyncio.sleep(max(0.0, self.interval - (loop.time() - started)))
+
+    def get_stats(self) -> dict:
+        return {
+            "pending_products": len(self._queue),
+            "enqueued": self.enqueued,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "reconciled_lines": self.reconciled_lines,
+            "unknown_products": self.unknown_products,
+            "discarded_lines": self.discarded_lines
+        }
@@ -0,0 +1,128 @@
+# services/cart-service/fixed/retry.py
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional, Tuple, Type
+
+
+class RetryBudget:
+    """
+    Token bucket limiting retries to a fraction of calls.
+
+    Every call deposits `ratio` tokens (up to `max_tokens`) and every retry
+    withdraws one, so when an upstream is failing outright retries add at
+    most ~ratio extra load instead of multiplying it.
+    """
+
+    def __init__(self, ratio: float = 0.1, max_tokens: float = 10.0):
+        """
+        Initialize Retry Budget
+
+        Args:
+            ratio: Retries allowed per call, on average
+            max_tokens: Burst of retries that can be saved up
+        """
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class Retrier:
+    """
+    Retries with full-jitter exponential backoff, bounded by a retry budget,
+    the circuit breaker and the caller's deadline.
+
+    A retry is skipped (and the last error raised) when the budget is empty,
+    when `can_retry()` says no (e.g. the circuit is open), or when the backoff
+    sleep would end past the deadline.
+    """
+
+    def __init__(
+        self,
+        budget: RetryBudget,
+        max_attempts: int = 3,
+        base_delay: float = 0.05,
+        max_delay: float = 1.0,
+        retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+        can_retry: Callable[[], bool] = lambda: True
+    ):
+        """
+        Initialize Retrier
+
+        Args:
+            budget: Shared retry budget
+            max_attempts: Attempts per call, including the first
+            base_delay: Backoff before the first retry is drawn from [0, base_delay]
+            max_delay: Cap on the backoff range, seconds
+            retry_on: Exception types worth retrying (transient failures)
+            can_retry: Checked before every retry; False stops retrying
+        """
+        self.budget = budget
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = retry_on
+        self.can_retry = can_retry
+
+        # Metrics
+        self.calls = 0
+        self.retries = 0
+        self.retry_successes = 0     # Calls that succeeded only thanks to a retry
+        self.budget_exhausted = 0
+        self.skipped_circuit = 0
+        self.skipped_deadline = 0
+        self.gave_up = 0             # Failed after max_attempts
+
+    async def run(self, call: Callable[[], Awaitable[Any]], deadline: Optional[float] = None) -> Any:
+        """Run call() with retries; `deadline` is a time.monotonic() value"""
+        self.calls += 1
+        self.budget.deposit()
+        attempt = 1
+        while True:
+            try:
+                result = await call()
+            except self.retry_on:
+                if attempt >= self.max_attempts:
+                    self.gave_up += 1
+                    raise
+                if not self.can_retry():
+                    self.skipped_circuit += 1
+                    raise
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    self.skipped_deadline += 1
+                    raise
+                if not self.budget.try_withdraw():
+                    self.budget_exhausted += 1
+                    raise
+                self.retries += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            if attempt > 1:
+                self.retry_successes += 1
+            return result
+
+    def get_stats(self) -> dict:
+        return {
+            "max_attempts": self.max_attempts,
+            "budget_ratio": self.budget.ratio,
+            "budget_tokens": round(self.budget.tokens, 2),
+            "calls": self.calls,
+            "retries": self.retries,
+            "retry_successes": self.retry_successes,
+            "budget_exhausted": self.budget_exhausted,
+            "skipped_circuit_open": self.skipped_circuit,
+            "skipped_deadline": self.skipped_deadline,
+            "gave_up": self.gave_up,
+            "retry_ratio": round(self.retries / self.calls, 4) if self.calls else 0.0
+        }
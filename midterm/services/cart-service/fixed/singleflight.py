@@ -0,0 +1,50 @@
+# services/cart-service/fixed/singleflight.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Request coalescing: concurrent calls for the same key share one in-flight call.
+
+    The first caller (the leader) starts the call as a task; everyone arriving
+    while it runs awaits the same task. A caller being cancelled (e.g. by a
+    cart-level deadline) does not cancel the shared call for the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+        # Metrics
+        self.calls = 0       # Calls that actually went upstream
+        self.coalesced = 0   # Calls served by joining an in-flight call
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._finish(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved even if every caller gave up
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def get_stats(self) -> dict:
+        total = self.calls + self.coalesced
+        return {
+            "upstream_calls": self.calls,
+            "coalesced_calls": self.coalesced,
+            "in_flight": self.in_flight,
+            "coalesced_ratio": round(self.coalesced / total, 4) if total else 0.0
+        }
@@ -0,0 +1,105 @@
+# services/cart-service/fixed/test_batch_loader.py
+import asyncio
+
+import pytest
+
+from batch_loader import BatchLoader
+
+
+class NotFound(Exception):
+    pass
+
+
+class RecordingBatch:
+    """batch_fn that records each batch; keys starting with "missing" are not found"""
+
+    def __init__(self, delay: float = 0.0, error: Exception = None):
+        self.batches = []
+        self.delay = delay
+        self.error = error
+
+    async def __call__(self, keys):
+        self.batches.append(keys)
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {key: f"value-{key}" for key in keys if not key.startswith("missing")}
+
+
+def test_keys_within_window_share_one_batch():
+    batch_fn = RecordingBatch()
+
+    async def run():
+        loader = BatchLoader(batch_fn, window_ms=10)
+        results = await asyncio.gather(*(loader.load(key) for key in ["a", "b", "a", "c"]))
+        return loader, results
+
+    loader, results = asyncio.run(run())
+    assert results == ["value-a", "value-b", "value-a", "value-c"]
+    assert batch_fn.batches == [["a", "b", "c"]]  # Duplicates fetched once
+    assert loader.get_stats()["loads"] == 4
+
+
+def test_full_batch_is_sent_before_the_window_ends():
+    batch_fn = RecordingBatch()
+
+    async def run():
+        loader = BatchLoader(batch_fn, window_ms=10_000, max_batch_size=3)
+        return await asyncio.wait_for(asyncio.gather(*(loader.load(key) for key in "abc")), timeout=1)
+
+    assert asyncio.run(run()) == ["value-a", "value-b", "value-c"]
+    assert batch_fn.batches == [["a", "b", "c"]]
+
+
+def test_later_keys_start_a_new_batch():
+    batch_fn = RecordingBatch()
+
+    async def run():
+        loader = BatchLoader(batch_fn, window_ms=5)
+        await loader.load("a")
+        await loader.load("b")
+
+    asyncio.run(run())
+    assert batch_fn.batches == [["a"], ["b"]]
+
+
+def test_missing_keys_raise_missing_exception():
+    batch_fn = RecordingBatch()
+
+    async def run():
+        loader = BatchLoader(batch_fn, window_ms=5, missing_exception=NotFound)
+        return await asyncio.gather(loader.load("a"), loader.load("missing-1"), return_exceptions=True)
+
+    found, missing = asyncio.run(run())
+    assert found == "value-a"
+    assert isinstance(missing, NotFound)
+    assert missing.args == ("missing-1",)
+
+
+def test_batch_failure_reaches_every_caller():
+    batch_fn = RecordingBatch(error=ConnectionError("down"))
+
+    async def run():
+        loader = BatchLoader(batch_fn, window_ms=5)
+        return await asyncio.gather(loader.load("a"), loader.load("b"), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert len(batch_fn.batches) == 1
+
+
+def test_cancelled_caller_does_not_affect_the_others():
+    batch_fn = RecordingBatch(delay=0.05)
+
+    async def run():
+        loader = BatchLoader(batch_fn, window_ms=5)
+        impatient = asyncio.create_task(loader.load("a"))
+        patient = asyncio.create_task(loader.load("a"))
+        await asyncio.sleep(0.02)  # Batch sent, still in flight
+        impatient.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await impatient
+        return await patient
+
+    assert asyncio.run(run()) == "value-a"
+    assert batch_fn.batches == [["a"]]
@@ -0,0 +1,203 @@
+# services/cart-service/fixed/test_circuit_breaker.py
+import asyncio
+import time
+
+import pytest
+
+from circuit_breaker import CircuitBreaker, CircuitBreakerError, CountWindow, TimeWindow, WindowType
+
+SECOND = 1_000_000_000
+
+
+class Boom(Exception):
+    pass
+
+
+async def ok():
+    return "ok"
+
+
+async def fail():
+    raise Boom()
+
+
+def call(breaker: CircuitBreaker, func, times: int = 1):
+    """Run a protected call `times` times, swallowing expected failures and rejections"""
+    wrapped = breaker(func)
+
+    async def run():
+        for _ in range(times):
+            try:
+                await wrapped()
+            except (Boom, CircuitBreakerError):
+                pass
+
+    asyncio.run(run())
+
+
+def test_count_window_trips_at_failure_rate():
+    window = CountWindow(10, minimum_calls=10, failure_rate=0.5)
+    for _ in range(5):
+        assert not window.record(False, 0, 0)
+    for _ in range(4):
+        assert not window.record(True, 0, 0)  # Below minimum_calls
+    assert window.record(True, 0, 0)  # 5 of 10 failed
+    assert window.totals(0) == (10, 5, 0)
+
+
+def test_count_window_forgets_overwritten_outcomes():
+    window = CountWindow(4, minimum_calls=4, failure_rate=0.75)
+    for failed in (True, True, False, False):
+        assert not window.record(failed, 0, 0)
+    for _ in range(2):
+        window.record(False, 0, 0)  # Overwrites both failures
+    assert window.totals(0) == (4, 0, 0)
+    assert not window.record(True, 0, 0)
+    assert not window.record(True, 0, 0)
+    assert window.record(True, 0, 0)  # 3 of the last 4
+
+
+def test_count_window_trips_at_slow_call_rate():
+    window = CountWindow(4, minimum_calls=4, slow_rate=0.5, slow_ns=SECOND)
+    assert not window.record(False, 0, SECOND // 2)
+    assert not window.record(False, 0, SECOND // 2)
+    assert not window.record(False, 0, SECOND)
+    assert window.record(False, 0, 2 * SECOND)
+    assert window.totals(0) == (4, 0, 2)
+
+
+def test_time_window_trips_at_failure_rate():
+    window = TimeWindow(10, minimum_calls=4, failure_rate=0.5)
+    now = 100 * SECOND
+    assert not window.record(False, now, now)
+    assert not window.record(False, now, now + SECOND)
+    assert not window.record(True, now, now + 2 * SECOND)
+    assert window.record(True, now, now + 3 * SECOND)
+
+
+def test_time_window_expires_old_buckets():
+    window = TimeWindow(10, bucket_seconds=1.0, minimum_calls=3, failure_rate=0.5)
+    start = 100 * SECOND
+    window.record(True, start, start)
+    window.record(True, start, start + SECOND)
+    assert window.totals(start + 5 * SECOND) == (2, 2, 0)
+    # The first bucket leaves the window after 10s, the second a second later
+    assert window.totals(start + 10 * SECOND) == (1, 1, 0)
+    assert window.totals(start + 11 * SECOND) == (0, 0, 0)
+    # Old failures no longer count towards a trip
+    assert not window.record(True, start + 12 * SECOND, start + 12 * SECOND)
+    assert window.totals(start + 12 * SECOND) == (1, 1, 0)
+
+
+def test_time_window_jump_past_whole_window_clears_it():
+    window = TimeWindow(5, minimum_calls=1, failure_rate=1.0)
+    window.record(False, 0, 0)
+    window.record(False, 0, SECOND)
+    assert window.totals(60 * SECOND) == (0, 0, 0)
+
+
+def test_consecutive_mode_opens_after_threshold_and_success_resets():
+    breaker = CircuitBreaker(failure_threshold=3, expected_exception=Boom)
+    call(breaker, fail, 2)
+    call(breaker, ok)
+    call(breaker, fail, 2)
+    assert breaker.state == "CLOSED"
+    call(breaker, fail)
+    assert breaker.state == "OPEN"
+
+
+@pytest.mark.parametrize("window_type", [WindowType.COUNT, WindowType.TIME])
+def test_window_modes_open_on_failure_rate(window_type):
+    breaker = CircuitBreaker(window_type=window_type, window_size=20, minimum_calls=10,
+                             failure_rate_threshold=0.5, expected_exception=Boom)
+    # Alternating failures never trip the consecutive rule, but are a 50% rate
+    for _ in range(4):
+        call(breaker, ok)
+        call(breaker, fail)
+    call(breaker, ok)
+    assert breaker.state == "CLOSED"  # 4 of 9, below minimum_calls
+    call(breaker, fail)
+    assert breaker.state == "OPEN"  # 5 of 10
+
+
+def test_open_circuit_rejects_without_calling():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60, expected_exception=Boom)
+    call(breaker, fail)
+    calls = []
+
+    async def tracked():
+        calls.append(1)
+
+    with pytest.raises(CircuitBreakerError):
+        asyncio.run(breaker(tracked)())
+    assert calls == []
+    assert breaker.rejected_calls == 1
+
+
+def open_then_wait(breaker: CircuitBreaker):
+    """Trip the breaker and wait out its recovery timeout"""
+    call(breaker, fail, breaker.failure_threshold)
+    assert breaker.state == "OPEN"
+    time.sleep(breaker.current_recovery_timeout + 0.01)
+    assert breaker.state == "HALF_OPEN"
+
+
+def test_half_open_admits_at_most_max_probes():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05, recovery_jitter=0,
+                             half_open_max_calls=2, success_threshold=2, expected_exception=Boom)
+    open_then_wait(breaker)
+
+    async def run():
+        release = asyncio.Event()
+        admitted = 0
+
+        async def probe():
+            nonlocal admitted
+            admitted += 1
+            await release.wait()
+
+        wrapped = breaker(probe)
+        tasks = [asyncio.create_task(wrapped()) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert breaker.probes_in_flight == 2
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return admitted, results
+
+    admitted, results = asyncio.run(run())
+    assert admitted == 2
+    assert sum(isinstance(result, CircuitBreakerError) for result in results) == 3
+    assert breaker.probes_in_flight == 0
+    assert breaker.state == "CLOSED"  # Both probes succeeded
+
+
+def test_successful_probe_closes_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05, recovery_jitter=0,
+                             success_threshold=1, expected_exception=Boom)
+    open_then_wait(breaker)
+    call(breaker, ok)
+    assert breaker.state == "CLOSED"
+    assert breaker.consecutive_opens == 0
+
+
+def test_failed_probe_reopens_with_backoff():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05, recovery_jitter=0,
+                             backoff_multiplier=2.0, max_recovery_timeout=0.15, expected_exception=Boom)
+    open_then_wait(breaker)
+    call(breaker, fail)
+    assert breaker.state == "OPEN"
+    assert breaker.current_recovery_timeout == pytest.approx(0.1)
+    time.sleep(0.11)
+    call(breaker, fail)
+    assert breaker.current_recovery_timeout == pytest.approx(0.15)  # Capped
+
+
+def test_recovery_jitter_only_shortens_timeout():
+    timeouts = []
+    for _ in range(200):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10, recovery_jitter=0.2,
+                                 expected_exception=Boom)
+        call(breaker, fail)
+        timeouts.append(breaker.current_recovery_timeout)
+    assert all(8.0 <= timeout <= 10.0 for timeout in timeouts)
+    assert max(timeouts) - min(timeouts) > 1.0  # Actually spread out
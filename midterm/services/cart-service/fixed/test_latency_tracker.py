@@ -0,0 +1,75 @@
+# services/cart-service/fixed/test_latency_tracker.py
+import random
+
+import pytest
+
+from latency_tracker import LatencyTracker, P2Quantile
+
+
+def exact_quantile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+@pytest.mark.parametrize("q", [0.5, 0.95, 0.99])
+@pytest.mark.parametrize("distribution", ["uniform", "exponential", "lognormal"])
+def test_p2_tracks_exact_quantile(q, distribution):
+    rng = random.Random(42)
+    draw = {
+        "uniform": lambda: rng.uniform(0.0, 1.0),
+        "exponential": lambda: rng.expovariate(10.0),
+        "lognormal": lambda: rng.lognormvariate(-3.0, 0.5),
+    }[distribution]
+    samples = [draw() for _ in range(20000)]
+    estimate = P2Quantile(q)
+    for x in samples:
+        estimate.add(x)
+    assert estimate.count == len(samples)
+    assert estimate.value == pytest.approx(exact_quantile(samples, q), rel=0.05)
+
+
+def test_p2_small_samples_use_nearest_rank():
+    estimate = P2Quantile(0.5)
+    assert estimate.value is None
+    for x in (3.0, 1.0, 2.0):
+        estimate.add(x)
+    assert estimate.value == 2.0
+
+
+def test_p2_stays_within_observed_range():
+    estimate = P2Quantile(0.99)
+    for x in [5.0] * 100 + [1.0] * 100:
+        estimate.add(x)
+        assert 1.0 <= estimate.value <= 5.0
+
+
+def test_tracker_uses_max_timeout_until_warmed_up():
+    tracker = LatencyTracker(min_samples=20, max_timeout=5.0)
+    for _ in range(19):
+        tracker.record(0.01)
+    assert tracker.timeout() == 5.0
+    assert tracker.hedge_delay() is None
+    tracker.record(0.01)
+    assert tracker.timeout() < 5.0
+
+
+def test_tracker_timeout_is_clamped():
+    fast = LatencyTracker(min_samples=5, multiplier=2.0, min_timeout=0.1, max_timeout=5.0)
+    slow = LatencyTracker(min_samples=5, multiplier=2.0, min_timeout=0.1, max_timeout=5.0)
+    for _ in range(50):
+        fast.record(0.001)
+        slow.record(4.0)
+    assert fast.timeout() == 0.1
+    assert slow.timeout() == 5.0
+
+
+def test_tracker_follows_latency_shift_across_generations():
+    tracker = LatencyTracker(window=100, min_samples=20, multiplier=2.0, min_timeout=0.0, max_timeout=10.0)
+    for _ in range(300):
+        tracker.record(0.05)
+    assert tracker.percentile(0.99) == pytest.approx(0.05)
+    for _ in range(250):
+        tracker.record(1.0)
+    # Older generations were dropped, so the estimate is the new latency alone
+    assert tracker.percentile(0.99) == pytest.approx(1.0)
+    assert tracker.timeout() == pytest.approx(2.0)
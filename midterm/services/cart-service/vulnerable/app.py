@@ -3,16 +3,54 @@ from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 import httpx
 import os
-from typing import Dict, List
+from typing import Dict, List, Optional
 import asyncio
+from contextlib import asynccontextmanager
 
-app = FastAPI(title="Shopping Cart Service - Vulnerable")
+from cart_store import CartLine, CartStore
 
 # Product service URL
 PRODUCT_SERVICE_URL = os.getenv("PRODUCT_SERVICE_URL", "http://product-service:8000")
 
-# In-memory cart storage (user_id -> cart items)
-carts: Dict[str, List[Dict]] = {}
+# Shared HTTP client settings. PRODUCT_TIMEOUT defaults to httpx's own 5s;
+# PRODUCT_TIMEOUT=none removes it so calls to a hung product service wait
+# forever (opt-in, for demonstrating that failure mode).
+_timeout = os.getenv("PRODUCT_TIMEOUT", "5.0")
+PRODUCT_TIMEOUT = None if _timeout.lower() == "none" else float(_timeout)
+PRODUCT_MAX_CONNECTIONS = int(os.getenv("PRODUCT_MAX_CONNECTIONS", "100"))
+PRODUCT_MAX_KEEPALIVE = int(os.getenv("PRODUCT_MAX_KEEPALIVE", "20"))
+PRODUCT_KEEPALIVE_EXPIRY = float(os.getenv("PRODUCT_KEEPALIVE_EXPIRY", "30.0"))
+PRODUCT_HTTP2 = os.getenv("PRODUCT_HTTP2", "false").lower() == "true"  # Requires httpx[http2]
+
+# Cart view refresh: product lookups run concurrently, at most this many at once
+CART_REFRESH_CONCURRENCY = int(os.getenv("CART_REFRESH_CONCURRENCY", "10"))
+
+http_client: Optional[httpx.AsyncClient] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the pooled product-service client on startup, close it on shutdown"""
+    global http_client
+    http_client = httpx.AsyncClient(
+        base_url=PRODUCT_SERVICE_URL,
+        timeout=httpx.Timeout(PRODUCT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=PRODUCT_MAX_CONNECTIONS,
+            max_keepalive_connections=PRODUCT_MAX_KEEPALIVE,
+            keepalive_expiry=PRODUCT_KEEPALIVE_EXPIRY
+        ),
+        http2=PRODUCT_HTTP2
+    )
+    try:
+        yield
+    finally:
+        await http_client.aclose()
+        http_client = None
+
+app = FastAPI(title="Shopping Cart Service - Vulnerable", lifespan=lifespan)
+
+# In-memory cart storage (user_id -> product_id -> line)
+cart_store = CartStore()
 
 class CartItem(BaseModel):
     product_id: str
@@ -33,27 +71,21 @@ async def health_check():
 async def add_to_cart(user_id: str, item: CartItem):
     """Add item to cart - VULNERABLE VERSION"""
     
-    # Initialize cart if doesn't exist
-    if user_id not in carts:
-        carts[user_id] = []
-    
     # Always try to fetch product info from product service
     # This is vulnerable - no circuit breaker, no timeout handling
     try:
-        async with httpx.AsyncClient() as client:
-            # No timeout set - can hang indefinitely
-            response = await client.get(
-                f"{PRODUCT_SERVICE_URL}/products/{item.product_id}"
+        # Only the client's flat timeout - no fallback, and with
+        # PRODUCT_TIMEOUT=none it can hang indefinitely
+        response = await http_client.get(f"/products/{item.product_id}")
+        
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Product service error: {response.text}"
             )
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Product service error: {response.text}"
-                )
-            
-            product = response.json()
-            
+        
+        product = response.json()
+        
     except httpx.RequestError as e:
         # Propagate the error - no graceful handling
         raise HTTPException(
@@ -66,21 +98,17 @@ async def add_to_cart(user_id: str, item: CartItem):
         raise HTTPException(status_code=400, detail="Insufficient stock")
     
     # Add to cart
-    cart_item = {
-        "product_id": item.product_id,
-        "product_name": product["name"],
-        "quantity": item.quantity,
-        "price": product["price"],
-        "subtotal": product["price"] * item.quantity
-    }
+    line = CartLine(
+        product_id=item.product_id,
+        product_name=product["name"],
+        quantity=item.quantity,
+        price=product["price"]
+    )
+    cart_item = line.to_dict()
     
-    # Update existing item or add new
-    existing = next((x for x in carts[user_id] if x["product_id"] == item.product_id), None)
-    if existing:
-        existing["quantity"] += item.quantity
-        existing["subtotal"] = existing["price"] * existing["quantity"]
-    else:
-        carts[user_id].append(cart_item)
+    # Update existing item (O(1) lookup) or add new; add() merges quantities
+    # into the stored line, so concurrent adds for this user lose no updates
+    cart_store.add(user_id, line)
     
     return {"message": "Item added to cart", "cart_item": cart_item}
 
@@ -89,48 +117,59 @@ async def add_to_cart(user_id: str, item: CartItem):
 async def get_cart(user_id: str):
     """Get user's cart with fresh product info - VULNERABLE VERSION"""
     
-    if user_id not in carts or not carts[user_id]:
+    # Snapshot the lines: other requests may add to this cart while we await
+    lines = cart_store.lines(user_id)
+    if not lines:
         return Cart(user_id=user_id, items=[], total_price=0.0)
     
     # Try to refresh all product info - can cause cascading failures
     updated_items = []
     total = 0.0
+    semaphore = asyncio.Semaphore(CART_REFRESH_CONCURRENCY)
+    
+    async def _fetch(product_id: str) -> httpx.Response:
+        async with semaphore:
+            return await http_client.get(f"/products/{product_id}")
+    
+    # Lookups run concurrently, but there is still no deadline - one hung
+    # call holds up the whole cart
+    product_ids = list(dict.fromkeys(line.product_id for line in lines))
+    responses = dict(zip(
+        product_ids,
+        await asyncio.gather(*[_fetch(pid) for pid in product_ids], return_exceptions=True)
+    ))
     
-    async with httpx.AsyncClient() as client:
-        for item in carts[user_id]:
-            try:
-                # Each call can fail and cause the entire cart to fail
-                response = await client.get(
-                    f"{PRODUCT_SERVICE_URL}/products/{item['product_id']}"
-                )
-                
-                if response.status_code == 200:
-                    product = response.json()
-                    item["price"] = product["price"]
-                    item["subtotal"] = product["price"] * item["quantity"]
-                    updated_items.append(item)
-                    total += item["subtotal"]
-                else:
-                    # If one product fails, entire cart fails
-                    raise HTTPException(
-                        status_code=503,
-                        detail=f"Failed to fetch product {item['product_id']}"
-                    )
-                    
-            except httpx.RequestError as e:
-                # No graceful degradation
-                raise HTTPException(
-                    status_code=503,
-                    detail=f"Product service unavailable: {str(e)}"
-                )
+    for line in lines:
+        response = responses[line.product_id]
+        
+        if isinstance(response, httpx.RequestError):
+            # No graceful degradation
+            raise HTTPException(
+                status_code=503,
+                detail=f"Product service unavailable: {str(response)}"
+            )
+        if isinstance(response, BaseException):
+            raise response
+        
+        if response.status_code == 200:
+            product = response.json()
+            line.price = product["price"]
+            line.subtotal = product["price"] * line.quantity
+            updated_items.append(line.to_dict())
+            total += line.subtotal
+        else:
+            # If one product fails, entire cart fails
+            raise HTTPException(
+                status_code=503,
+                detail=f"Failed to fetch product {line.product_id}"
+            )
     
     return Cart(user_id=user_id, items=updated_items, total_price=total)
 
 @app.delete("/cart/{user_id}")
 async def clear_cart(user_id: str):
     """Clear user's cart"""
-    if user_id in carts:
-        carts[user_id] = []
+    cart_store.clear(user_id)
     return {"message": "Cart cleared"}
 
 @app.get("/metrics")
@@ -138,8 +177,8 @@ async def clear_cart(user_id: str):
 async def get_metrics():
     """Get service metrics"""
     return {
-        "total_carts": len(carts),
-        "total_items": sum(len(items) for items in carts.values()),
+        "total_carts": cart_store.total_carts,
+        "total_items": cart_store.total_items,
         "mode": "vulnerable",
         "circuit_breaker": "disabled"
     }
\ No newline at end of file
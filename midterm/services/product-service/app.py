@@ -1,11 +1,21 @@
 # services/product-service/app.py
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
-import time
+from typing import List, Optional
+import asyncio
 import os
+import time
+from fault_injection import FaultInjector, LatencyDistribution, LatencyProfile
+from metrics import MetricsMiddleware, MetricsRegistry
 
 app = FastAPI(title="Product Service")
 
+# Request metrics. With `uvicorn --workers N`, set METRICS_DIR to a shared
+# directory so /metrics aggregates every worker, not just the one answering.
+metrics = MetricsRegistry(metrics_dir=os.getenv("METRICS_DIR"))
+app.add_middleware(MetricsMiddleware, registry=metrics)
+
 # Simulated product database
 PRODUCTS = {
     "1": {"id": "1", "name": "Laptop", "price": 999.99, "stock": 10},
@@ -15,14 +25,23 @@ PRODUCTS = {
     "5": {"id": "5", "name": "Headphones", "price": 149.99, "stock": 30}
 }
 
-# Failure simulation: simple on/off with optional latency
-FAILURE_MODE = os.getenv("FAILURE_MODE", "false").lower() == "true"
-LATENCY_MS = int(os.getenv("LATENCY_MS", "0"))
+# Failure simulation: non-blocking latency and error injection.
+# FAILURE_MODE / LATENCY_MS env vars set the initial global behaviour.
+faults = FaultInjector(
+    latency_ms=int(os.getenv("LATENCY_MS", "0")),
+    failure_mode=os.getenv("FAILURE_MODE", "false").lower() == "true"
+)
 
-# Basic metrics
-REQUEST_COUNT: int = 0
-SUCCESS_COUNT: int = 0
-FAILURE_COUNT: int = 0
+# Route keys, shared by fault injection (the control endpoints' `route`
+# parameter), the metrics labels and the cart service's per-route breakers.
+# Both multi-get forms (GET ?ids= and POST /batch) are "multi_get".
+ROUTES = ("get_product", "list_products", "multi_get")
+
+# Upper bound on ids per multi-get request
+MAX_BATCH_IDS = 100
+
+# Largest page the list endpoint returns with `?limit=`
+MAX_PAGE_SIZE = 500
 
 class Product(BaseModel):
     id: str
@@ -30,66 +49,131 @@ class Product(BaseModel):
     price: float
     stock: int
 
+class ProductBatchRequest(BaseModel):
+    ids: List[str]
+
+# Periodic snapshot flush (multi-worker mode); referenced so it is not garbage collected
+metrics_flush_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_metrics_flush():
+    global metrics_flush_task
+    if metrics.metrics_dir:
+        os.makedirs(metrics.metrics_dir, exist_ok=True)
+        metrics_flush_task = asyncio.create_task(metrics.flush_periodically())
+
+@app.on_event("shutdown")
+async def stop_metrics_flush():
+    global metrics_flush_task
+    if metrics_flush_task is not None:
+        metrics_flush_task.cancel()
+        metrics_flush_task = None
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    if FAILURE_MODE:
+    if faults.failure_mode:
         raise HTTPException(status_code=503, detail={
             "status": "unhealthy",
             "failure_mode": True,
-            "latency_ms": LATENCY_MS,
+            "latency_ms": faults.latency_ms,
         })
-    return {"status": "healthy", "latency_ms": LATENCY_MS}
+    return {"status": "healthy", "latency_ms": faults.latency_ms}
 
 @app.get("/products/{product_id}")
 async def get_product(product_id: str):
     """Get product details"""
-    global REQUEST_COUNT, SUCCESS_COUNT, FAILURE_COUNT
-    REQUEST_COUNT += 1
-
-    # Simulate latency
-    if LATENCY_MS > 0:
-        time.sleep(LATENCY_MS / 1000)
-    
-    if FAILURE_MODE:
-        FAILURE_COUNT += 1
+    # Simulate latency and errors without blocking the event loop
+    if await faults.apply("get_product"):
         raise HTTPException(status_code=503, detail="Service temporarily unavailable")
     
     # Normal operation
     if product_id not in PRODUCTS:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    SUCCESS_COUNT += 1
     return PRODUCTS[product_id]
 
 @app.get("/products")
-async def list_products():
-    """List all products"""
-    global REQUEST_COUNT, SUCCESS_COUNT, FAILURE_COUNT
-    REQUEST_COUNT += 1
+async def list_products(
+    request: Request,
+    response: Response,
+    ids: Optional[str] = Query(None, description="Comma-separated ids for a multi-get"),
+    offset: int = Query(0, ge=0, description="Index of the first product in the page"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size (default: everything)")
+):
+    """
+    List all products, or only the requested ones with `?ids=1,2,3`.
+
+    `offset`/`limit` return one page; X-Total-Count carries the catalogue
+    size so clients can fetch the remaining pages concurrently.
+    """
+    if ids is not None:
+        return await _multi_get(request, [i for i in ids.split(",") if i])
 
-    if LATENCY_MS > 0:
-        time.sleep(LATENCY_MS / 1000)
+    if await faults.apply("list_products"):
+        raise HTTPException(status_code=503, detail="Service temporarily unavailable")
+
+    products = list(PRODUCTS.values())
+    response.headers["X-Total-Count"] = str(len(products))
+    if limit is None:
+        return products[offset:]
+    return products[offset:offset + limit]
+
+@app.post("/products/batch")
+async def batch_get_products(request: Request, batch: ProductBatchRequest):
+    """Multi-get for callers with long id lists (POST equivalent of ?ids=)"""
+    return await _multi_get(request, batch.ids)
 
-    if FAILURE_MODE:
-        FAILURE_COUNT += 1
+async def _multi_get(request: Request, ids: List[str]) -> dict:
+    """
+    Look up several products in one request.
+
+    Returns found products in request order (duplicates collapsed) and
+    the ids that do not exist under "missing"; missing ids are not an error.
+    Recorded in metrics as "multi_get", whichever endpoint served it.
+    """
+    request.scope["metrics_route"] = "multi_get"
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+
+    if await faults.apply("multi_get"):
         raise HTTPException(status_code=503, detail="Service temporarily unavailable")
 
-    SUCCESS_COUNT += 1
-    return list(PRODUCTS.values())
+    products = []
+    missing = []
+    for product_id in dict.fromkeys(ids):
+        product = PRODUCTS.get(product_id)
+        if product is None:
+            missing.append(product_id)
+        else:
+            products.append(product)
+
+    return {"products": products, "missing": missing}
+
+def _check_route(route: Optional[str]):
+    if route is not None and route not in ROUTES:
+        raise HTTPException(status_code=400, detail=f"Unknown route '{route}', expected one of {list(ROUTES)}")
 
 @app.post("/fail/on")
 @app.get("/fail/on")
-async def fail_on():
-    global FAILURE_MODE
-    FAILURE_MODE = True
-    return {"message": "Failure enabled"}
+async def fail_on(
+    rate: float = Query(100.0, ge=0, le=100, description="Percentage of requests to fail"),
+    route: Optional[str] = Query(None, description="Limit to one route (default: all)"),
+    start_in_s: float = Query(0.0, ge=0, description="Delay before a scheduled window starts"),
+    duration_s: Optional[float] = Query(None, gt=0, description="Schedule a window instead of failing until /fail/off")
+):
+    """Enable failures; with no parameters every request fails until /fail/off"""
+    _check_route(route)
+    if duration_s is not None:
+        window = faults.schedule(start_in_s, duration_s, error_rate=rate, route=route)
+        return {"message": "Failure window scheduled", "window": window.to_dict(time.monotonic())}
+    faults.set_error_rate(rate, route)
+    return {"message": "Failure enabled", "error_rate": rate, "route": route or "*"}
 
 @app.post("/fail/off")
 @app.get("/fail/off")
 async def fail_off():
-    global FAILURE_MODE
-    FAILURE_MODE = False
+    faults.clear_errors()
     return {"message": "Failure disabled"}
 
 # Compatibility endpoints expected by ALB listener rules
@@ -97,48 +181,90 @@ async def fail_off():
 @app.get("/crash")
 async def crash():
     """Enable failure mode (alias for /fail/on)"""
-    global FAILURE_MODE
-    FAILURE_MODE = True
+    faults.set_error_rate(100.0)
     return {"message": "Failure enabled"}
 
 @app.post("/recover")
 @app.get("/recover")
 async def recover():
     """Disable failure mode (alias for /fail/off)"""
-    global FAILURE_MODE
-    FAILURE_MODE = False
+    faults.clear_errors()
     return {"message": "Failure disabled"}
 
+@app.get("/metrics/prometheus")
+async def get_prometheus_metrics():
+    """Get service metrics in Prometheus text exposition format"""
+    return PlainTextResponse(
+        metrics.render_prometheus({
+            "failure_mode": int(faults.failure_mode),
+            "injected_latency_ms": faults.latency_ms,
+            "total_products": len(PRODUCTS)
+        }),
+        media_type="text/plain; version=0.0.4"
+    )
+
 @app.get("/metrics")
-async def get_metrics():
-    """Get service metrics"""
+async def get_metrics(format: str = Query("json", pattern="^(prometheus|json)$")):
+    """Get service metrics (JSON summary by default, `?format=prometheus` for Prometheus text)"""
+    if format == "prometheus":
+        return await get_prometheus_metrics()
+
+    merged = metrics.merged()
+    statuses = {}
+    for route in ROUTES:
+        for status, count in merged["routes"].get(route, {}).get("status", {}).items():
+            statuses[status] = statuses.get(status, 0) + count
     return {
         "total_products": len(PRODUCTS),
-        "failure_mode": FAILURE_MODE,
-        "latency_ms": LATENCY_MS,
-        "requests": REQUEST_COUNT,
-        "successes": SUCCESS_COUNT,
-        "failures": FAILURE_COUNT,
-        "products": list(PRODUCTS.keys())
+        "failure_mode": faults.failure_mode,
+        "latency_ms": faults.latency_ms,
+        "requests": sum(statuses.values()),
+        "successes": sum(c for s, c in statuses.items() if 200 <= s < 300),
+        "failures": statuses.get(503, 0),
+        "products": list(PRODUCTS.keys()),
+        "faults": faults.get_config()
     }
 
 # --- Control endpoints for clearer demos ---
 
 @app.post("/latency")
 @app.get("/latency")
-async def set_latency(ms: int = Query(..., ge=0, le=60000)):
-    global LATENCY_MS
-    LATENCY_MS = ms
-    return {"message": "Latency updated", "latency_ms": LATENCY_MS}
+async def set_latency(
+    ms: Optional[int] = Query(None, ge=0, le=60000, description="Fixed delay, uniform max, or lognormal median"),
+    dist: LatencyDistribution = Query(LatencyDistribution.FIXED),
+    min_ms: int = Query(0, ge=0, le=60000, description="Uniform lower bound"),
+    sigma: float = Query(1.0, gt=0, le=3, description="Lognormal tail shape"),
+    route: Optional[str] = Query(None, description="Limit to one route (default: all)"),
+    start_in_s: float = Query(0.0, ge=0, description="Delay before a scheduled window starts"),
+    duration_s: Optional[float] = Query(None, gt=0, description="Schedule a window instead of a permanent setting"),
+    clear: bool = Query(False, description="Remove the route override(s) so routes follow the global latency")
+):
+    """
+    Set injected latency. `ms=0` disables the global latency; with `route`
+    it pins that route at zero even while a global latency is set.
+    """
+    _check_route(route)
+    if clear:
+        faults.clear_route_latency(route)
+        return {"message": "Route latency override cleared", "route": route or "*"}
+    if ms is None:
+        raise HTTPException(status_code=400, detail="ms is required unless clear=true")
+    # Routes and windows keep an explicit zero: it overrides the global latency
+    profile = LatencyProfile(ms, dist, min_ms=min_ms, sigma=sigma) if ms > 0 or route or duration_s else None
+    if duration_s is not None:
+        window = faults.schedule(start_in_s, duration_s, latency=profile, route=route)
+        return {"message": "Latency window scheduled", "window": window.to_dict(time.monotonic())}
+    faults.set_latency(profile, route)
+    return {
+        "message": "Latency updated",
+        "latency_ms": ms,
+        "latency": profile.to_dict() if profile else None,
+        "route": route or "*"
+    }
 
 @app.post("/reset")
 @app.get("/reset")
 async def reset_all():
-    global FAILURE_MODE, LATENCY_MS
-    global REQUEST_COUNT, SUCCESS_COUNT, FAILURE_COUNT
-    FAILURE_MODE = False
-    LATENCY_MS = 0
-    REQUEST_COUNT = 0
-    SUCCESS_COUNT = 0
-    FAILURE_COUNT = 0
+    faults.reset()
+    metrics.reset()
     return {"message": "All settings reset"}
\ No newline at end of file
@@ -0,0 +1,210 @@
+# services/product-service/fault_injection.py
+import asyncio
+import math
+import random
+import time
+from enum import Enum
+from typing import Dict, List, Optional
+
+MAX_LATENCY_MS = 60000
+
+
+class LatencyDistribution(Enum):
+    FIXED = "fixed"          # Always `ms`
+    UNIFORM = "uniform"      # Uniform between `min_ms` and `ms`
+    LOGNORMAL = "lognormal"  # Median `ms`, long right tail controlled by `sigma`
+
+
+class LatencyProfile:
+    """Injected latency for one route (or globally)"""
+
+    def __init__(
+        self,
+        ms: float,
+        distribution: LatencyDistribution = LatencyDistribution.FIXED,
+        min_ms: float = 0.0,
+        sigma: float = 1.0
+    ):
+        """
+        Args:
+            ms: Fixed delay, uniform upper bound, or lognormal median (milliseconds)
+            distribution: How each request's delay is drawn
+            min_ms: Uniform lower bound
+            sigma: Lognormal shape; 1.0 puts p99 at roughly 10x the median
+        """
+        self.ms = ms
+        self.distribution = distribution
+        self.min_ms = min(min_ms, ms)
+        self.sigma = sigma
+
+    def sample_ms(self) -> float:
+        if self.distribution == LatencyDistribution.UNIFORM:
+            delay = random.uniform(self.min_ms, self.ms)
+        elif self.distribution == LatencyDistribution.LOGNORMAL:
+            delay = random.lognormvariate(math.log(self.ms), self.sigma) if self.ms > 0 else 0.0
+        else:
+            delay = self.ms
+        return min(delay, MAX_LATENCY_MS)
+
+    def to_dict(self) -> dict:
+        return {
+            "distribution": self.distribution.value,
+            "ms": self.ms,
+            "min_ms": self.min_ms,
+            "sigma": self.sigma
+        }
+
+
+class FaultWindow:
+    """A scheduled period of injected errors and/or latency"""
+
+    def __init__(
+        self,
+        start: float,
+        end: float,
+        error_rate: float = 0.0,
+        latency: Optional[LatencyProfile] = None,
+        route: Optional[str] = None
+    ):
+        """
+        Args:
+            start, end: time.monotonic() bounds of the window
+            error_rate: Percentage (0-100) of requests failed while active
+            latency: Latency profile overriding the route's while active
+            route: Limit the window to one route; None means every route
+        """
+        self.start = start
+        self.end = end
+        self.error_rate = error_rate
+        self.latency = latency
+        self.route = route
+
+    def applies(self, route: str, now: float) -> bool:
+        return self.start <= now < self.end and (self.route is None or self.route == route)
+
+    def to_dict(self, now: float) -> dict:
+        return {
+            "route": self.route or "*",
+            "starts_in_s": round(max(self.start - now, 0.0), 3),
+            "ends_in_s": round(self.end - now, 3),
+            "error_rate": self.error_rate,
+            "latency": self.latency.to_dict() if self.latency else None
+        }
+
+
+class FaultInjector:
+    """
+    Non-blocking fault injection for the product service.
+
+    Delays are awaited with asyncio.sleep, so a slow request never stalls
+    the event loop (or /health) for other requests.
+    """
+
+    def __init__(self, latency_ms: int = 0, failure_mode: bool = False):
+        self.reset()
+        if latency_ms > 0:
+            self.latency = LatencyProfile(latency_ms)
+        if failure_mode:
+            self.error_rate = 100.0
+
+    def reset(self):
+        """Clear every latency, error rate and scheduled window"""
+        self.latency: Optional[LatencyProfile] = None
+        self.error_rate = 0.0
+        self.route_latency: Dict[str, LatencyProfile] = {}
+        self.route_error_rate: Dict[str, float] = {}
+        self.windows: List[FaultWindow] = []
+
+    @property
+    def failure_mode(self) -> bool:
+        """True when every request fails (the classic /fail/on behaviour)"""
+        return self.error_rate >= 100.0
+
+    @property
+    def latency_ms(self) -> float:
+        """Configured global latency (median for lognormal), for status output"""
+        return self.latency.ms if self.latency else 0
+
+    def set_latency(self, profile: Optional[LatencyProfile], route: Optional[str] = None):
+        """
+        Set the global latency (None disables it) or one route's override.
+
+        A route override always wins over the global latency, including a
+        zero one; clear_route_latency() makes the route follow the global again.
+        """
+        if route is None:
+            self.latency = profile
+        else:
+            self.route_latency[route] = profile or LatencyProfile(0)
+
+    def clear_route_latency(self, route: Optional[str] = None):
+        """Remove one route's latency override (every route's if None)"""
+        if route is None:
+            self.route_latency.clear()
+        else:
+            self.route_latency.pop(route, None)
+
+    def set_error_rate(self, rate: float, route: Optional[str] = None):
+        if route is None:
+            self.error_rate = rate
+        else:
+            self.route_error_rate[route] = rate
+
+    def clear_errors(self):
+        """Stop all injected errors, including scheduled error windows"""
+        self.error_rate = 0.0
+        self.route_error_rate.clear()
+        self.windows = [w for w in self.windows if w.latency is not None]
+        for window in self.windows:
+            window.error_rate = 0.0
+
+    def schedule(
+        self,
+        start_in_s: float,
+        duration_s: float,
+        error_rate: float = 0.0,
+        latency: Optional[LatencyProfile] = None,
+        route: Optional[str] = None
+    ) -> FaultWindow:
+        now = time.monotonic()
+        window = FaultWindow(now + start_in_s, now + start_in_s + duration_s,
+                             error_rate, latency, route)
+        self.windows.append(window)
+        return window
+
+    async def apply(self, route: str) -> bool:
+        """
+        Inject latency for a request on `route`.
+
+        Returns:
+            True if the request should fail
+        """
+        latency = self.route_latency.get(route, self.latency)
+        error_rate = self.route_error_rate.get(route, self.error_rate)
+
+        if self.windows:
+            now = time.monotonic()
+            # Drop expired windows lazily
+            self.windows = [w for w in self.windows if w.end > now]
+            for window in self.windows:
+                if window.applies(route, now):
+                    if window.latency is not None:
+                        latency = window.latency
+                    error_rate = max(error_rate, window.error_rate)
+
+        if latency is not None:
+            delay_ms = latency.sample_ms()
+            if delay_ms > 0:
+                await asyncio.sleep(delay_ms / 1000)
+
+        return error_rate >= 100.0 or (error_rate > 0 and random.random() * 100 < error_rate)
+
+    def get_config(self) -> dict:
+        now = time.monotonic()
+        return {
+            "latency": self.latency.to_dict() if self.latency else None,
+            "error_rate": self.error_rate,
+            "route_latency": {r: p.to_dict() for r, p in self.route_latency.items()},
+            "route_error_rate": dict(self.route_error_rate),
+            "windows": [w.to_dict(now) for w in self.windows if w.end > now]
+        }
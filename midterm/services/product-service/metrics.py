@@ -0,0 +1,379 @@
+# services/product-service/metrics.py
+"""
+Request metrics for the product service.
+
+- Per-route latency histograms with HDR-style log-linear buckets: fixed
+  memory (704 counters per route), ~3% relative precision, 1us..60s.
+- Per-route, per-status request counters.
+- Rolling 1-minute and 5-minute windows built from 10-second slots.
+- Multi-worker support: with METRICS_DIR set, every uvicorn worker writes
+  its own snapshot file and /metrics merges all of them exactly (counts
+  and histogram buckets are summed, percentiles computed after merging).
+- Prometheus text exposition output.
+"""
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Iterable, List, Optional
+
+# Log-linear bucketing: values below 2**SUB_BITS us get their own bucket,
+# above that each power of two is split into 2**SUB_BITS sub-buckets
+SUB_BITS = 5
+SUB_COUNT = 1 << SUB_BITS
+MAX_VALUE_US = 60_000_000
+BUCKET_COUNT = (MAX_VALUE_US.bit_length() - SUB_BITS + 1) * SUB_COUNT
+
+# Coarse `le` boundaries (seconds) for the exported Prometheus histogram
+EXPORT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.95, 0.99)
+WINDOWS = (("1m", 60), ("5m", 300))
+
+PREFIX = "product_service"
+RESET_MARKER = "reset"
+STALE_FLUSHES = 5  # Missed flushes before a worker's snapshot is ignored
+
+
+def bucket_index(value_us: int) -> int:
+    """Map a latency in microseconds to its histogram bucket"""
+    if value_us < SUB_COUNT:
+        return max(value_us, 0)
+    if value_us > MAX_VALUE_US:
+        value_us = MAX_VALUE_US
+    shift = value_us.bit_length() - SUB_BITS - 1
+    return ((shift + 1) << SUB_BITS) + (value_us >> shift) - SUB_COUNT
+
+
+def bucket_bounds(index: int) -> tuple:
+    """[lower, upper) bounds in microseconds of a bucket"""
+    if index < SUB_COUNT:
+        return index, index + 1
+    shift = (index >> SUB_BITS) - 1
+    mantissa = SUB_COUNT + (index & (SUB_COUNT - 1))
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+def percentile_us(buckets: Dict[int, int], q: float) -> float:
+    """Value at quantile q from sparse {bucket: count}, as the bucket midpoint"""
+    total = sum(buckets.values())
+    if total == 0:
+        return 0.0
+    rank = q * total
+    seen = 0
+    for index in sorted(buckets):
+        seen += buckets[index]
+        if seen >= rank:
+            lower, upper = bucket_bounds(index)
+            return (lower + upper) / 2
+    lower, upper = bucket_bounds(max(buckets))
+    return (lower + upper) / 2
+
+
+class LatencyHistogram:
+    """Fixed-size log-linear latency histogram"""
+
+    __slots__ = ("counts", "count", "sum_us")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * BUCKET_COUNT
+        self.count = 0
+        self.sum_us = 0
+
+    def record(self, value_us: int):
+        self.counts[bucket_index(value_us)] += 1
+        self.count += 1
+        self.sum_us += value_us
+
+    def to_sparse(self) -> Dict[int, int]:
+        return {i: c for i, c in enumerate(self.counts) if c}
+
+
+class _Slot:
+    """Counters for one 10-second slice of the rolling windows"""
+
+    __slots__ = ("slot_id", "routes")
+
+    def __init__(self, slot_id: int):
+        self.slot_id = slot_id
+        # route -> {"hist": {bucket: count}, "status": {status: count}}
+        self.routes: Dict[str, dict] = {}
+
+
+class MetricsRegistry:
+    """Per-worker request metrics, mergeable across workers"""
+
+    def __init__(
+        self,
+        slot_seconds: int = 10,
+        window_seconds: int = 300,
+        metrics_dir: Optional[str] = None,
+        flush_interval: float = 1.0
+    ):
+        """
+        Args:
+            slot_seconds: Granularity of the rolling windows
+            window_seconds: Longest rolling window kept
+            metrics_dir: Shared directory for per-worker snapshots (multi-worker mode)
+            flush_interval: Seconds between snapshot writes; a worker whose
+                snapshot is STALE_FLUSHES intervals old is treated as gone
+        """
+        self.slot_seconds = slot_seconds
+        self.slot_count = window_seconds // slot_seconds
+        self.metrics_dir = metrics_dir
+        self.flush_interval = flush_interval
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.status_counts: Dict[str, Dict[int, int]] = {}
+        self._slots: List[_Slot] = [_Slot(-1) for _ in range(self.slot_count)]
+        self.reset_at = 0.0
+
+    def record(self, route: str, status: int, duration_s: float):
+        """Record one finished request (O(1), no allocation on the steady path)"""
+        value_us = int(duration_s * 1_000_000)
+
+        histogram = self.histograms.get(route)
+        if histogram is None:
+            histogram = self.histograms[route] = LatencyHistogram()
+            self.status_counts[route] = {}
+        histogram.record(value_us)
+        statuses = self.status_counts[route]
+        statuses[status] = statuses.get(status, 0) + 1
+
+        slot_id = int(time.time()) // self.slot_seconds
+        slot = self._slots[slot_id % self.slot_count]
+        if slot.slot_id != slot_id:
+            slot = self._slots[slot_id % self.slot_count] = _Slot(slot_id)
+        window = slot.routes.get(route)
+        if window is None:
+            window = slot.routes[route] = {"hist": {}, "status": {}}
+        index = bucket_index(value_us)
+        window["hist"][index] = window["hist"].get(index, 0) + 1
+        window["status"][status] = window["status"].get(status, 0) + 1
+
+    def reset(self):
+        """Zero this worker; in multi-worker mode also tell the other workers"""
+        self._reset_local(time.time())
+        if self.metrics_dir:
+            with open(os.path.join(self.metrics_dir, RESET_MARKER), "w") as f:
+                f.write(str(self.reset_at))
+
+    def _reset_local(self, reset_at: float):
+        self.histograms.clear()
+        self.status_counts.clear()
+        self._slots = [_Slot(-1) for _ in range(self.slot_count)]
+        self.reset_at = reset_at
+
+    def _shared_reset_at(self) -> float:
+        try:
+            with open(os.path.join(self.metrics_dir, RESET_MARKER)) as f:
+                return float(f.read() or 0)
+        except (OSError, ValueError):
+            return 0.0
+
+    # --- Snapshots and multi-worker aggregation ---
+
+    def snapshot(self) -> dict:
+        """JSON-serialisable state of this worker"""
+        return {
+            "pid": os.getpid(),
+            "reset_at": self.reset_at,
+            "routes": {
+                route: {
+                    "hist": hist.to_sparse(),
+                    "count": hist.count,
+                    "sum_us": hist.sum_us,
+                    "status": dict(self.status_counts[route])
+                }
+                for route, hist in self.histograms.items()
+            },
+            "slots": {
+                slot.slot_id: slot.routes for slot in self._slots if slot.slot_id >= 0
+            }
+        }
+
+    def flush(self):
+        """Atomically write this worker's snapshot to metrics_dir"""
+        if not self.metrics_dir:
+            return
+        shared_reset_at = self._shared_reset_at()
+        if shared_reset_at > self.reset_at:
+            self._reset_local(shared_reset_at)
+        path = os.path.join(self.metrics_dir, f"worker-{os.getpid()}.json")
+        fd, tmp = tempfile.mkstemp(dir=self.metrics_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    async def flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+    def collect(self) -> List[dict]:
+        """This worker's live snapshot plus every live worker's last flush"""
+        if self.metrics_dir:
+            self.flush()
+        snapshots = [self.snapshot()]
+        if self.metrics_dir:
+            own = f"worker-{os.getpid()}.json"
+            # Live workers rewrite their file every flush_interval, even when
+            # idle; older files belong to restarted or dead workers
+            stale_before = time.time() - STALE_FLUSHES * self.flush_interval
+            for name in os.listdir(self.metrics_dir):
+                if name == own or not (name.startswith("worker-") and name.endswith(".json")):
+                    continue
+                path = os.path.join(self.metrics_dir, name)
+                try:
+                    if os.path.getmtime(path) < stale_before:
+                        continue
+                    with open(path) as f:
+                        snapshot = json.load(f)
+                except (OSError, ValueError):
+                    continue  # being replaced or from a crashed worker
+                if snapshot.get("reset_at", 0) >= self.reset_at:
+                    snapshots.append(snapshot)
+        return snapshots
+
+    @staticmethod
+    def merge(snapshots: Iterable[dict]) -> dict:
+        """Sum counters and histogram buckets across worker snapshots"""
+        routes: Dict[str, dict] = {}
+        slots: Dict[int, Dict[str, dict]] = {}
+        for snap in snapshots:
+            for route, data in snap["routes"].items():
+                merged = routes.setdefault(route, {"hist": {}, "count": 0, "sum_us": 0, "status": {}})
+                _add_counts(merged["hist"], data["hist"])
+                _add_counts(merged["status"], data["status"])
+                merged["count"] += data["count"]
+                merged["sum_us"] += data["sum_us"]
+            for slot_id, slot_routes in snap["slots"].items():
+                slot = slots.setdefault(int(slot_id), {})
+                for route, data in slot_routes.items():
+                    merged = slot.setdefault(route, {"hist": {}, "status": {}})
+                    _add_counts(merged["hist"], data["hist"])
+                    _add_counts(merged["status"], data["status"])
+        return {"routes": routes, "slots": slots}
+
+    def merged(self) -> dict:
+        return self.merge(self.collect())
+
+    def window(self, merged: dict, seconds: int) -> Dict[str, dict]:
+        """Per-route histogram and status counts over the last `seconds`"""
+        current = int(time.time()) // self.slot_seconds
+        oldest = current - seconds // self.slot_seconds
+        result: Dict[str, dict] = {}
+        for slot_id, slot_routes in merged["slots"].items():
+            if not oldest < slot_id <= current:
+                continue
+            for route, data in slot_routes.items():
+                window = result.setdefault(route, {"hist": {}, "status": {}})
+                _add_counts(window["hist"], data["hist"])
+                _add_counts(window["status"], data["status"])
+        return result
+
+    # --- Prometheus exposition ---
+
+    def render_prometheus(self, extra_gauges: Optional[Dict[str, float]] = None) -> str:
+        merged = self.merged()
+        lines: List[str] = []
+
+        lines.append(f"# HELP {PREFIX}_requests_total Requests handled, by route and status code")
+        lines.append(f"# TYPE {PREFIX}_requests_total counter")
+        for route, data in sorted(merged["routes"].items()):
+            for status, count in sorted(data["status"].items(), key=lambda kv: int(kv[0])):
+                lines.append(f'{PREFIX}_requests_total{{route="{route}",status="{status}"}} {count}')
+
+        lines.append(f"# HELP {PREFIX}_request_duration_seconds Request latency, by route")
+        lines.append(f"# TYPE {PREFIX}_request_duration_seconds histogram")
+        for route, data in sorted(merged["routes"].items()):
+            for le, cumulative in _export_buckets(data["hist"]):
+                lines.append(f'{PREFIX}_request_duration_seconds_bucket{{route="{route}",le="{le}"}} {cumulative}')
+            lines.append(f'{PREFIX}_request_duration_seconds_bucket{{route="{route}",le="+Inf"}} {data["count"]}')
+            lines.append(f'{PREFIX}_request_duration_seconds_sum{{route="{route}"}} {data["sum_us"] / 1e6:.6f}')
+            lines.append(f'{PREFIX}_request_duration_seconds_count{{route="{route}"}} {data["count"]}')
+
+        lines.append(f"# HELP {PREFIX}_window_request_duration_seconds Latency quantiles over rolling windows")
+        lines.append(f"# TYPE {PREFIX}_window_request_duration_seconds gauge")
+        windows = [(name, seconds, self.window(merged, seconds)) for name, seconds in WINDOWS]
+        for name, _, routes in windows:
+            for route, data in sorted(routes.items()):
+                for q in QUANTILES:
+                    value = percentile_us(data["hist"], q) / 1e6
+                    lines.append(f'{PREFIX}_window_request_duration_seconds'
+                                 f'{{route="{route}",window="{name}",quantile="{q}"}} {value:.6f}')
+
+        lines.append(f"# HELP {PREFIX}_window_requests_per_second Request rate over rolling windows, by status class")
+        lines.append(f"# TYPE {PREFIX}_window_requests_per_second gauge")
+        for name, seconds, routes in windows:
+            for route, data in sorted(routes.items()):
+                by_class: Dict[str, int] = {}
+                for status, count in data["status"].items():
+                    status_class = f"{str(status)[0]}xx"
+                    by_class[status_class] = by_class.get(status_class, 0) + count
+                for status_class, count in sorted(by_class.items()):
+                    lines.append(f'{PREFIX}_window_requests_per_second'
+                                 f'{{route="{route}",window="{name}",status_class="{status_class}"}} {count / seconds:.4f}')
+
+        for name, value in (extra_gauges or {}).items():
+            lines.append(f"# TYPE {PREFIX}_{name} gauge")
+            lines.append(f"{PREFIX}_{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _add_counts(into: dict, counts: dict):
+    # JSON round-trips turn int keys into strings; normalise back to int
+    for key, count in counts.items():
+        key = int(key)
+        into[key] = into.get(key, 0) + count
+
+
+def _export_buckets(hist: Dict[int, int]):
+    """Cumulative counts at EXPORT_BUCKETS boundaries (bucket lower bound < le)"""
+    ordered = sorted(hist.items())
+    cumulative = 0
+    i = 0
+    for le in EXPORT_BUCKETS:
+        limit_us = le * 1_000_000
+        while i < len(ordered) and bucket_bounds(ordered[i][0])[0] < limit_us:
+            cumulative += ordered[i][1]
+            i += 1
+        yield le, cumulative
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request by route name.
+
+    The route is the matched endpoint's function name, unless the handler
+    stores another key in scope["metrics_route"] (one logical route served
+    by several endpoints, or by a query parameter of another endpoint).
+    """
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched endpoint in the shared scope dict
+            route = scope.get("metrics_route")
+            if route is None:
+                endpoint = scope.get("endpoint")
+                route = endpoint.__name__ if endpoint is not None else "unmatched"
+            self.registry.record(route, status, time.perf_counter() - start)
@@ -193,7 +193,7 @@ resource "aws_lb_target_group" "cart_fixed" {
     unhealthy_threshold = 2
     timeout             = 5
     interval            = 30
-    path                = "/health"
+    path                = "/ready"
     matcher             = "200"
   }
 